@@ -0,0 +1,254 @@
+# NumPy 2.0 or later is needed, for bitwise_count; without it the module can't be imported
+try:
+    import numpy as np
+except ImportError as error:
+    raise ImportError("BatchAnalysis needs NumPy 2.0 or later") from error
+if not hasattr(np, 'bitwise_count'):
+    raise ImportError(f"BatchAnalysis needs NumPy 2.0 or later, found NumPy {np.__version__}")
+
+from ChessVar import (SQUARES, BETWEEN, KNIGHT_ATTACKS, KING_ATTACKS, ROOK_RAYS, BISHOP_RAYS,
+                      ROOK_LINES, BISHOP_LINES, RECORD_SIZE, STATUSES, KING_CODES)
+
+
+# Boards are (N, 64) int8 arrays holding the ChessVar piece code of each square from a1 to h8:
+# 0 for a blank space, 1-4 for the white king, rook, bishop and knight and 5-8 for black's.
+# Turns are (N,) arrays holding 0 when white is to move and 1 when black is.
+# Statuses are (N,) int8 arrays holding each game status as a number into STATUSES.
+WHITE, BLACK = 0, 1
+KING, ROOK, BISHOP, KNIGHT = 0, 1, 2, 3
+BLANK = 64  # a square off the board, whose row in every table is 0
+
+# the default number of positions worked on at once, which keeps the working arrays to a few tens of MB
+CHUNK_SIZE = 4096
+
+
+def _bitboard_array(bitboards):
+    """ Takes a list of bitboards. Returns them as a uint64 array with a trailing 0 for BLANK. """
+    return np.array(list(bitboards) + [0], dtype=np.uint64)
+
+
+# every table has a row for BLANK that is 0, so a missing piece never hits anything
+BITS = _bitboard_array(1 << index for index in range(64))
+KNIGHT_TABLE = _bitboard_array(KNIGHT_ATTACKS)
+KING_TABLE = _bitboard_array(KING_ATTACKS)
+ROOK_TABLE = _bitboard_array(ROOK_RAYS)
+BISHOP_TABLE = _bitboard_array(BISHOP_RAYS)
+# the squares a piece of each type hits from each square on an empty board, by type
+LINE_TABLES = np.stack([KING_TABLE, ROOK_TABLE, BISHOP_TABLE, KNIGHT_TABLE])
+BETWEEN_TABLE = np.zeros((BLANK + 1, BLANK + 1), dtype=np.uint64)
+BETWEEN_TABLE[:64, :64] = BETWEEN
+# each direction's rays, paired with whether the ray runs towards higher square indexes
+ROOK_LINE_TABLES = [(_bitboard_array(rays), ascending) for rays, ascending in ROOK_LINES]
+BISHOP_LINE_TABLES = [(_bitboard_array(rays), ascending) for rays, ascending in BISHOP_LINES]
+
+
+def records_to_arrays(records):
+    """
+    Takes a buffer of ChessVar records made by to_record laid end to end (such as a SnapshotStore's
+    file contents after its header) as a parameter.
+    Returns the (N, 64) int8 boards, (N,) int8 turns and (N,) int8 statuses arrays of those positions,
+    read the same way as from_record. Raises ValueError if a record's turn and status byte is unknown.
+    """
+    pairs = np.frombuffer(records, dtype=np.uint8).reshape(-1, RECORD_SIZE)
+    boards = np.empty((len(pairs), 64), dtype=np.int8)
+    # square 2n is the low nibble of byte n and square 2n + 1 the high nibble
+    boards[:, 0::2] = pairs[:, :32] & 15
+    boards[:, 1::2] = pairs[:, :32] >> 4
+    flags = pairs[:, 32]
+    if (flags >> 3).any():
+        raise ValueError(f"unknown turn and status byte {flags[np.argmax(flags >> 3)]}")
+    turns = (flags & 1).astype(np.int8)
+    statuses = (flags >> 1).astype(np.int8)
+    return boards, turns, statuses
+
+
+def games_to_arrays(games):
+    """
+    Takes an iterable of ChessVar objects as a parameter.
+    Returns the (N, 64) int8 boards, (N,) int8 turns and (N,) int8 statuses arrays of their positions.
+    """
+    return records_to_arrays(b"".join(game.to_record() for game in games))
+
+
+def _pack(masks):
+    """ Takes a bool array whose last axis is the 64 squares. Returns it as uint64 bitboards (bit n for square n). """
+    return np.packbits(masks, axis=-1, bitorder='little').view('<u8')[..., 0]
+
+
+def _unpack(bitboards):
+    """ Takes a uint64 array of bitboards. Returns a bool array with a last axis of the 64 squares. """
+    return np.unpackbits(bitboards.astype('<u8')[..., None].view(np.uint8), axis=-1, bitorder='little').astype(bool)
+
+
+def _game_states(king_squares, turns):
+    """
+    Takes (n, 2) king squares and (n,) turns. Returns the (n,) STATUSES number of each position,
+    following update_game_state: the race is only decided once black has moved, so it is white's turn.
+    """
+    white_home = king_squares[:, WHITE] >= 56
+    black_home = king_squares[:, BLACK] >= 56
+    status = np.zeros(len(turns), dtype=np.int8)
+    status[white_home & ~black_home] = STATUSES.index('WHITE_WON')
+    status[black_home & ~white_home] = STATUSES.index('BLACK_WON')
+    status[white_home & black_home] = STATUSES.index('TIE')
+    status[turns == BLACK] = STATUSES.index('UNFINISHED')
+    return status
+
+
+def _slide(lines, square, occupied):
+    """
+    Takes a piece's line tables, an array of squares and an array of occupancy bitboards as parameters.
+    Returns the bitboards of squares a sliding piece on each square can reach, up to and including
+    the first piece it meets in each direction, like ChessVar's _slide.
+    """
+    attacks = np.zeros(len(square), dtype=np.uint64)
+    for rays, ascending in lines:
+        ray = rays[square]
+        blockers = ray & occupied
+        if ascending:
+            nearest = blockers & (~blockers + np.uint64(1))  # the lowest set bit
+        else:
+            # spread the highest set bit down, then keep only it
+            nearest = blockers
+            for shift in (1, 2, 4, 8, 16, 32):
+                nearest |= nearest >> np.uint64(shift)
+            nearest ^= nearest >> np.uint64(1)
+        index = np.where(blockers != 0, np.bitwise_count(nearest - np.uint64(1)), BLANK)
+        # cut the ray off behind the nearest blocker
+        attacks |= ray ^ rays[index]
+    return attacks
+
+
+def _piece_attacks(square, kind, occupied):
+    """
+    Takes the square and type of each piece and the occupancy bitboard of its board as parameters.
+    Returns the bitboard of squares each piece could move to or capture on, like piece_attacks.
+    """
+    attacks = np.where(kind == KNIGHT, KNIGHT_TABLE[square], np.where(kind == KING, KING_TABLE[square], np.uint64(0)))
+    for slider, lines in ((ROOK, ROOK_LINE_TABLES), (BISHOP, BISHOP_LINE_TABLES)):
+        pieces = np.flatnonzero(kind == slider)
+        attacks[pieces] = _slide(lines, square[pieces], occupied[pieces])
+    return attacks
+
+
+def _attacked(square, opponent_pieces, occupied_after):
+    """
+    Takes a square for each candidate move, the bitboards of the opponent's king, rooks, bishops and
+    knights after it and the occupancy after it as parameters.
+    Returns whether any opponent piece hits the square after each move.
+    """
+    kings, rooks, bishops, knights = opponent_pieces
+    attacked = (KNIGHT_TABLE[square] & knights != 0) | (KING_TABLE[square] & kings != 0)
+    # a slider hits the square if a slider of its type on the square would hit it; only the
+    # moves with an opponent slider lined up with the square need the rays followed
+    for table, lines, sliders in ((ROOK_TABLE, ROOK_LINE_TABLES, rooks), (BISHOP_TABLE, BISHOP_LINE_TABLES, bishops)):
+        lined_up = np.flatnonzero(table[square] & sliders)
+        hits = _slide(lines, square[lined_up], occupied_after[lined_up]) & sliders[lined_up] != 0
+        attacked[lined_up] |= hits
+    return attacked
+
+
+def _analyze_chunk(boards, turns, statuses):
+    """
+    Takes (n, 64) boards, (n,) turns and (n,) statuses, or None to work the statuses out from the kings.
+    Returns the analyze_positions arrays for them.
+    """
+    n = len(boards)
+    bitboards = np.stack([_pack(boards == code) for code in range(9)], axis=1)  # (n, 9), column 0 unused
+    occupied = np.bitwise_or.reduce(bitboards[:, 1:], axis=1)
+    king_squares = np.stack([np.argmax(boards == KING_CODES[color], axis=1) for color in ('white', 'black')], axis=1)
+    status = _game_states(king_squares, turns) if statuses is None else statuses
+
+    # every piece on every board
+    position, square = np.nonzero(boards)
+    code = boards[position, square].astype(np.intp)
+    kind, color = (code - 1) % 4, (code - 1) // 4
+    attacks = _piece_attacks(square, kind, occupied[position])
+    side_attacks = np.zeros((n, 2), dtype=np.uint64)
+    np.bitwise_or.at(side_attacks, (position, color), attacks)
+
+    # candidate moves: each piece of the side to move onto any square it hits that is not its own
+    own = np.where(turns == WHITE, bitboards[:, 1:5].T, bitboards[:, 5:9].T)
+    own = np.bitwise_or.reduce(own, axis=0)
+    movers = np.flatnonzero((color == turns[position]) & (status[position] == 0))  # none once the game is over
+    piece, target = np.nonzero(_unpack(attacks[movers] & ~own[position[movers]]))
+    piece = movers[piece]
+    position, origin, kind, mover = position[piece], square[piece], kind[piece], color[piece]
+
+    # the opponent's pieces and the occupancy after each candidate move
+    from_bit, to_bit = BITS[origin], BITS[target]
+    opponent = np.where(mover == WHITE, KING_CODES['black'], KING_CODES['white'])
+    opponent_pieces = [bitboards[position, opponent + offset] & ~to_bit for offset in (KING, ROOK, BISHOP, KNIGHT)]
+    occupied_after = occupied[position] & ~from_bit | to_bit
+
+    # the moved piece may not hit the opponent's king, and landing on it counts as hitting it
+    opponent_king = king_squares[position, 1 - mover]
+    gives_check = (target == opponent_king) | ((LINE_TABLES[kind, target] & BITS[opponent_king] != 0)
+                                               & (BETWEEN_TABLE[target, opponent_king] & occupied_after == 0))
+    # no opponent piece may hit the player's king afterwards
+    player_king = np.where(kind == KING, target, king_squares[position, mover])
+    attacked = _attacked(player_king, opponent_pieces, occupied_after)
+
+    legal = ~gives_check & ~attacked
+    moves = np.zeros((n, 64), dtype=np.uint64)
+    np.bitwise_or.at(moves, (position[legal], origin[legal]), to_bit[legal])
+    return king_squares, side_attacks, moves, status
+
+
+def analyze_positions(boards, turns=None, statuses=None, chunk_size=CHUNK_SIZE):
+    """
+    Takes an (N, 64) int8 array of boards, an (N,) array of turns (white to move by default),
+    an (N,) array of statuses (worked out from the kings by default, so a game tied by repetition
+    needs its status given) and the positions worked on at once as parameters.
+    Returns a dictionary of NumPy arrays:
+    "king_squares", (N, 2) int8 white and black king squares;
+    "attacks", (N, 2) uint64 bitboards of the squares each side's pieces could move to or capture on;
+    "legal", (N, 64) uint64 bitboards of the legal destinations of the piece on each origin square
+    for the side to move, following the same rules as make_move;
+    "status", (N,) int8 game states as numbers into STATUSES: the given statuses, or else following
+    update_game_state. A game that is over has no legal moves.
+    Raises ValueError if a board is the wrong shape, holds an unknown code or does not have one king per side,
+    or if a status is unknown.
+    """
+    boards = np.asarray(boards, dtype=np.int8)
+    if boards.ndim != 2 or boards.shape[1] != 64:
+        raise ValueError(f"expected an (N, 64) array of boards, got shape {boards.shape}")
+    turns = np.zeros(len(boards), dtype=np.int8) if turns is None else np.asarray(turns, dtype=np.int8)
+    if turns.shape != (len(boards),):
+        raise ValueError(f"expected {len(boards)} turns, got shape {turns.shape}")
+    if statuses is not None:
+        statuses = np.asarray(statuses, dtype=np.int8)
+        if statuses.shape != (len(boards),):
+            raise ValueError(f"expected {len(boards)} statuses, got shape {statuses.shape}")
+        if ((statuses < 0) | (statuses >= len(STATUSES))).any():
+            raise ValueError("statuses hold unknown game status numbers")
+    if ((boards < 0) | (boards > 8)).any():
+        raise ValueError("boards hold unknown piece codes")
+    for color in ('white', 'black'):
+        if ((boards == KING_CODES[color]).sum(axis=1) != 1).any():
+            raise ValueError(f"every board must have exactly one {color} king")
+
+    results = {
+        "king_squares": np.empty((len(boards), 2), dtype=np.int8),
+        "attacks": np.empty((len(boards), 2), dtype=np.uint64),
+        "legal": np.empty((len(boards), 64), dtype=np.uint64),
+        "status": np.empty(len(boards), dtype=np.int8),
+    }
+    for start in range(0, len(boards), chunk_size):
+        chunk = slice(start, start + chunk_size)
+        parts = _analyze_chunk(boards[chunk], turns[chunk], None if statuses is None else statuses[chunk])
+        for name, part in zip(("king_squares", "attacks", "legal", "status"), parts):
+            results[name][chunk] = part
+    return results
+
+
+def legal_move_list(legal):
+    """
+    Takes one position's (64,) uint64 "legal" bitboards from analyze_positions as a parameter.
+    Returns its legal moves as (current, next) location pairs, in the order legal_moves lists them.
+    """
+    moves = []
+    for origin in np.flatnonzero(legal):
+        targets = int(legal[origin])
+        moves.extend((SQUARES[origin], SQUARES[target]) for target in range(64) if targets >> target & 1)
+    return moves
@@ -0,0 +1,79 @@
+import random
+import unittest
+from ChessVar import ChessVar, STATUSES, SQUARE_INDEX, piece_attacks
+from Engine_Tests import WHITE_TO_WIN, BLACK_TO_TIE, play
+# the module needs NumPy 2.0 or later, so its tests are skipped without it
+try:
+    import numpy as np
+    from BatchAnalysis import analyze_positions, games_to_arrays, records_to_arrays, legal_move_list
+    HAVE_NUMPY = True
+except ImportError:
+    HAVE_NUMPY = False
+
+
+def random_games(count, seed):
+    """ Takes a number of games and a random seed. Returns a list of games with random moves played. """
+    rng = random.Random(seed)
+    games = []
+    for _ in range(count):
+        game = ChessVar()
+        for _ in range(rng.randrange(40)):
+            moves = game.legal_moves()
+            if not moves:
+                break
+            game.apply_move(*rng.choice(moves))
+        games.append(game)
+    return games
+
+
+@unittest.skipIf(not HAVE_NUMPY, "BatchAnalysis needs NumPy 2.0 or later")
+class TestBatchAnalysis(unittest.TestCase):
+    """ Contains unit tests for the BatchAnalysis module. """
+    def test_1(self):
+        """ Tests the batch results match the ChessVar rules. """
+        games = random_games(40, seed=3) + [play(WHITE_TO_WIN), play(BLACK_TO_TIE),
+                                           play(WHITE_TO_WIN + [("a7", "b8"), ("h6", "h7")])]
+        boards, turns, statuses = games_to_arrays(games)
+        self.assertEqual(boards.shape, (len(games), 64))
+        results = analyze_positions(boards, turns, statuses, chunk_size=16)
+        for index, game in enumerate(games):
+            self.assertEqual(sorted(legal_move_list(results["legal"][index])), sorted(game.legal_moves()))
+            self.assertEqual(STATUSES[results["status"][index]], game.get_game_state())
+            for side, color in enumerate(('white', 'black')):
+                self.assertEqual(results["king_squares"][index][side], SQUARE_INDEX[game.get_king_location(color)])
+                attacks = 0
+                for location, name in game.get_pieces(color).items():
+                    attacks |= piece_attacks(name, SQUARE_INDEX[location], game._occupied)
+                self.assertEqual(int(results["attacks"][index][side]), attacks)
+
+    def test_2(self):
+        """ Tests reading records and refusing bad boards. """
+        game = ChessVar()
+        boards, turns, statuses = records_to_arrays(game.to_record() * 3)
+        self.assertEqual(boards.shape, (3, 64))
+        self.assertEqual(list(turns), [0, 0, 0])
+        self.assertEqual(list(statuses), [0, 0, 0])
+        self.assertEqual(list(boards[0][:3]), [1, 3, 4])                 # king, bishop and knight on a1-c1
+        results = analyze_positions(boards)
+        self.assertEqual(len(legal_move_list(results["legal"][0])), 21)
+        self.assertRaises(ValueError, analyze_positions, np.zeros((2, 64), dtype=np.int8))  # no kings
+        self.assertRaises(ValueError, analyze_positions, np.zeros((2, 63), dtype=np.int8))
+        self.assertRaises(ValueError, analyze_positions, boards, [0, 1])
+        self.assertRaises(ValueError, analyze_positions, boards, None, [0, 0, 4])
+        self.assertRaises(ValueError, records_to_arrays, game.to_record()[:32] + bytes((8,)))
+
+    def test_3(self):
+        """ Tests a game tied by repetition is read from its record as over, with no legal moves. """
+        game = ChessVar()
+        game.set_repetition_limit(3)
+        for _ in range(2):
+            for current, next in (("c1", "d3"), ("f1", "e3"), ("d3", "c1"), ("e3", "f1")):
+                game.make_move(current, next)
+        self.assertEqual(game.get_game_state(), 'TIE')
+        boards, turns, statuses = records_to_arrays(game.to_record())
+        self.assertEqual(STATUSES[statuses[0]], 'TIE')
+        results = analyze_positions(boards, turns, statuses)
+        self.assertEqual(STATUSES[results["status"][0]], 'TIE')
+        self.assertEqual(legal_move_list(results["legal"][0]), [])
+        # without the statuses only the kings are looked at, and the game goes on
+        self.assertEqual(STATUSES[analyze_positions(boards, turns)["status"][0]], 'UNFINISHED')
@@ -1,15 +1,207 @@
+from collections import OrderedDict
+from collections.abc import Mapping
+from functools import reduce
+import operator
+import random
+
+# Squares are numbered 0-63 from a1 to h8 along each rank, so bit n of a bitboard
+# (a 64-bit integer) stands for the square SQUARES[n].
+SQUARES = [file + rank for rank in "12345678" for file in "abcdefgh"]
+SQUARE_INDEX = {square: index for index, square in enumerate(SQUARES)}
+
+KNIGHT_OFFSETS = ((1, 2), (1, -2), (2, 1), (2, -1), (-1, 2), (-1, -2), (-2, 1), (-2, -1))
+KING_OFFSETS = ((0, 1), (0, -1), (1, 0), (-1, 0), (1, 1), (1, -1), (-1, -1), (-1, 1))
+ROOK_DIRECTIONS = ((0, 1), (0, -1), (1, 0), (-1, 0))
+BISHOP_DIRECTIONS = ((1, 1), (-1, 1), (-1, -1), (1, -1))
+
+
+def _on_board(file, rank):
+    """ Takes a file and rank number (0-7). Returns True if the square is on the board. """
+    return 0 <= file < 8 and 0 <= rank < 8
+
+
+def _build_jump_table(offsets):
+    """
+    Takes a tuple of (file, rank) offsets as parameters.
+    Returns a list holding, for each square, the bitboard of squares one jump away.
+    """
+    table = []
+    for index in range(64):
+        mask = 0
+        for file_step, rank_step in offsets:
+            file, rank = index % 8 + file_step, index // 8 + rank_step
+            if _on_board(file, rank):
+                mask |= 1 << (rank * 8 + file)
+        table.append(mask)
+    return table
+
+
+def _build_ray_tables(directions):
+    """
+    Takes a tuple of (file, rank) directions as parameters.
+    Returns a list holding, for each square, the bitboard of every square a sliding
+    piece could reach on an empty board, and fills in BETWEEN for those lines.
+    """
+    table = []
+    for index in range(64):
+        mask = 0
+        for file_step, rank_step in directions:
+            file, rank = index % 8 + file_step, index // 8 + rank_step
+            path = 0  # squares passed over so far along this ray
+            while _on_board(file, rank):
+                target = rank * 8 + file
+                BETWEEN[index][target] = path
+                mask |= 1 << target
+                path |= 1 << target
+                file, rank = file + file_step, rank + rank_step
+        table.append(mask)
+    return table
+
+
+# BETWEEN[a][b] is the bitboard of squares strictly between a and b when they share a
+# rank, file or diagonal, and 0 otherwise.
+BETWEEN = [[0] * 64 for _ in range(64)]
+KNIGHT_ATTACKS = _build_jump_table(KNIGHT_OFFSETS)
+KING_ATTACKS = _build_jump_table(KING_OFFSETS)
+ROOK_RAYS = _build_ray_tables(ROOK_DIRECTIONS)
+BISHOP_RAYS = _build_ray_tables(BISHOP_DIRECTIONS)
+
+
+def _build_direction_rays(file_step, rank_step):
+    """
+    Takes a (file, rank) direction as parameters.
+    Returns a list holding, for each square, the bitboard of the ray leaving it in that direction.
+    """
+    table = []
+    for index in range(64):
+        mask = 0
+        file, rank = index % 8 + file_step, index // 8 + rank_step
+        while _on_board(file, rank):
+            mask |= 1 << (rank * 8 + file)
+            file, rank = file + file_step, rank + rank_step
+        table.append(mask)
+    return table
+
+
+# the rays of each sliding piece, paired with whether the ray runs towards higher square indexes
+ROOK_LINES = [(_build_direction_rays(*step), step[1] * 8 + step[0] > 0) for step in ROOK_DIRECTIONS]
+BISHOP_LINES = [(_build_direction_rays(*step), step[1] * 8 + step[0] > 0) for step in BISHOP_DIRECTIONS]
+
+# the 8th row the kings race to, and masks that keep a step sideways from wrapping round the board
+GOAL_ROW = 0xFF << 56
+NOT_A_FILE = 0xFEFEFEFEFEFEFEFE
+NOT_H_FILE = 0x7F7F7F7F7F7F7F7F
+FULL_BOARD = (1 << 64) - 1
+# the king moves from each square to the 8th row on an empty board
+KING_RACE_DISTANCE = [7 - index // 8 for index in range(64)]
+
+
+def king_spread(bitboard):
+    """
+    Takes a bitboard as a parameter.
+    Returns the bitboard of its squares together with every square a king could step to from one of them.
+    """
+    row = bitboard | bitboard << 1 & NOT_A_FILE | bitboard >> 1 & NOT_H_FILE
+    return (row | row << 8 | row >> 8) & FULL_BOARD
+
+
+def _build_zobrist_keys():
+    """
+    Takes no parameters.
+    Returns the random 64-bit keys hashed into a position: one per color, piece and square,
+    one for black to move and one per game status.
+    """
+    rng = random.Random(20240601)  # fixed seed so hashes are the same in every process
+    pieces = {}
+    for color in ('white', 'black'):
+        pieces[color] = {}
+        for name in ('king', 'rook', 'bishop', 'knight'):
+            pieces[color][name] = [rng.getrandbits(64) for _ in range(64)]
+    black_turn = rng.getrandbits(64)
+    status = {'UNFINISHED': 0}
+    for game_status in ('WHITE_WON', 'BLACK_WON', 'TIE'):
+        status[game_status] = rng.getrandbits(64)
+    return pieces, black_turn, status
+
+
+ZOBRIST_PIECES, ZOBRIST_BLACK_TURN, ZOBRIST_STATUS = _build_zobrist_keys()
+
+
+def bit_indices(bitboard):
+    """ Takes a bitboard as a parameter. Yields the index of every set bit, lowest first. """
+    while bitboard:
+        lowest = bitboard & -bitboard
+        yield lowest.bit_length() - 1
+        bitboard ^= lowest
+
+
+def _slide(lines, index, occupied):
+    """
+    Takes a piece's rays, a square index and an occupancy bitboard as parameters.
+    Returns the bitboard of squares the sliding piece can reach, up to and including
+    the first piece it meets in each direction.
+    """
+    attacks = 0
+    for rays, ascending in lines:
+        ray = rays[index]
+        blockers = ray & occupied
+        if blockers:
+            # cut the ray off behind the nearest blocker
+            if ascending:
+                nearest = (blockers & -blockers).bit_length() - 1
+            else:
+                nearest = blockers.bit_length() - 1
+            ray ^= rays[nearest]
+        attacks |= ray
+    return attacks
+
+
+def piece_attacks(name, index, occupied):
+    """
+    Takes a piece name, a square index and an occupancy bitboard as parameters.
+    Returns the bitboard of squares that piece could move to or capture on.
+    """
+    if name == "rook":
+        return _slide(ROOK_LINES, index, occupied)
+    elif name == "bishop":
+        return _slide(BISHOP_LINES, index, occupied)
+    elif name == "knight":
+        return KNIGHT_ATTACKS[index]
+    elif name == "king":
+        return KING_ATTACKS[index]
+    return 0
+
+
 class Piece:
     """
-    A class that represents a piece in chess.
+    A class that represents a piece in chess. Pieces cannot be changed once created,
+    so a single Piece object of each kind is shared by every game.
     """
 
-    def __init__(self, name, color, icon):
+    __slots__ = ('_name', '_color', '_icon', '_code')
+
+    def __init__(self, name, color, icon, code=None):
         """
-        Creates Piece object with a name, color and icon.
+        Creates Piece object with a name, color, icon and the piece code it is stored as on a board.
         """
-        self._name = name
-        self._color = color
-        self._icon = icon
+        object.__setattr__(self, '_name', name)
+        object.__setattr__(self, '_color', color)
+        object.__setattr__(self, '_icon', icon)
+        object.__setattr__(self, '_code', code)
+
+    def __setattr__(self, name, value):
+        """ Raises AttributeError, since a Piece is shared between games and cannot be changed. """
+        raise AttributeError("Piece objects cannot be changed")
+
+    def __delattr__(self, name):
+        """ Raises AttributeError, since a Piece is shared between games and cannot be changed. """
+        raise AttributeError("Piece objects cannot be changed")
+
+    def __reduce__(self):
+        """ Returns how to pickle the Piece: the shared pieces unpickle to the same shared object. """
+        if self._code is not None:
+            return piece_for_code, (self._code,)
+        return Piece, (self._name, self._color, self._icon)
 
     def get_icon(self):
         """ Returns the Piece icon. """
@@ -23,111 +215,363 @@ class Piece:
         """ Returns the Piece name. """
         return self._name
 
+    def get_code(self):
+        """ Returns the Piece code, 0 for a blank space, 1-4 for white pieces and 5-8 for black pieces. """
+        return self._code
+
+
+COLORS = ('white', 'black')
+PIECE_NAMES = ('king', 'rook', 'bishop', 'knight')
+
+# the shared pieces, listed by code: a board is stored as one code per square
+BLANK_SPACE = Piece('blank', 'none', "_", 0)
+WHITE_KING = Piece('king', 'white', "\u2654", 1)
+WHITE_ROOK = Piece('rook', 'white', "\u2656", 2)
+WHITE_BISHOP = Piece('bishop', 'white', "\u2657", 3)
+WHITE_KNIGHT = Piece('knight', 'white', "\u2658", 4)
+BLACK_KING = Piece('king', 'black', "\u265A", 5)
+BLACK_ROOK = Piece('rook', 'black', "\u265C", 6)
+BLACK_BISHOP = Piece('bishop', 'black', "\u265D", 7)
+BLACK_KNIGHT = Piece('knight', 'black', "\u265E", 8)
+PIECES = [BLANK_SPACE, WHITE_KING, WHITE_ROOK, WHITE_BISHOP, WHITE_KNIGHT,
+          BLACK_KING, BLACK_ROOK, BLACK_BISHOP, BLACK_KNIGHT]
+PIECE_CODES = {(piece.get_color(), piece.get_name()): piece.get_code() for piece in PIECES[1:]}
+KING_CODES = {'white': 1, 'black': 5}
+SLIDER_CODES = (2, 3, 6, 7)  # the rooks and bishops
+
+# the Zobrist keys of each piece code (None for a blank space)
+ZOBRIST_CODES = [None] + [ZOBRIST_PIECES[color][name] for color in COLORS for name in PIECE_NAMES]
+
+START_POSITION = {
+    "a1": WHITE_KING, "a2": WHITE_ROOK,
+    "b1": WHITE_BISHOP, "b2": WHITE_BISHOP,
+    "c1": WHITE_KNIGHT, "c2": WHITE_KNIGHT,
+    "f1": BLACK_KNIGHT, "f2": BLACK_KNIGHT,
+    "g1": BLACK_BISHOP, "g2": BLACK_BISHOP,
+    "h1": BLACK_KING, "h2": BLACK_ROOK,
+}
+START_SQUARES = bytes(START_POSITION[square].get_code() if square in START_POSITION else 0 for square in SQUARES)
+
+
+# one letter per piece code, upper case for white and lower case for black
+PIECE_LETTERS = ".KRBNkrbn"
+# the game statuses by the number stored for them in a record
+STATUSES = ('UNFINISHED', 'WHITE_WON', 'BLACK_WON', 'TIE')
+# why check_move refuses a move, in the order its stages look for them
+REJECTION_REASONS = ('game_over', 'bad_location', 'no_piece', 'wrong_color', 'own_piece', 'bad_path',
+                     'blocked_path', 'gives_check', 'self_check')
+# the squares each kind of piece could move to from each square on an empty board
+MOVE_TABLES = {'king': KING_ATTACKS, 'rook': ROOK_RAYS, 'bishop': BISHOP_RAYS, 'knight': KNIGHT_ATTACKS}
+# a record holds 64 four-bit piece codes and one turn and status byte
+RECORD_SIZE = 33
+LOW_NIBBLES = bytes(byte & 15 for byte in range(256))
+HIGH_NIBBLES = bytes(byte >> 4 for byte in range(256))
+
+
+def race_result(white_king_home, black_king_home):
+    """
+    Takes whether the white and black kings are on the 8th row as parameters.
+    Returns the game status once black has moved.
+    """
+    # if black king has made it to the 8th row but white king has not
+    if black_king_home and not white_king_home:
+        return 'BLACK_WON'
+    # if both the black and white king have made it to the 8th row
+    elif black_king_home and white_king_home:
+        return 'TIE'
+    # if white king has made it to the 8th row but black king has not
+    elif not black_king_home and white_king_home:
+        return 'WHITE_WON'
+    return 'UNFINISHED'
+
+
+def piece_for_code(code):
+    """ Takes a piece code as a parameter. Returns the shared Piece object stored as that code. """
+    return PIECES[code]
+
+
+class BoardView(Mapping):
+    """
+    A class that represents a read-only view of a game's board as a dictionary of location to Piece.
+    """
+
+    __slots__ = ('_squares',)
+
+    def __init__(self, squares):
+        """
+        Creates BoardView object over a bytearray holding one piece code per square.
+        """
+        self._squares = squares
+
+    def get_squares(self):
+        """ Returns the bytearray of piece codes the view reads from. """
+        return self._squares
+
+    def __getitem__(self, location):
+        """ Takes a location. Returns the Piece object there. Raises KeyError if the location is not on the board. """
+        return PIECES[self._squares[SQUARE_INDEX[location]]]
+
+    def __iter__(self):
+        """ Returns an iterator over the locations from a1 to h8. """
+        return iter(SQUARES)
+
+    def __len__(self):
+        """ Returns the number of squares. """
+        return 64
+
 
 class ChessVar:
     """
     A class that represents a variant of chess.
     """
 
+    # a game keeps only its board as a bytearray of piece codes, the player turn, the game status,
+    # one bitboard per piece code, the occupancy bitboard, the squares each piece hits and each
+    # color's attack map, the kings' race maps for the position, the hash, the moves to undo and redo,
+    # the MoveCache to look legal moves up in, if any, and the repetition limit and the number of times
+    # each earlier position was reached, if set
+    __slots__ = ('_squares', '_white_turn', '_game_status', '_bitboards', '_occupied', '_attacks', '_attack_maps',
+                 '_race_maps', '_hash', '_undo_stack', '_redo_stack', '_move_cache', '_repetition_limit',
+                 '_hash_counts')
+
+    # every game shares the same Piece objects
+    _blank_space = BLANK_SPACE
+    _white_king = WHITE_KING
+    _white_rook = WHITE_ROOK
+    _white_bishop = WHITE_BISHOP
+    _white_knight = WHITE_KNIGHT
+    _black_king = BLACK_KING
+    _black_rook = BLACK_ROOK
+    _black_bishop = BLACK_BISHOP
+    _black_knight = BLACK_KNIGHT
+
     def __init__(self):
         """
-        Creates ChessVar object. Initializes white_turn to True, game_status to UNFINISHED,
-        the pieces to Piece objects, and board dictionary to starting setup.
+        Creates ChessVar object. Initializes white_turn to True, game_status to UNFINISHED
+        and the board to the starting setup.
         """
         self._white_turn = True
         self._game_status = 'UNFINISHED'
-        self._blank_space = Piece('blank', 'none', "_")
-        self._white_king = Piece('king', 'white', "\u2654")
-        self._white_rook = Piece('rook', 'white', "\u2656")
-        self._white_bishop = Piece('bishop', 'white', "\u2657")
-        self._white_knight = Piece('knight', 'white', "\u2658")
-        self._black_king = Piece('king', 'black', "\u265A")
-        self._black_rook = Piece('rook', 'black', "\u265C")
-        self._black_bishop = Piece('bishop', 'black', "\u265D")
-        self._black_knight = Piece('knight', 'black', "\u265E")
-        self._board = {
-            "a1": self._white_king,
-            "a2": self._white_rook,
-            "a3": self._blank_space,
-            "a4": self._blank_space,
-            "a5": self._blank_space,
-            "a6": self._blank_space,
-            "a7": self._blank_space,
-            "a8": self._blank_space,
-            "b1": self._white_bishop,
-            "b2": self._white_bishop,
-            "b3": self._blank_space,
-            "b4": self._blank_space,
-            "b5": self._blank_space,
-            "b6": self._blank_space,
-            "b7": self._blank_space,
-            "b8": self._blank_space,
-            "c1": self._white_knight,
-            "c2": self._white_knight,
-            "c3": self._blank_space,
-            "c4": self._blank_space,
-            "c5": self._blank_space,
-            "c6": self._blank_space,
-            "c7": self._blank_space,
-            "c8": self._blank_space,
-            "d1": self._blank_space,
-            "d2": self._blank_space,
-            "d3": self._blank_space,
-            "d4": self._blank_space,
-            "d5": self._blank_space,
-            "d6": self._blank_space,
-            "d7": self._blank_space,
-            "d8": self._blank_space,
-            "e1": self._blank_space,
-            "e2": self._blank_space,
-            "e3": self._blank_space,
-            "e4": self._blank_space,
-            "e5": self._blank_space,
-            "e6": self._blank_space,
-            "e7": self._blank_space,
-            "e8": self._blank_space,
-            "f1": self._black_knight,
-            "f2": self._black_knight,
-            "f3": self._blank_space,
-            "f4": self._blank_space,
-            "f5": self._blank_space,
-            "f6": self._blank_space,
-            "f7": self._blank_space,
-            "f8": self._blank_space,
-            "g1": self._black_bishop,
-            "g2": self._black_bishop,
-            "g3": self._blank_space,
-            "g4": self._blank_space,
-            "g5": self._blank_space,
-            "g6": self._blank_space,
-            "g7": self._blank_space,
-            "g8": self._blank_space,
-            "h1": self._black_king,
-            "h2": self._black_rook,
-            "h3": self._blank_space,
-            "h4": self._blank_space,
-            "h5": self._blank_space,
-            "h6": self._blank_space,
-            "h7": self._blank_space,
-            "h8": self._blank_space,
-        }
+        self._squares = bytearray(START_SQUARES)
+        self._build_piece_tables()
+        # one (current, next, captured, white_turn, game_status, hash) record per move made, holding
+        # what the move changed and the position before it
+        self._undo_stack = []
+        self._redo_stack = []  # the (current, next) square indexes of moves taken back, last first
+        self._move_cache = None
+        self._repetition_limit = None
+        self._hash_counts = None
+
+    @classmethod
+    def from_pieces(cls, pieces, turn='white', game_status='UNFINISHED'):
+        """
+        Takes a dictionary of location to (color, name) for every piece on the board, the color
+        whose turn it is and the game status as parameters.
+        Returns a ChessVar object set up with that position without going through the starting setup.
+        Raises ValueError if a location, color or name is unknown or a color does not have exactly one king.
+        """
+        if turn not in COLORS or game_status not in ZOBRIST_STATUS:
+            raise ValueError(f"unknown turn {turn} or game status {game_status}")
+        squares = bytearray(64)
+        for location, piece in pieces.items():
+            if location not in SQUARE_INDEX or piece not in PIECE_CODES:
+                raise ValueError(f"unknown piece {piece} at {location}")
+            squares[SQUARE_INDEX[location]] = PIECE_CODES[piece]
+        return cls._from_squares(squares, turn == 'white', game_status)
+
+    @classmethod
+    def _from_squares(cls, squares, white_turn, game_status):
+        """
+        Takes a bytearray of 64 piece codes, whether it is white's turn and the game status as parameters.
+        Returns a ChessVar object using that bytearray as its board.
+        Raises ValueError if a code is unknown or a color does not have exactly one king.
+        """
+        unknown = squares.translate(None, bytes(range(len(PIECES))))  # drops every known code
+        if unknown:
+            raise ValueError(f"unknown piece code {unknown[0]}")
+        for color in COLORS:
+            if squares.count(KING_CODES[color]) != 1:
+                raise ValueError(f"{color} must have exactly one king")
+        game = cls.__new__(cls)
+        game._white_turn = white_turn
+        game._game_status = game_status
+        game._squares = squares
+        game._build_piece_tables()
+        game._undo_stack = []
+        game._redo_stack = []
+        game._move_cache = None
+        game._repetition_limit = None
+        game._hash_counts = None
+        return game
+
+    @classmethod
+    def from_fen(cls, text):
+        """
+        Takes a string made by to_fen as a parameter: the ranks from 8 down to 1 separated by '/', with a
+        letter per piece (upper case for white) and a digit per run of blank squares, then the turn
+        ('w' or 'b') and optionally the game status.
+        Returns a ChessVar object set up with that position. Raises ValueError if the string cannot be read.
+        """
+        fields = text.split()
+        if len(fields) not in (2, 3) or fields[1] not in ('w', 'b'):
+            raise ValueError(f"cannot read position {text!r}")
+        game_status = fields[2] if len(fields) == 3 else 'UNFINISHED'
+        if game_status not in ZOBRIST_STATUS:
+            raise ValueError(f"unknown game status {game_status}")
+        ranks = fields[0].split('/')
+        if len(ranks) != 8:
+            raise ValueError(f"expected 8 ranks in {fields[0]!r}")
+        squares = bytearray()
+        for rank in reversed(ranks):
+            row = bytearray()
+            for letter in rank:
+                if letter in '12345678':
+                    row.extend(bytes(int(letter)))
+                elif letter in PIECE_LETTERS[1:]:
+                    row.append(PIECE_LETTERS.index(letter))
+                else:
+                    raise ValueError(f"unknown piece letter {letter!r}")
+            if len(row) != 8:
+                raise ValueError(f"rank {rank!r} does not have 8 squares")
+            squares += row
+        return cls._from_squares(squares, fields[1] == 'w', game_status)
+
+    def to_fen(self):
+        """
+        Takes no parameters.
+        Returns the position as a string read by from_fen, such as the starting setup's
+        "8/8/8/8/8/8/RBN2nbr/KBN2nbk w UNFINISHED".
+        """
+        ranks = []
+        for rank in reversed(range(8)):
+            text, blanks = "", 0
+            for code in self._squares[rank * 8:rank * 8 + 8]:
+                if code:
+                    text += (str(blanks) if blanks else "") + PIECE_LETTERS[code]
+                    blanks = 0
+                else:
+                    blanks += 1
+            ranks.append(text + (str(blanks) if blanks else ""))
+        return f"{'/'.join(ranks)} {'w' if self._white_turn else 'b'} {self._game_status}"
+
+    @classmethod
+    def from_record(cls, record):
+        """
+        Takes a RECORD_SIZE byte record made by to_record (bytes, bytearray or memoryview) as a parameter.
+        Returns a ChessVar object set up with that position. Raises ValueError if the record cannot be read.
+        """
+        if len(record) != RECORD_SIZE:
+            raise ValueError(f"expected a {RECORD_SIZE} byte record, got {len(record)} bytes")
+        flags = record[32]
+        if flags >> 3:
+            raise ValueError(f"unknown turn and status byte {flags}")
+        # square 2n is the low nibble of byte n and square 2n + 1 the high nibble
+        pairs = bytes(record[:32])
+        squares = bytearray(64)
+        squares[0::2] = pairs.translate(LOW_NIBBLES)
+        squares[1::2] = pairs.translate(HIGH_NIBBLES)
+        return cls._from_squares(squares, not flags & 1, STATUSES[flags >> 1])
+
+    def to_record(self):
+        """
+        Takes no parameters.
+        Returns the position as a RECORD_SIZE byte record read by from_record: the piece code of each
+        square from a1 to h8 packed two to a byte, then a byte holding the turn (bit 0 set for black)
+        and the game status number (bits 1-2). Moves to undo are not kept.
+        """
+        squares = self._squares
+        # every code is below 16, so shifting the odd squares up 4 bits packs each pair into one byte
+        pairs = int.from_bytes(squares[0::2], 'little') | int.from_bytes(squares[1::2], 'little') << 4
+        flags = (self._white_turn is False) | STATUSES.index(self._game_status) << 1
+        return pairs.to_bytes(32, 'little') + bytes((flags,))
+
+    def _build_piece_tables(self):
+        """
+        Takes no parameters and returns nothing.
+        Fills in the bitboard of each piece code, the occupancy bitboard and the hash from the board,
+        player turn and game status.
+        """
+        bitboards = [0] * len(PIECES)
+        position_hash = ZOBRIST_STATUS[self._game_status]
+        if self._white_turn is False:
+            position_hash ^= ZOBRIST_BLACK_TURN
+        # one pass over the board fills in both, since loading saved games spends most of its time here
+        for index, code in enumerate(self._squares):
+            if code:
+                bitboards[code] |= 1 << index
+                position_hash ^= ZOBRIST_CODES[code][index]
+        self._bitboards = bitboards
+        self._occupied = reduce(operator.or_, bitboards)
+        self._hash = position_hash
+        self._attacks = None  # the attack maps are built the first time a move is checked
+        self._attack_maps = None
+        self._race_maps = None  # (hash, [white's, black's]) race maps, worked out when first asked for
+
+    def _compute_hash(self):
+        """
+        Takes no parameters.
+        Returns the Zobrist hash of the position worked out from scratch.
+        """
+        position_hash = ZOBRIST_STATUS[self._game_status]
+        if self._white_turn is False:
+            position_hash ^= ZOBRIST_BLACK_TURN
+        for index, code in enumerate(self._squares):
+            if code:
+                position_hash ^= ZOBRIST_CODES[code][index]
+        return position_hash
+
+    def get_hash(self):
+        """
+        Takes no parameters.
+        Returns the 64-bit Zobrist hash of the board, player turn and game status.
+        Positions reached by different move orders have the same hash.
+        """
+        return self._hash
+
+    def get_move_cache(self):
+        """ Returns the MoveCache the game looks legal moves up in, or None if it does not use one. """
+        return self._move_cache
+
+    def set_move_cache(self, cache):
+        """
+        Takes a MoveCache object (which may be shared between games), or None to stop using one, as a parameter
+        and returns nothing. make_move and legal_moves look up positions in the cache from then on.
+        """
+        self._move_cache = cache
+
+    @property
+    def _board(self):
+        """ Returns a read-only dictionary view of the board, mapping each location to its Piece object. """
+        return BoardView(self._squares)
+
+    def get_board(self):
+        """
+        Takes no parameters.
+        Returns a read-only dictionary view of the board, mapping each location to its Piece object,
+        such as move_check and the piece movers take.
+        """
+        return self._board
+
+    def _is_own_board(self, board):
+        """ Takes a board. Returns True if it is a view of this game's own board. """
+        return type(board) is BoardView and board.get_squares() is self._squares
 
     def create_board(self):
         """
         Method takes no parameters and returns nothing.
-        Prints the self._board dictionary as a chessboard visual.
+        Prints the board as a chessboard visual.
         """
         print(f"      a   b   c   d   e   f   g   h  ")
         for i in reversed(range(8)):
-            print(
-                f"  {i + 1} | {self._board[f'a{i + 1}'].get_icon()} | {self._board[f'b{i + 1}'].get_icon()} | {self._board[f'c{i + 1}'].get_icon()} | {self._board[f'd{i + 1}'].get_icon()} | {self._board[f'e{i + 1}'].get_icon()} | {self._board[f'f{i + 1}'].get_icon()} | {self._board[f'g{i + 1}'].get_icon()} | {self._board[f'h{i + 1}'].get_icon()} |")
+            icons = " | ".join(PIECES[code].get_icon() for code in self._squares[i * 8:i * 8 + 8])
+            print(f"  {i + 1} | {icons} |")
 
     def make_move(self, current, next):
         """
         Takes a current and next location as parameters.
-        Checks if piece is able to move and calls move_check, put_opp_king_in_check and put_your_king_in_check methods.
-        If not able to move, returns False.
-        If able to move, moves piece in board dictionary, updates game status by calling update_game_state method,
+        Checks if piece is able to move by calling check_move method.
+        If not able to move (including a location that is not on the board), returns False.
+        If able to move, moves piece on the board, updates game status by calling update_game_state method,
         switches player turn and returns True.
         """
 
@@ -135,226 +579,346 @@ class ChessVar:
         if self._game_status != 'UNFINISHED':
             return False
 
-        # if white player's turn
-        if self._white_turn is True:
-            # if white tries to move black's piece
-            if self._board[current].get_color() == "black":
-                return False
-            # if white tries to move where their piece is already
-            elif self._board[next].get_color() == "white":
-                return False
-        # if black player's turn
-        elif self._white_turn is False:
-            # if black tries to move white's piece
-            if self._board[current].get_color() == "white":
+        # a position in the move cache has its legal moves looked up instead of checked again
+        if self._move_cache is not None:
+            if current not in SQUARE_INDEX or next not in SQUARE_INDEX:
                 return False
-            # if black tries to move where their piece is already
-            elif self._board[next].get_color() == "black":
+            if (current, next) not in self._move_cache.lookup(self):
                 return False
-
-        # call methods to check piece's moving path and if a king will be in check.
-        piece_results = self.move_check(self._board, current, next)
-        opp_king_results = self.put_opp_king_in_check(current, next)
-        your_king_results = self.put_your_king_in_check(current, next)
+            self.apply_move(current, next)
+            return True
 
         # if the move is possible/allowed
-        if piece_results is True and opp_king_results is True and your_king_results is True:
-            self._board[next] = self._board[current]  # moves piece to new location (erasing any piece that is there)
-            self._board[current] = self._blank_space  # resets old location to blank
-            #self.create_board()
-
-            # if white player's turn
-            if self._white_turn is True:
-                # switch to black player's turn
-                self._white_turn = False
-                return True
-            # if black player's turn
-            if self._white_turn is False:
-                # update game if necessary
-                update_game = self.update_game_state()
-                self._white_turn = True
-                return True
+        if self.check_move(current, next) is None:
+            self.apply_move(current, next)
+            return True
         else:
             return False
 
+    def check_move(self, current, next):
+        """
+        Takes a current and next location as parameters.
+        Checks the move in stages, cheapest first, stopping at the first one that rules it out: the game
+        still going on and both locations on the board, the piece being the player's and the next location
+        not holding one of theirs, the piece being able to make the move on an empty board (one table
+        lookup), no piece standing in the way, and last the checks on both kings.
+        Returns the reason from REJECTION_REASONS the move is refused for, or None if it is legal.
+        """
+        if self._game_status != 'UNFINISHED':
+            return 'game_over'
+        current_index = SQUARE_INDEX.get(current)
+        next_index = SQUARE_INDEX.get(next)
+        if current_index is None or next_index is None:
+            return 'bad_location'
+
+        # codes 1-4 are white's pieces and 5-8 black's
+        side = 0 if self._white_turn is True else 1
+        code = self._squares[current_index]
+        if not code:
+            return 'no_piece'
+        if (code - 1) // 4 != side:
+            return 'wrong_color'
+        captured = self._squares[next_index]
+        if captured and (captured - 1) // 4 == side:
+            return 'own_piece'
+
+        if not MOVE_TABLES[PIECES[code].get_name()][current_index] >> next_index & 1:
+            return 'bad_path'
+        # only rooks and bishops have squares between where they start and land
+        if BETWEEN[current_index][next_index] & self._occupied:
+            return 'blocked_path'
+
+        player, opponent = COLORS[side], COLORS[1 - side]
+        if self._gives_check(current_index, next_index, opponent):
+            return 'gives_check'
+        if self._attacks is None:
+            self._build_attack_maps()
+        king_index = self._king_index(player)
+        checkers = self._checkers(king_index, opponent)
+        # only a piece other than the king can be pinned
+        pins = {} if code == KING_CODES[player] else self._pins(king_index, player, opponent)
+        if self._exposes_king(current_index, next_index, player, opponent, checkers, pins):
+            return 'self_check'
+        return None
+
+    def apply_move(self, current, next):
+        """
+        Takes a current and next location of a move already known to be legal (such as one from legal_moves)
+        as parameters and returns nothing.
+        Moves the piece without checking the move again, records it for undo_move, updates game status
+        by calling update_game_state method after black's move and switches player turn.
+        Any moves taken back that could have been redone are forgotten.
+        """
+        if self._redo_stack:
+            self._redo_stack.clear()
+        self._apply(SQUARE_INDEX[current], SQUARE_INDEX[next])
+
+    def _apply(self, current_index, next_index):
+        """
+        Takes current and next square indexes of a legal move as parameters and returns nothing.
+        Makes the move as apply_move describes, leaving the moves to redo alone.
+        """
+        position_hash = self._hash
+        white_turn, game_status = self._white_turn, self._game_status
+        captured = self._make(current_index, next_index)
+        self._undo_stack.append((current_index, next_index, captured, white_turn, game_status, position_hash))
+
+        # if white player's turn
+        if self._white_turn is True:
+            # switch to black player's turn
+            self._white_turn = False
+        # if black player's turn
+        else:
+            # update game if necessary
+            self.update_game_state()
+            self._white_turn = True
+        self._hash ^= ZOBRIST_BLACK_TURN
+
+        if self._hash_counts is not None:
+            self._hash_counts[position_hash] = self._hash_counts.get(position_hash, 0) + 1
+            self._check_repetition()
+
+    def _check_repetition(self):
+        """
+        Takes no parameters and returns nothing.
+        Ends the game in a TIE if the position has now been reached as many times as the repetition limit.
+        """
+        if self._game_status == 'UNFINISHED' and self.get_repetition_count() >= self._repetition_limit:
+            self._game_status = 'TIE'
+            self._hash ^= ZOBRIST_STATUS['UNFINISHED'] ^ ZOBRIST_STATUS['TIE']
+
+    def _make(self, current_index, next_index):
+        """
+        Takes current and next square indexes as parameters.
+        Moves the piece in place on the board, the bitboards and the attack maps, removing any captured piece.
+        Returns the code of the piece that stood on the next square.
+        """
+        squares = self._squares
+        code = squares[current_index]
+        captured = squares[next_index]
+        current_bit = 1 << current_index
+        next_bit = 1 << next_index
+
+        # take the captured piece off its bitboard
+        if captured:
+            self._bitboards[captured] ^= next_bit
+            self._occupied ^= next_bit
+            self._hash ^= ZOBRIST_CODES[captured][next_index]
+
+        # move the piece from the current bit to the next bit
+        if code:
+            self._bitboards[code] ^= current_bit | next_bit
+            self._occupied ^= current_bit | next_bit
+            keys = ZOBRIST_CODES[code]
+            self._hash ^= keys[current_index] ^ keys[next_index]
+
+        squares[next_index] = code  # moves piece to new location (erasing any piece that is there)
+        squares[current_index] = 0  # resets old location to blank
+        self._refresh_attacks(current_index, next_index)
+        return captured
+
+    def _unmake(self, current_index, next_index, captured):
+        """
+        Takes current and next square indexes and the piece code captured by _make as parameters and returns nothing.
+        Moves the piece back to the current square and puts the captured piece back on the next square.
+        """
+        squares = self._squares
+        code = squares[next_index]
+        current_bit = 1 << current_index
+        next_bit = 1 << next_index
+
+        # move the piece from the next bit back to the current bit
+        if code:
+            self._bitboards[code] ^= current_bit | next_bit
+            self._occupied ^= current_bit | next_bit
+            keys = ZOBRIST_CODES[code]
+            self._hash ^= keys[current_index] ^ keys[next_index]
+
+        # put the captured piece back on its bitboard
+        if captured:
+            self._bitboards[captured] ^= next_bit
+            self._occupied ^= next_bit
+            self._hash ^= ZOBRIST_CODES[captured][next_index]
+
+        squares[current_index] = code
+        squares[next_index] = captured
+        self._refresh_attacks(current_index, next_index)
+
+    def undo_move(self):
+        """
+        Takes no parameters.
+        Takes back the last move made by make_move, restoring the board, player turn and game status,
+        and keeps it for redo_move. Returns True, or False if there is no move to take back.
+        """
+        move = self._take_back()
+        if move is None:
+            return False
+        self._redo_stack.append(move)
+        return True
+
+    def _try_move(self, current, next):
+        """
+        Takes a current and next location of a legal move as parameters and returns nothing.
+        Makes the move like apply_move but leaves the moves to redo alone, for a search of the game
+        that takes it back again with _take_back.
+        """
+        self._apply(SQUARE_INDEX[current], SQUARE_INDEX[next])
+
+    def _take_back(self):
+        """
+        Takes no parameters.
+        Takes back the last move like undo_move, without keeping it for redo_move, so a search of the
+        game leaves the moves to redo as it found them.
+        Returns the (current, next) square indexes of the move, or None if there is no move to take back.
+        """
+        if not self._undo_stack:
+            return None
+        current_index, next_index, captured, white_turn, game_status, position_hash = self._undo_stack.pop()
+        self._unmake(current_index, next_index, captured)
+        self._white_turn = white_turn
+        self._game_status = game_status
+        self._hash = position_hash
+        if self._hash_counts is not None:
+            count = self._hash_counts.pop(position_hash) - 1
+            if count:
+                self._hash_counts[position_hash] = count
+        return current_index, next_index
+
+    def redo_move(self):
+        """
+        Takes no parameters.
+        Makes again the last move taken back by undo_move. Making any other move forgets the moves
+        that could have been redone, but searches of the game (which use _try_move and _take_back) do not.
+        Returns True, or False if there is no move to redo.
+        """
+        if not self._redo_stack:
+            return False
+        self._apply(*self._redo_stack.pop())
+        return True
+
+    def get_moves(self):
+        """ Returns the list of moves made so far that can be taken back, as (current, next) location pairs. """
+        return [(SQUARES[record[0]], SQUARES[record[1]]) for record in self._undo_stack]
+
+    def get_redo_moves(self):
+        """ Returns the list of moves redo_move would make, next first, as (current, next) location pairs. """
+        return [(SQUARES[current], SQUARES[next]) for current, next in reversed(self._redo_stack)]
+
+    def get_position_hashes(self):
+        """ Returns the list of the hash of the position before each move made so far, then of the position now. """
+        return [record[5] for record in self._undo_stack] + [self._hash]
+
+    def get_repetition_limit(self):
+        """ Returns the number of times a position may be reached before the game is a TIE, or None if unlimited. """
+        return self._repetition_limit
+
+    def set_repetition_limit(self, limit):
+        """
+        Takes the number of times a position may be reached before the game ends in a TIE (such as 3),
+        or None to never end a game by repetition, as a parameter and returns nothing.
+        Positions reached before the limit was set count too.
+        Raises ValueError if the limit is below 2.
+        """
+        if limit is None:
+            self._repetition_limit = self._hash_counts = None
+            return
+        if limit < 2:
+            raise ValueError(f"a repetition limit must be at least 2, got {limit}")
+        self._repetition_limit = limit
+        self._hash_counts = {}
+        for record in self._undo_stack:
+            self._hash_counts[record[5]] = self._hash_counts.get(record[5], 0) + 1
+        self._check_repetition()
+
+    def get_repetition_count(self):
+        """
+        Takes no parameters.
+        Returns the number of times the position now has been reached in the moves that can be taken back,
+        counting this time.
+        """
+        if self._hash_counts is not None:
+            return self._hash_counts.get(self._hash, 0) + 1
+        return self.get_position_hashes().count(self._hash)
+
     def move_check(self, board, current, next):
         """
         Takes a board and current and next locations as parameters.
         Checks what type of piece is being moved and returns the correct method.
         Otherwise, returns False.
         """
-        if board[current].get_name() == "rook":
+        name = board[current].get_name()
+        if name == "rook":
             return self.move_rook(board, current, next)
-        elif board[current].get_name() == "bishop":
+        elif name == "bishop":
             return self.move_bishop(board, current, next)
-        elif board[current].get_name() == "knight":
+        elif name == "knight":
             return self.move_knight(current, next)
-        elif board[current].get_name() == "king":
+        elif name == "king":
             return self.move_king(current, next)
         else:  # if piece is blank
             return False
 
+    def _path_clear(self, board, current_index, next_index):
+        """
+        Takes a board and current and next square indexes as parameters.
+        Returns True if no piece stands on the squares between the two locations.
+        """
+        path = BETWEEN[current_index][next_index]
+        # the game's own board is checked against the occupancy bitboard in one step
+        if self._is_own_board(board):
+            return not path & self._occupied
+        # any other board (such as one from copy_board) is checked square by square
+        for index in bit_indices(path):
+            if board[SQUARES[index]] != self._blank_space:
+                return False
+        return True
+
     def move_rook(self, board, current, next):
         """
         Takes a board and current and next locations as parameters.
         If the rook can be moved, returns True. If not, returns False.
         """
-        results = False
-
-        # if there is a piece in the way if the move is vertical
-        if current[0] == next[0]:
-            for piece in board:
-                if board[piece] != self._blank_space:  # if piece is not a blank space
-                    if piece[0] == current[0] and piece[1] != current[1]:
-                        on_path = piece  # piece on the path of the move
-                        if current[1] < next[1]:  # if the move is going up
-                            # if the piece is before the next location
-                            if next[1] > on_path[1] > current[1]:
-                                return False
-                        elif current[1] > next[1]:  # if the move is going down
-                            # if the piece is before the next location
-                            if next[1] < on_path[1] < current[1]:
-                                return False
-
-        # if there is a piece in the way if the move is horizontal
-        if current[1] == next[1]:
-            for piece in board:
-                if board[piece] != self._blank_space:  # if piece is not a blank space
-                    if piece[1] == current[1] and piece[0] != current[0]:
-                        on_path = piece  # piece on the path of the move
-                        if current[0] < next[0]:  # if the move is going right
-                            # if the piece is before the next location
-                            if next[0] > on_path[0] > current[0]:
-                                return False
-                        elif current[0] > next[0]:  # if the move is going left
-                            # if the piece is before the next location
-                            if next[0] < on_path[0] < current[0]:
-                                return False
-
-        # if piece moves up, down, left, right any amount of spaces
-        if current[0] == next[0] or current[1] == next[1]:
-            results = True
-        return results
+        # if piece does not move up, down, left or right
+        if current[0] != next[0] and current[1] != next[1]:
+            return False
+        # if there is a piece in the way
+        return self._path_clear(board, SQUARE_INDEX[current], SQUARE_INDEX[next])
 
     def move_bishop(self, board, current, next):
         """
         Takes a board and current and next locations as parameters.
         If the bishop can be moved, returns True. If not, returns False.
         """
-        results = False
-
-        # check if there is a piece in the way
-        for index in range(1, 8):  # for every row of board
-            for piece in board:
-                if board[piece] != self._blank_space:  # if piece is not a blank space
-                    # if piece there is a piece in the way diagonal right/forward
-                    if ord(current[0]) + index == ord(piece[0]) and int(current[1]) + index == int(piece[1]):
-                        on_path = piece  # piece on the path of move
-                        # if the piece is before the next location
-                        if on_path[0] < next[0] and on_path[1] < next[1]:
-                            return False
-                    # if piece there is a piece in the way diagonal left/forward
-                    if ord(current[0]) - index == ord(piece[0]) and int(current[1]) + index == int(piece[1]):
-                        on_path = piece  # piece on the path of move
-                        # if the piece is before the next location
-                        if on_path[0] > next[0] and on_path[1] < next[1]:
-                            return False
-                    # if piece there is a piece in the way diagonal left/backward
-                    if ord(current[0]) - index == ord(piece[0]) and int(current[1]) - index == int(piece[1]):
-                        on_path = piece  # piece on the path of move
-                        # if the piece is before the next location
-                        if on_path[0] > next[0] and on_path[1] > next[1]:
-                            return False
-                    # if piece there is a piece in the way diagonal right/backward
-                    if ord(current[0]) + index == ord(piece[0]) and int(current[1]) - index == int(piece[1]):
-                        on_path = piece  # piece on the path of move
-                        # if the piece is before the next location
-                        if on_path[0] < next[0] and on_path[1] > next[1]:
-                            return False
-
-            # if piece moves diagonal right/forward any amount of spaces.
-            if ord(current[0]) + index == ord(next[0]) and int(current[1]) + index == int(next[1]):
-                results = True
-            # if piece moves diagonal left/forward any amount of spaces.
-            elif ord(current[0]) - index == ord(next[0]) and int(current[1]) + index == int(next[1]):
-                results = True
-            # if piece moves diagonal left/backward any amount of spaces.
-            elif ord(current[0]) - index == ord(next[0]) and int(current[1]) - index == int(next[1]):
-                results = True
-            # if piece moves diagonal right/backward any amount of spaces.
-            elif ord(current[0]) + index == ord(next[0]) and int(current[1]) - index == int(next[1]):
-                results = True
-        return results
+        current_index = SQUARE_INDEX[current]
+        next_index = SQUARE_INDEX[next]
+        # if piece does not move diagonally
+        if not BISHOP_RAYS[current_index] >> next_index & 1:
+            return False
+        # if there is a piece in the way
+        return self._path_clear(board, current_index, next_index)
 
     def move_knight(self, current, next):
         """
         Takes current and next locations as parameters.
         If the knight can be moved, returns True. If not, returns False.
         """
-        results = False
-        # if piece moves up two and over one to the right
-        if ord(current[0]) + 1 == ord(next[0]) and int(current[1]) + 2 == int(next[1]):
-            results = True
-        # if piece moves down two and over one to the right
-        elif ord(current[0]) + 1 == ord(next[0]) and int(current[1]) - 2 == int(next[1]):
-            results = True
-        # if piece moves up one and over two to the right
-        elif ord(current[0]) + 2 == ord(next[0]) and int(current[1]) + 1 == int(next[1]):
-            results = True
-        # if piece moves down one and over two to the right
-        elif ord(current[0]) + 2 == ord(next[0]) and int(current[1]) - 1 == int(next[1]):
-            results = True
-        # if piece moves up two and over one to the left
-        elif ord(current[0]) - 1 == ord(next[0]) and int(current[1]) + 2 == int(next[1]):
-            results = True
-        # if piece moves down two and over one to the left
-        elif ord(current[0]) - 1 == ord(next[0]) and int(current[1]) - 2 == int(next[1]):
-            results = True
-        # if piece moves up one and over two to the left
-        elif ord(current[0]) - 2 == ord(next[0]) and int(current[1]) + 1 == int(next[1]):
-            results = True
-        # if piece moves down one and over two to the left
-        elif ord(current[0]) - 2 == ord(next[0]) and int(current[1]) - 1 == int(next[1]):
-            results = True
-        return results
+        return KNIGHT_ATTACKS[SQUARE_INDEX[current]] >> SQUARE_INDEX[next] & 1 == 1
 
     def move_king(self, current, next):
         """
         Takes current and next locations as parameters.
         If the king can be moved, returns True. If not, returns False.
         """
-        results = False
-        # if piece moves up one
-        if ord(current[0]) == ord(next[0]) and int(current[1]) + 1 == int(next[1]):
-            results = True
-        # if piece moves down one
-        elif ord(current[0]) == ord(next[0]) and int(current[1]) - 1 == int(next[1]):
-            results = True
-        # if piece moves to the right one
-        elif ord(current[0]) + 1 == ord(next[0]) and int(current[1]) == int(next[1]):
-            results = True
-        # if piece moves to the left one
-        elif ord(current[0]) - 1 == ord(next[0]) and int(current[1]) == int(next[1]):
-            results = True
-        # if piece moves diagonal upper right one
-        elif ord(current[0]) + 1 == ord(next[0]) and int(current[1]) + 1 == int(next[1]):
-            results = True
-        # if piece moves diagonal lower right one
-        elif ord(current[0]) + 1 == ord(next[0]) and int(current[1]) - 1 == int(next[1]):
-            results = True
-        # if piece moves diagonal lower left one
-        elif ord(current[0]) - 1 == ord(next[0]) and int(current[1]) - 1 == int(next[1]):
-            results = True
-        # if piece moves diagonal upper left one
-        elif ord(current[0]) - 1 == ord(next[0]) and int(current[1]) + 1 == int(next[1]):
-            results = True
-        return results
+        return KING_ATTACKS[SQUARE_INDEX[current]] >> SQUARE_INDEX[next] & 1 == 1
 
     def find_king(self, board, king):
         """
         Takes a board and a king as parameters.
         Returns the location of the king in the board.
         """
+        # the game's own board keeps a bitboard of each king
+        if self._is_own_board(board):
+            return SQUARES[self._king_index(king.get_color())]
         location = None
         for piece in board:
             if board[piece] == king:
@@ -364,7 +928,7 @@ class ChessVar:
     def copy_board(self, current, next):
         """
         Takes current and next locations as parameters.
-        Makes a copy of the board dictionary and moves the piece in the copy.
+        Makes a copy of the board as a dictionary and moves the piece in the copy.
         Returns the copy of the board.
         """
         board_copy = dict(self._board)
@@ -372,72 +936,435 @@ class ChessVar:
         board_copy[current] = self._blank_space
         return board_copy
 
-    def put_opp_king_in_check(self, current, next):
+    def _king_index(self, color):
+        """ Takes a color. Returns the square index of that color's king. """
+        return self._bitboards[KING_CODES[color]].bit_length() - 1
+
+    def _reaches(self, name, current_index, next_index, occupied):
         """
-        Takes current and next locations as parameters.
-        Makes a copy of the board dictionary, moves the piece by calling copy_board method
-        Finds location of kings by calling find_king method.
-        Checks if the next move would hit the opponents king by calling move_check method.
-        If so, returns False. Otherwise, returns True.
+        Takes a piece name, current and next square indexes and an occupancy bitboard as parameters.
+        Returns True if that piece could move from current to next on that board.
         """
+        if name == "rook":
+            return ROOK_RAYS[current_index] >> next_index & 1 and not BETWEEN[current_index][next_index] & occupied
+        elif name == "bishop":
+            return BISHOP_RAYS[current_index] >> next_index & 1 and not BETWEEN[current_index][next_index] & occupied
+        elif name == "knight":
+            return KNIGHT_ATTACKS[current_index] >> next_index & 1
+        elif name == "king":
+            return KING_ATTACKS[current_index] >> next_index & 1
+        return False
 
-        # make copy of the board and move piece
-        board_copy = self.copy_board(current, next)
+    def _build_attack_maps(self):
+        """
+        Takes no parameters and returns nothing.
+        Fills in, for each color, the squares hit by each of its pieces and its attack map
+        (every square its pieces hit) from the board.
+        """
+        self._attacks = [{}, {}]
+        for index, code in enumerate(self._squares):
+            if code:
+                self._attacks[(code - 1) // 4][index] = piece_attacks(PIECES[code].get_name(), index, self._occupied)
+        self._attack_maps = [reduce(operator.or_, attacks.values(), 0) for attacks in self._attacks]
 
-        # find location of kings
-        white_king_loc = self.find_king(board_copy, self._white_king)
-        black_king_loc = self.find_king(board_copy, self._black_king)
+    def _refresh_attacks(self, current_index, next_index):
+        """
+        Takes the two square indexes a move has just changed as parameters and returns nothing.
+        If the attack maps have been built, works out again the squares hit by the pieces now on those
+        squares and by any sliding piece whose rays reached either square, then rebuilds both attack maps.
+        """
+        if self._attacks is None:
+            return
+        squares = self._squares
+        occupied = self._occupied
+        changed = 1 << current_index | 1 << next_index
+        for attacks in self._attacks:
+            attacks.pop(current_index, None)
+            attacks.pop(next_index, None)
+            # only a slider that hit one of the squares can see further or less far now
+            for index, hits in attacks.items():
+                if hits & changed and squares[index] in SLIDER_CODES:
+                    attacks[index] = piece_attacks(PIECES[squares[index]].get_name(), index, occupied)
+        for index in (current_index, next_index):
+            code = squares[index]
+            if code:
+                self._attacks[(code - 1) // 4][index] = piece_attacks(PIECES[code].get_name(), index, occupied)
+        self._attack_maps[0] = reduce(operator.or_, self._attacks[0].values(), 0)
+        self._attack_maps[1] = reduce(operator.or_, self._attacks[1].values(), 0)
 
-        # if it is white player's turn
-        if self._white_turn is True:
-            # check if next move can hit black player's king
-            move_results = self.move_check(board_copy, next, black_king_loc)
-            if move_results is True:
-                return False
-            else:
+    def _checkers(self, king_index, opponent):
+        """
+        Takes the player's king square index and the opponent's color as parameters.
+        Returns the bitboard of the opponent's pieces hitting the king.
+        """
+        if not self._attack_maps[COLORS.index(opponent)] >> king_index & 1:
+            return 0
+        checkers = 0
+        for index, hits in self._attacks[COLORS.index(opponent)].items():
+            if hits >> king_index & 1:
+                checkers |= 1 << index
+        return checkers
+
+    def _pins(self, king_index, player, opponent):
+        """
+        Takes the player's king square index and the player's and opponent's colors as parameters.
+        Returns a dictionary of the square index of each of the player's pieces that is the only piece
+        between an opponent slider and the king, to the squares it can move to without leaving the line.
+        """
+        pins = {}
+        king = KING_CODES[opponent]
+        own = self._color_bitboard(player)
+        lined_up = ROOK_RAYS[king_index] & self._bitboards[king + 1] | BISHOP_RAYS[king_index] & self._bitboards[king + 2]
+        for slider in bit_indices(lined_up):
+            blockers = BETWEEN[slider][king_index] & self._occupied
+            # a single blocker of the player's own
+            if blockers & own and not blockers & (blockers - 1):
+                pins[blockers.bit_length() - 1] = BETWEEN[slider][king_index] | 1 << slider
+        return pins
+
+    def _gives_check(self, current_index, next_index, opponent):
+        """
+        Takes the current and next square indexes of a move and the opponent's color as parameters.
+        Returns True if the moved piece would hit the opponent's king after the move.
+        """
+        king_index = self._king_index(opponent)
+        # landing on the king counts as hitting it
+        if king_index == next_index:
+            return True
+        name = PIECES[self._squares[current_index]].get_name()
+        occupied = self._occupied & ~(1 << current_index) | 1 << next_index
+        return self._reaches(name, next_index, king_index, occupied)
+
+    def _exposes_king(self, current_index, next_index, player, opponent, checkers, pins):
+        """
+        Takes the current and next square indexes of a move, the player's and opponent's colors and the
+        _checkers and _pins of the player's king as parameters.
+        Returns True if any of the opponent's pieces would hit the player's king after the move.
+        """
+        if self._squares[current_index] == KING_CODES[player]:
+            # the king may not step onto a square the opponent hits
+            if self._attack_maps[COLORS.index(opponent)] >> next_index & 1:
                 return True
-        # if it is black player's turn
-        if self._white_turn is False:
-            # check if next move can hit white player's king
-            move_results = self.move_check(board_copy, next, white_king_loc)
-            if move_results is True:
-                return False
-            else:
+            # nor along the line of a slider checking it, which sees past the square the king leaves
+            for checker in bit_indices(checkers):
+                if self._squares[checker] in SLIDER_CODES and BETWEEN[checker][next_index] >> current_index & 1:
+                    return True
+            return False
+        if checkers:
+            # two checkers cannot both be dealt with by one move of another piece
+            if checkers & (checkers - 1):
+                return True
+            # one checker has to be captured or, if it slides, blocked
+            checker = checkers.bit_length() - 1
+            if not (1 << checker | BETWEEN[checker][self._king_index(player)]) >> next_index & 1:
                 return True
+        # a pinned piece has to stay on the line it is pinned along
+        if current_index in pins and not pins[current_index] >> next_index & 1:
+            return True
+        return False
+
+    def _king_attacked(self, player, opponent):
+        """
+        Takes the player's and opponent's colors as parameters.
+        Returns True if any of the opponent's pieces could hit the player's king.
+        """
+        if self._attacks is None:
+            self._build_attack_maps()
+        return self._attack_maps[COLORS.index(opponent)] >> self._king_index(player) & 1 == 1
+
+    def put_opp_king_in_check(self, current, next):
+        """
+        Takes current and next locations as parameters.
+        Checks if the moved piece would hit the opponent's king after the move.
+        If so, returns False. Otherwise, returns True.
+        """
+        current_index = SQUARE_INDEX[current]
+        next_index = SQUARE_INDEX[next]
+        opponent = 'black' if self._white_turn is True else 'white'
+
+        if self._gives_check(current_index, next_index, opponent):
+            return False
+        return True
 
     def put_your_king_in_check(self, current, next):
         """
         Takes current and next locations as parameters.
-        Makes a copy of the board dictionary, moves the piece by calling copy_board method
-        Finds location of kings by calling find_king method.
-        Checks if there are any pieces on the board that can now hit your king.
+        Checks if there are any pieces on the board that could hit your king after the move, using the
+        attack maps and the pieces checking or pinned against your king.
         If so, returns False. Otherwise, returns True.
         """
+        current_index = SQUARE_INDEX[current]
+        next_index = SQUARE_INDEX[next]
+        if self._white_turn is True:
+            player, opponent = 'white', 'black'
+        else:
+            player, opponent = 'black', 'white'
 
-        # make copy of the board and move piece
-        board_copy = self.copy_board(current, next)
+        if self._attacks is None:
+            self._build_attack_maps()
+        king_index = self._king_index(player)
+        checkers = self._checkers(king_index, opponent)
+        pins = self._pins(king_index, player, opponent)
+        if self._exposes_king(current_index, next_index, player, opponent, checkers, pins):
+            return False
+        return True
 
-        # find location of kings
-        white_king_loc = self.find_king(board_copy, self._white_king)
-        black_king_loc = self.find_king(board_copy, self._black_king)
+    def _color_bitboard(self, color):
+        """ Takes a color. Returns the bitboard of that color's pieces. """
+        king = KING_CODES[color]
+        return reduce(operator.or_, self._bitboards[king:king + 4])
 
-        # if it is white player's turn
+    def iter_legal_moves(self):
+        """
+        Takes no parameters.
+        Yields every move the player whose turn it is can make, as (current, next) location pairs,
+        following the same rules as make_move.
+        """
+        # if the game is over, no more moves can be made.
+        if self._game_status != 'UNFINISHED':
+            return
         if self._white_turn is True:
-            for piece in board_copy:
-                if board_copy[piece].get_color() == "black":  # find all black pieces
-                    # check if black piece can hit white king
-                    move_results_2 = self.move_check(board_copy, piece, white_king_loc)
-                    if move_results_2 is True:
-                        return False
-        # if it is black player's turn
-        if self._white_turn is False:
-            for piece in board_copy:
-                if board_copy[piece].get_color() == "white":  # find all white pieces
-                    # check if white piece can hit black king
-                    move_results_2 = self.move_check(board_copy, piece, black_king_loc)
-                    if move_results_2 is True:
-                        return False
-        return True
+            player, opponent = 'white', 'black'
+        else:
+            player, opponent = 'black', 'white'
+
+        if self._attacks is None:
+            self._build_attack_maps()
+        own = self._color_bitboard(player)
+        # what may stop a move is worked out once for the position rather than once per move
+        king_index = self._king_index(player)
+        checkers = self._checkers(king_index, opponent)
+        pins = self._pins(king_index, player, opponent)
+        attacks = self._attacks[COLORS.index(player)]
+        for current_index in bit_indices(own):
+            # every square the piece can reach that is not taken by one of your own pieces
+            for next_index in bit_indices(attacks[current_index] & ~own):
+                if self._gives_check(current_index, next_index, opponent):
+                    continue
+                if self._exposes_king(current_index, next_index, player, opponent, checkers, pins):
+                    continue
+                yield SQUARES[current_index], SQUARES[next_index]
+
+    def random_move(self, rng, king_forward=False, tries=16):
+        """
+        Takes a random.Random object, whether to try the king's moves up the board first and the number of
+        random picks to try as parameters.
+        Returns a legal move for the player whose turn it is, as a (current, next) location pair, chosen by
+        picking a piece and then one of its squares at random until a legal one comes up. This only checks
+        the moves it picks, so it is much faster than choosing from legal_moves.
+        Returns None if the game is over or the player has no legal moves.
+        """
+        if self._game_status != 'UNFINISHED':
+            return None
+        if self._white_turn is True:
+            player, opponent = 'white', 'black'
+        else:
+            player, opponent = 'black', 'white'
+
+        if self._attacks is None:
+            self._build_attack_maps()
+        own = self._color_bitboard(player)
+        king_index = self._king_index(player)
+        checkers = self._checkers(king_index, opponent)
+        pins = self._pins(king_index, player, opponent)
+        attacks = self._attacks[COLORS.index(player)]
+
+        def legal(current_index, next_index):
+            return not (self._gives_check(current_index, next_index, opponent)
+                        or self._exposes_king(current_index, next_index, player, opponent, checkers, pins))
+
+        if king_forward:
+            # the squares the king can reach on the rows above it
+            ahead = attacks[king_index] & ~own & -(1 << (king_index // 8 + 1) * 8)
+            targets = list(bit_indices(ahead))
+            rng.shuffle(targets)
+            for next_index in targets:
+                if legal(king_index, next_index):
+                    return SQUARES[king_index], SQUARES[next_index]
+
+        pieces = list(attacks)
+        for _ in range(tries):
+            current_index = rng.choice(pieces)
+            targets = attacks[current_index] & ~own
+            if not targets:
+                continue
+            # clear a random number of the lowest set bits, then take the lowest one left
+            for _ in range(rng.randrange(bin(targets).count("1"))):
+                targets &= targets - 1
+            next_index = (targets & -targets).bit_length() - 1
+            if legal(current_index, next_index):
+                return SQUARES[current_index], SQUARES[next_index]
+
+        # most of the picks were refused, so choose from every legal move instead
+        moves = list(self.iter_legal_moves())
+        return rng.choice(moves) if moves else None
+
+    def legal_moves(self):
+        """
+        Takes no parameters.
+        Returns a list of every move the player whose turn it is can make, as (current, next) location pairs.
+        """
+        if self._move_cache is not None:
+            return list(self._move_cache.lookup(self))
+        return list(self.iter_legal_moves())
+
+    def legal_move_results(self):
+        """
+        Takes no parameters.
+        Returns a dictionary of every move the player whose turn it is can make, as a (current, next)
+        location pair, to the game status the race leads to after the move (leaving out any repetition
+        limit), in the order iter_legal_moves yields them.
+        """
+        if self._white_turn is True:
+            # the race is only decided once black has moved
+            return dict.fromkeys(self.iter_legal_moves(), 'UNFINISHED')
+        white_king_home = self._king_index('white') >= 56
+        black_king = self._king_index('black')
+        results = {}
+        for current, next in self.iter_legal_moves():
+            king = SQUARE_INDEX[next] if SQUARE_INDEX[current] == black_king else black_king
+            results[current, next] = race_result(white_king_home, king >= 56)
+        return results
+
+    def race_map(self, color):
+        """
+        Takes a color as a parameter.
+        Returns a list of bitboards whose entry d holds the squares from which that color's king could reach
+        the 8th row in d moves, stepping only onto squares the opponent does not hit as the board stands
+        (its own pieces are taken to move out of the way). It is worked out from the attack maps, which
+        every move keeps up to date, once per position.
+        """
+        if self._race_maps is None or self._race_maps[0] != self._hash:
+            self._race_maps = (self._hash, [None, None])
+        maps = self._race_maps[1]
+        side = COLORS.index(color)
+        if maps[side] is None:
+            if self._attacks is None:
+                self._build_attack_maps()
+            # an opponent piece no other opponent piece defends can be captured on the way
+            safe = ~self._attack_maps[1 - side] & FULL_BOARD
+            layer = reached = GOAL_ROW & safe
+            layers = []
+            while layer:
+                layers.append(layer)
+                layer = king_spread(reached) & safe & ~reached
+                reached |= layer
+            maps[side] = layers
+        return maps[side]
+
+    def race_distance(self, color):
+        """
+        Takes a color as a parameter.
+        Returns the fewest moves that color's king needs to reach the 8th row through the squares of its
+        race_map, or None if there is no such path as the board stands.
+        """
+        king_index = self._king_index(color)
+        if king_index >= 56:
+            return 0
+        for distance, layer in enumerate(self.race_map(color)):
+            if KING_ATTACKS[king_index] & layer:
+                return distance + 1
+        return None
+
+    def _king_moves(self, player, opponent, squares=FULL_BOARD):
+        """
+        Takes the player's and opponent's colors and optionally a bitboard of squares to keep to as parameters.
+        Returns the square indexes among those squares the player's king could legally move to, were it
+        the player's turn.
+        """
+        if self._attacks is None:
+            self._build_attack_maps()
+        king_index = self._king_index(player)
+        checkers = self._checkers(king_index, opponent)
+        targets = KING_ATTACKS[king_index] & squares & ~self._color_bitboard(player)
+        return [next_index for next_index in bit_indices(targets)
+                if not self._gives_check(king_index, next_index, opponent)
+                and not self._exposes_king(king_index, next_index, player, opponent, checkers, {})]
+
+    def _lone_king_race(self, player, opponent):
+        """
+        Takes the colors of a player and of an opponent with nothing left but its king as parameters.
+        Returns the fewest moves the player's king is sure to need to reach the 8th row whatever the
+        opponent does, or None if it might not get there within 14 moves. Only the king moves, so the
+        player's other pieces stay in its way, and after the opponent has made m moves its king could be
+        anywhere within m steps, so no square within m + 1 steps of where it stands now is landed on.
+        """
+        own = self._color_bitboard(player)
+        reached = self._bitboards[KING_CODES[player]]
+        others = own & ~reached
+        opponent_moves = 0 if (player == 'white') == self._white_turn else 1
+        near = king_spread(self._bitboards[KING_CODES[opponent]])
+        for _ in range(opponent_moves):
+            near = king_spread(near)
+        for distance in range(1, 15):
+            reached = king_spread(reached) & ~others & ~near
+            if reached & GOAL_ROW:
+                return distance
+            if not reached:
+                return None
+            near = king_spread(near)
+        return None
+
+    def race_decided(self):
+        """
+        Takes no parameters.
+        Returns (color, plies) if that color is sure to win the race however either player moves, with the
+        most plies until the game is decided, or None if that cannot be told quickly. It is told when the
+        side to move reaches the 8th row at once and the other king cannot answer in time, and when one
+        side has only its king left and the other king has a path to the 8th row that lone king cannot
+        block, more moves shorter than the lone king's own way there on an empty board.
+        A player with no legal moves is stuck: neither side can ever move again, so the game can never end
+        and the searches score it as a draw. Nothing is told while the player to move or a lone king is stuck.
+        """
+        if self._game_status != 'UNFINISHED':
+            return None
+        if next(self.iter_legal_moves(), None) is None:
+            return None
+        if self._white_turn is True:
+            player, opponent = 'white', 'black'
+        else:
+            player, opponent = 'black', 'white'
+        white_index, black_index = self._king_index('white'), self._king_index('black')
+
+        # only a king on the 7th row can get home in one move
+        if player == 'black':
+            black_next_home = black_index >= 48 and self._king_moves('black', 'white', GOAL_ROW)
+            if white_index >= 56:
+                # white is already home, so black can only tie by getting home now
+                if black_next_home:
+                    return None
+                return 'white', 1
+            if black_next_home:
+                return 'black', 1
+        elif white_index >= 48 and black_index < 48:
+            # black's king is two rows or more from home, so it cannot answer white's king getting home
+            for next_index in self._king_moves('white', 'black', GOAL_ROW):
+                captured = self._make(white_index, next_index)
+                self._white_turn = False
+                stuck = next(self.iter_legal_moves(), None) is None
+                self._white_turn = True
+                self._unmake(white_index, next_index, captured)
+                if not stuck:
+                    return 'white', 2
+
+        for color, other in (('white', 'black'), ('black', 'white')):
+            king = KING_CODES[other]
+            if self._color_bitboard(other) != self._bitboards[king] or not self._king_moves(other, color):
+                continue
+            distance = self._lone_king_race(color, other)
+            if distance is None:
+                continue
+            other_distance = KING_RACE_DISTANCE[self._king_index(other)]
+            # black moves right after white, so white must be home a whole move earlier to win
+            if color == 'white':
+                margin = 0 if player == 'white' else 1
+                if other_distance > distance + margin:
+                    return 'white', 2 * distance + margin
+            else:
+                margin = -1 if player == 'black' else 0
+                if other_distance > distance + margin:
+                    return 'black', 2 * distance + margin
+        return None
 
     def update_game_state(self):
         """
@@ -445,20 +1372,9 @@ class ChessVar:
         Checks if either king has made it to the 8th row of the board.
         If so, updates the game status. Returns game status.
         """
-        white_king_loc = self.find_king(self._board, self._white_king)
-        black_king_loc = self.find_king(self._board, self._black_king)
-
-        # if black king has made it to the 8th row but white king has not
-        if black_king_loc[1] == "8" and white_king_loc[1] != "8":
-            self._game_status = 'BLACK_WON'
-        # if both the black and white king have made it to the 8th row
-        elif black_king_loc[1] == "8" and white_king_loc[1] == "8":
-            self._game_status = 'TIE'
-        # if white king has made it to the 8th row but black king has not
-        elif black_king_loc[1] != "8" and white_king_loc[1] == "8":
-            self._game_status = 'WHITE_WON'
-        else:
-            self._game_status = 'UNFINISHED'
+        old_status = self._game_status
+        self._game_status = race_result(self._king_index('white') >= 56, self._king_index('black') >= 56)
+        self._hash ^= ZOBRIST_STATUS[old_status] ^ ZOBRIST_STATUS[self._game_status]
         return self._game_status
 
     def get_game_state(self):
@@ -466,3 +1382,155 @@ class ChessVar:
         Takes no parameters. Returns the status of the game.
         """
         return self._game_status
+
+    def get_turn(self):
+        """
+        Takes no parameters. Returns the color of the player whose turn it is.
+        """
+        return 'white' if self._white_turn is True else 'black'
+
+    def get_piece(self, location):
+        """
+        Takes a location as a parameter. Returns the Piece object at that location.
+        """
+        return PIECES[self._squares[SQUARE_INDEX[location]]]
+
+    def get_king_location(self, color):
+        """
+        Takes a color as a parameter. Returns the location of that color's king.
+        """
+        return SQUARES[self._king_index(color)]
+
+    def get_pieces(self, color):
+        """
+        Takes a color as a parameter.
+        Returns a dictionary of the location of each of that color's pieces to the piece's name.
+        """
+        return {SQUARES[index]: PIECES[self._squares[index]].get_name()
+                for index in bit_indices(self._color_bitboard(color))}
+
+    def get_bitboards(self):
+        """
+        Takes no parameters.
+        Returns a tuple of the bitboard of each piece code (bit n set if such a piece is on square n),
+        indexed by code. The entry for code 0, a blank space, is always 0.
+        """
+        return tuple(self._bitboards)
+
+
+class TranspositionTable:
+    """
+    A class that represents a fixed-size table of search results keyed by position hash.
+    """
+
+    def __init__(self, size=65536):
+        """
+        Creates TranspositionTable object with room for size entries, all empty, and the search age set to 0.
+        """
+        self._size = size
+        self._entries = [None] * size
+        self._age = 0
+
+    def get_size(self):
+        """ Returns the number of slots in the table. """
+        return self._size
+
+    def new_search(self):
+        """
+        Takes no parameters and returns nothing.
+        Starts a new search, so entries stored by earlier searches are replaced first.
+        """
+        self._age += 1
+
+    def clear(self):
+        """
+        Takes no parameters and returns nothing.
+        Empties every slot in the table.
+        """
+        self._entries = [None] * self._size
+
+    def store(self, key, depth, value, bound='EXACT', move=None):
+        """
+        Takes a position hash, search depth, value, bound (EXACT, LOWER or UPPER) and best move as parameters.
+        Stores the result unless its slot holds a deeper result for another position from this search.
+        Returns True if the result was stored.
+        """
+        slot = key % self._size
+        entry = self._entries[slot]
+        # keep the old entry only if it is from this search, for another position and searched deeper
+        if entry is not None and entry[0] != key and entry[5] == self._age and entry[1] > depth:
+            return False
+        self._entries[slot] = (key, depth, value, bound, move, self._age)
+        return True
+
+    def probe(self, key):
+        """
+        Takes a position hash as a parameter.
+        Returns the stored (depth, value, bound, move) for the position, or None if it is not in the table.
+        """
+        entry = self._entries[key % self._size]
+        if entry is None or entry[0] != key:
+            return None
+        return entry[1:5]
+
+
+class MoveCache:
+    """
+    A class that represents a bounded cache of each position's legal moves and the game status each
+    leads to, keyed by position hash. The least recently used position is dropped when it is full.
+    """
+
+    def __init__(self, size=4096):
+        """
+        Creates MoveCache object with room for size positions, empty, and the statistics set to 0.
+        """
+        self._size = size
+        self._entries = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get_size(self):
+        """ Returns the number of positions the cache has room for. """
+        return self._size
+
+    def __len__(self):
+        """ Returns the number of positions in the cache. """
+        return len(self._entries)
+
+    def get_stats(self):
+        """
+        Takes no parameters.
+        Returns a dictionary of the lookups found in the cache ("hits"), the ones that had to work out the
+        moves ("misses"), the positions dropped to make room ("evictions") and the positions held ("entries").
+        """
+        return {"hits": self._hits, "misses": self._misses, "evictions": self._evictions,
+                "entries": len(self._entries)}
+
+    def clear(self):
+        """
+        Takes no parameters and returns nothing.
+        Empties the cache and sets the statistics back to 0.
+        """
+        self._entries.clear()
+        self._hits = self._misses = self._evictions = 0
+
+    def lookup(self, game):
+        """
+        Takes a ChessVar object as a parameter.
+        Returns the legal_move_results dictionary of its position, working it out and storing it
+        if the position is not in the cache. The dictionary must not be changed.
+        """
+        key = game.get_hash()
+        results = self._entries.get(key)
+        if results is not None:
+            self._hits += 1
+            self._entries.move_to_end(key)
+            return results
+        self._misses += 1
+        results = game.legal_move_results()
+        self._entries[key] = results
+        if len(self._entries) > self._size:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+        return results
@@ -1,5 +1,7 @@
+import pickle
+import random
 import unittest
-from ChessVar import Piece, ChessVar
+from ChessVar import Piece, ChessVar, TranspositionTable, MoveCache, RECORD_SIZE, SQUARES
 
 
 class TestChessVar(unittest.TestCase):
@@ -148,4 +150,322 @@ class TestChessVar(unittest.TestCase):
         self.assertEqual(game.make_move("a2", "b1"), True)
         self.assertEqual(game.make_move("g7", "g8"), True)      # black makes winning move
         self.assertEqual(game.get_game_state(), 'BLACK_WON')    # check game status changed to black won
-        self.assertEqual(game.make_move("a1", "b2"), False)     # check no more moves can be made
\ No newline at end of file
+        self.assertEqual(game.make_move("a1", "b2"), False)     # check no more moves can be made
+
+    def test_6(self):
+        """ Tests moves onto the opponent's king square are rejected. """
+        # the black king is already hit by the rook and the knight, as if by a discovered check
+        game = ChessVar.from_fen("k7/8/1N6/8/8/8/8/R6K w")
+        self.assertEqual(game.check_move("a1", "a8"), 'gives_check')        # rook onto black king
+        self.assertEqual(game.make_move("a1", "a8"), False)
+        self.assertEqual(game.make_move("b6", "a8"), False)                 # knight onto black king
+        self.assertNotIn(("a1", "a8"), game.legal_moves())
+        game = ChessVar.from_fen("8/8/8/8/8/8/6b1/k6K b")
+        self.assertEqual(game.check_move("g2", "h1"), 'gives_check')        # black bishop onto white king
+        self.assertEqual(game.make_move("g2", "h1"), False)
+        self.assertEqual(game.get_piece("h1").get_name(), 'king')
+        self.assertEqual(game.get_game_state(), 'UNFINISHED')
+
+    def test_7(self):
+        """ Tests the legal moves offered match make_move. """
+        game = ChessVar()
+        moves = game.legal_moves()
+        self.assertEqual(len(moves), 21)                        # 21 moves from the starting setup
+        self.assertIn(("a2", "a3"), moves)                      # rook up
+        self.assertNotIn(("b1", "d3"), moves)                   # bishop jump
+        self.assertNotIn(("a2", "h2"), moves)                   # rook capture that puts black in check
+        self.assertEqual(sorted(game.iter_legal_moves()), sorted(moves))
+        for current, next in moves:
+            self.assertEqual(ChessVar().make_move(current, next), True)
+
+    def test_8(self):
+        """ Tests taking moves back with undo_move. """
+        game = ChessVar()
+        self.assertEqual(game.undo_move(), False)               # nothing to take back
+        start_moves = game.legal_moves()
+        self.assertEqual(game.make_move("a2", "a6"), True)      # rook up
+        self.assertEqual(game.make_move("g2", "a8"), True)      # bishop up/left diagonal
+        self.assertEqual(game.make_move("a6", "a8"), True)      # rook captures bishop
+        self.assertEqual(game.undo_move(), True)                # take back the capture
+        self.assertEqual(game.make_move("a6", "a7"), True)      # white to move again
+        self.assertEqual(game.undo_move(), True)
+        self.assertEqual(game.undo_move(), True)
+        self.assertEqual(game.undo_move(), True)
+        self.assertEqual(game.legal_moves(), start_moves)       # back to the starting setup
+        self.assertEqual(game.make_move("h2", "h3"), False)     # white's turn again
+
+        game = ChessVar()
+        for current, next in [("a2", "a8"), ("h2", "h8"), ("a1", "a2"), ("h1", "h2"), ("a2", "a3"), ("h2", "h3"),
+                              ("a3", "a4"), ("h3", "h4"), ("a4", "a5"), ("h4", "h5"), ("a5", "a6"), ("h5", "h6"),
+                              ("a6", "a7"), ("h8", "g8"), ("b2", "c3"), ("g8", "g4"), ("a7", "b8"), ("h6", "h7")]:
+            self.assertEqual(game.make_move(current, next), True)
+        self.assertEqual(game.get_game_state(), 'WHITE_WON')
+        self.assertEqual(game.undo_move(), True)                # take back black's last move
+        self.assertEqual(game.get_game_state(), 'UNFINISHED')
+        self.assertEqual(game.make_move("h6", "g6"), True)
+        self.assertEqual(game.get_game_state(), 'WHITE_WON')
+
+    def test_9(self):
+        """ Tests position hashes follow the position, not the move order. """
+        game_1 = ChessVar()
+        game_2 = ChessVar()
+        start_hash = game_1.get_hash()
+        self.assertEqual(game_1.make_move("a2", "a3"), True)
+        self.assertEqual(game_1.make_move("h2", "h3"), True)
+        self.assertEqual(game_1.make_move("c2", "b4"), True)
+        self.assertEqual(game_2.make_move("c2", "b4"), True)
+        self.assertEqual(game_2.make_move("h2", "h3"), True)
+        self.assertEqual(game_2.make_move("a2", "a3"), True)
+        self.assertEqual(game_1.get_hash(), game_2.get_hash())          # same position, different order
+        self.assertNotEqual(game_1.get_hash(), start_hash)
+        self.assertEqual(game_1.make_move("g2", "c6"), True)
+        self.assertEqual(game_1.get_hash(), game_1._compute_hash())     # incremental hash matches scratch
+        self.assertEqual(game_1.undo_move(), True)
+        self.assertEqual(game_1.get_hash(), game_2.get_hash())          # undo restores the hash
+        for _ in range(3):
+            self.assertEqual(game_1.undo_move(), True)
+        self.assertEqual(game_1.get_hash(), start_hash)
+
+    def test_10(self):
+        """ Tests every game shares the same Piece objects, which cannot be changed. """
+        game_1 = ChessVar()
+        game_2 = ChessVar()
+        self.assertIs(game_1.get_piece("a1"), game_2.get_piece("a1"))   # same white king in both games
+        self.assertIs(game_1.get_piece("d4"), game_1._blank_space)
+        board = game_1._board
+        self.assertEqual(board["a2"] != game_1._blank_space, True)     # identity comparisons still work
+        self.assertEqual(game_1.find_king(board, game_1._black_king), "h1")
+        self.assertEqual(len(dict(board)), 64)
+        self.assertRaises(AttributeError, setattr, game_1.get_piece("a1"), "_color", "black")
+        self.assertRaises(AttributeError, setattr, game_1, "_extra", 1)  # no per-game __dict__
+        self.assertIs(pickle.loads(pickle.dumps(game_1.get_piece("h2"))), game_2.get_piece("h2"))
+        copy = pickle.loads(pickle.dumps(game_1))
+        self.assertEqual(copy.make_move("a2", "a3"), True)
+        self.assertEqual(copy.get_hash(), copy._compute_hash())
+        self.assertEqual(game_1.get_piece("a3"), game_1._blank_space)  # the original is not changed
+
+    def test_11(self):
+        """ Tests saving and loading positions as strings and fixed-size records. """
+        game = ChessVar()
+        self.assertEqual(game.to_fen(), "8/8/8/8/8/8/RBN2nbr/KBN2nbk w UNFINISHED")
+        self.assertEqual(len(game.to_record()), RECORD_SIZE)
+        for current, next in [("a2", "a5"), ("g2", "c6"), ("a1", "a2")]:
+            self.assertEqual(game.make_move(current, next), True)
+        self.assertEqual(game.to_fen(), "8/8/2b5/R7/8/8/KBN2n1r/1BN2nbk b UNFINISHED")
+        for copy in (ChessVar.from_fen(game.to_fen()), ChessVar.from_record(game.to_record()),
+                     ChessVar.from_record(memoryview(bytearray(game.to_record())))):
+            self.assertEqual(copy.get_hash(), game.get_hash())
+            self.assertEqual(copy.get_turn(), 'black')
+            self.assertEqual(copy.legal_moves(), game.legal_moves())
+            self.assertEqual(copy.to_record(), game.to_record())
+
+        game = ChessVar.from_fen("K7/8/8/8/8/8/8/7k b WHITE_WON")
+        self.assertEqual(game.get_game_state(), 'WHITE_WON')
+        self.assertEqual(ChessVar.from_record(game.to_record()).get_game_state(), 'WHITE_WON')
+        self.assertEqual(ChessVar.from_fen("K7/8/8/8/8/8/8/7k w").get_game_state(), 'UNFINISHED')
+        self.assertRaises(ValueError, ChessVar.from_fen, "K7/8/8/8/8/8/8/8 w")          # no black king
+        self.assertRaises(ValueError, ChessVar.from_fen, "K7/8/8/8/8/8/8/6k w")         # short rank
+        self.assertRaises(ValueError, ChessVar.from_fen, "Q6k/8/8/8/8/8/8/7K w")        # unknown piece
+        self.assertRaises(ValueError, ChessVar.from_record, bytes(RECORD_SIZE - 1))
+        self.assertRaises(ValueError, ChessVar.from_record, bytes([0x9f]) + bytes(RECORD_SIZE - 1))
+
+    def test_12(self):
+        """ Tests the attack maps stay up to date and pins and checks are respected. """
+        game = ChessVar()
+        self.assertEqual(len(game.legal_moves()), 21)
+        for ply in range(8):
+            self.assertEqual(game.make_move(*game.legal_moves()[-1]), True)
+        game.undo_move()
+        built = ChessVar.from_record(game.to_record())
+        built._build_attack_maps()
+        self.assertEqual(game._attacks, built._attacks)
+        self.assertEqual(game._attack_maps, built._attack_maps)
+        # the black bishop may not leave the line between the white rook and the black king
+        game = ChessVar.from_fen("7k/7b/8/8/8/8/8/K6R b")
+        self.assertEqual(game.make_move("h7", "g6"), False)
+        self.assertEqual(game.make_move("h8", "g8"), True)
+        # while the white king is attacked, only moves that stop the attack are allowed
+        game = ChessVar.from_fen("k6r/8/8/8/8/1R6/8/7K w")
+        self.assertEqual(game.make_move("b3", "b4"), False)
+        self.assertEqual(game.make_move("b3", "h3"), True)
+
+    def test_13(self):
+        """ Tests games using a move cache make the same moves and the cache keeps its size. """
+        cache = MoveCache(size=2)
+        game, cached = ChessVar(), ChessVar()
+        cached.set_move_cache(cache)
+        for move in (("a2", "a3"), ("h2", "h5"), ("a1", "b3"), ("a3", "a4")):
+            self.assertEqual(cached.legal_moves(), game.legal_moves())
+            self.assertEqual(cached.make_move(*move), game.make_move(*move))
+        self.assertEqual(cached.get_hash(), game.get_hash())
+        self.assertEqual(cache.get_stats(), {"hits": 5, "misses": 3, "evictions": 1, "entries": 2})
+        cached.undo_move()
+        self.assertEqual(cached.make_move("a3", "a4"), True)              # the position before is still cached
+        self.assertEqual(cache.get_stats()["hits"], 6)
+        self.assertEqual(cached.make_move("a9", "a8"), False)
+        # black's king reaching the 8th row after white's ties the game
+        game = ChessVar.from_fen("K7/6k1/8/8/8/8/8/8 b")
+        self.assertEqual(game.legal_move_results()[("g7", "g8")], 'TIE')
+        self.assertEqual(game.legal_move_results()[("g7", "g6")], 'WHITE_WON')
+
+    def test_14(self):
+        """ Tests the move history, redo and ending the game on repeated positions. """
+        game = ChessVar()
+        shuffle = [("c2", "e3"), ("f2", "g4"), ("e3", "c2"), ("g4", "f2")]
+        for move in shuffle * 2:
+            self.assertEqual(game.make_move(*move), True)
+        self.assertEqual(game.get_game_state(), 'UNFINISHED')               # no limit by default
+        self.assertEqual(game.get_repetition_count(), 3)
+        hashes = game.get_position_hashes()
+        self.assertEqual((len(hashes), hashes[0], hashes[4]), (9, hashes[8], hashes[8]))
+        game.set_repetition_limit(3)
+        self.assertEqual(game.get_game_state(), 'TIE')
+        self.assertEqual(game.undo_move(), True)
+        self.assertEqual(game.get_game_state(), 'UNFINISHED')
+        self.assertEqual(game.get_moves(), (shuffle * 2)[:-1])
+        self.assertEqual(game.undo_move(), True)
+        self.assertEqual(game.get_redo_moves(), shuffle[2:])
+        self.assertEqual(game.redo_move(), True)
+        self.assertEqual(game.redo_move(), True)
+        self.assertEqual(game.redo_move(), False)
+        self.assertEqual(game.get_game_state(), 'TIE')
+        self.assertEqual(game.get_hash(), game._compute_hash())
+        game.undo_move()
+        self.assertEqual(game.make_move("h2", "h3"), True)                  # a new move forgets the redo
+        self.assertEqual(game.get_redo_moves(), [])
+        self.assertRaises(ValueError, game.set_repetition_limit, 1)
+
+    def test_15(self):
+        """ Tests random moves are always legal. """
+        rng = random.Random(7)
+        game = ChessVar()
+        for ply in range(60):
+            legal = game.legal_moves()
+            self.assertIn(game.random_move(rng), legal)
+            self.assertIn(game.random_move(rng, king_forward=True), legal)
+            game.apply_move(*rng.choice(legal))
+        self.assertEqual(ChessVar.from_fen("K7/8/8/8/8/8/8/7k w WHITE_WON").random_move(rng), None)
+
+    def test_16(self):
+        """ Tests the kings' race distances and telling when the race is decided. """
+        game = ChessVar()
+        self.assertEqual(game.race_distance('white'), 7)
+        self.assertEqual(game.race_map('black')[0], 0x7E << 56)            # white's rook and bishop hit a8, h8
+        self.assertIs(game.race_map('white'), game.race_map('white'))       # worked out once per position
+        for current, next in (("a2", "a3"), ("h2", "h3"), ("a1", "a2")):
+            game.make_move(current, next)
+        self.assertEqual(game.race_distance('white'), None)                 # the rook on h3 cuts off the 3rd row
+        self.assertEqual(game.race_decided(), None)
+        game = ChessVar.from_fen("8/8/8/r7/1K6/8/8/7k w UNFINISHED")
+        self.assertEqual(game.race_distance('white'), 4)                    # through the undefended rook
+        self.assertEqual(ChessVar.from_fen("8/8/8/8/1K6/2R5/6k1/7N w UNFINISHED").race_decided(), ('white', 8))
+        self.assertEqual(ChessVar.from_fen("8/6k1/8/8/8/8/1K6/8 b UNFINISHED").race_decided(), ('black', 1))
+        self.assertEqual(ChessVar.from_fen("K7/8/6k1/8/8/8/8/8 b UNFINISHED").race_decided(), ('white', 1))
+        self.assertEqual(ChessVar.from_fen("8/K7/6k1/8/8/8/8/8 w UNFINISHED").race_decided(), ('white', 2))
+        self.assertEqual(ChessVar.from_fen("8/K5k1/8/8/8/8/8/8 w UNFINISHED").race_decided(), None)  # black ties
+        # nothing is told while the player to move or a lone king is stuck, since the game could never end
+        for fen in ("8/8/8/8/1R6/K7/8/k7 b", "8/8/8/8/8/1k6/b7/K7 w", "8/8/8/1r6/8/k7/8/K7 w"):
+            self.assertEqual(ChessVar.from_fen(fen).race_decided(), None)
+
+    def test_17(self):
+        """ Tests the reasons check_move gives for refusing moves. """
+        game = ChessVar.from_fen("8/7k/7b/8/8/8/R7/KB5R b")
+        self.assertEqual(game.check_move("h7", "h9"), 'bad_location')
+        self.assertEqual(game.make_move("h7", "h9"), False)                 # no KeyError
+        self.assertEqual(game.check_move("d4", "d5"), 'no_piece')
+        self.assertEqual(game.check_move("a2", "a3"), 'wrong_color')
+        self.assertEqual(game.check_move("h7", "h6"), 'own_piece')
+        self.assertEqual(game.check_move("h6", "h5"), 'bad_path')
+        self.assertEqual(game.check_move("h6", "g5"), 'self_check')         # pinned by the rook on h1
+        self.assertEqual(game.check_move("h7", "g7"), None)
+        game.make_move("h7", "g7")
+        self.assertEqual(game.check_move("h1", "h7"), 'blocked_path')
+        self.assertEqual(game.check_move("a2", "a7"), 'gives_check')
+        self.assertEqual(ChessVar.from_fen("K7/8/8/8/8/8/8/7k w WHITE_WON").check_move("a8", "a7"), 'game_over')
+        # every move of a game is judged the same way as by the checks make_move used to call
+        rng = random.Random(3)
+        game = ChessVar()
+        for ply in range(40):
+            for current in SQUARES:
+                for next in SQUARES:
+                    old = (game.get_piece(current).get_color() == game.get_turn()
+                           and game.get_piece(next).get_color() != game.get_turn()
+                           and game.move_check(game._board, current, next)
+                           and game.put_opp_king_in_check(current, next) and game.put_your_king_in_check(current, next))
+                    self.assertEqual(game.check_move(current, next) is None, old)
+            game.apply_move(*rng.choice(game.legal_moves()))
+
+    def test_18(self):
+        """ Tests a king hit by a king or knight may still step along the line to it. """
+        game = ChessVar.from_fen("8/8/8/N1n3k1/5K2/5R2/2R5/8 w")
+        self.assertEqual(game.check_move("f4", "e3"), None)                 # lined up with the black king
+        self.assertIn(("f4", "e3"), game.legal_moves())
+        game = ChessVar.from_fen("8/7k/2N4K/8/8/5R2/2R5/8 w")
+        self.assertEqual(game.check_move("h6", "h5"), None)
+        self.assertIn(("h6", "h5"), game.legal_moves())
+
+    def test_19(self):
+        """ Tests the piece lists, bitboards and king squares kept move by move match a scan of the board. """
+        rng = random.Random(5)
+        captures = undos = 0
+        for _ in range(20):
+            game = ChessVar()
+            for _ in range(60):
+                moves = game.legal_moves()
+                if moves and rng.random() < 0.7:
+                    current, next = rng.choice(moves)
+                    captures += game.get_piece(next).get_color() != 'none'
+                    game.make_move(current, next)
+                elif rng.random() < 0.5:
+                    undos += game.undo_move()
+                else:
+                    game.redo_move()
+                for color in ('white', 'black'):
+                    scanned = {location: game.get_piece(location).get_name() for location in SQUARES
+                               if game.get_piece(location).get_color() == color}
+                    self.assertEqual(game.get_pieces(color), scanned)
+                    king = [location for location, name in scanned.items() if name == 'king']
+                    self.assertEqual([game.get_king_location(color)], king)
+                    self.assertEqual(game.find_king(dict(game._board), game.get_piece(king[0])), king[0])
+                bitboards = [0] * 9
+                for location, piece in game.get_board().items():
+                    bitboards[piece.get_code()] |= 1 << SQUARES.index(location)
+                bitboards[0] = 0
+                self.assertEqual(game.get_bitboards(), tuple(bitboards))
+                self.assertEqual(game.get_hash(), game._compute_hash())
+        self.assertGreater(captures, 20)
+        self.assertGreater(undos, 20)
+
+    def test_20(self):
+        """ Tests no moves are offered once the game is over. """
+        for fen in ("K5k1/8/8/8/8/8/RBN5/8 w TIE", "K7/8/6k1/8/8/8/RBN5/8 w WHITE_WON",
+                    "6k1/K7/8/8/8/8/RBN5/8 w BLACK_WON"):
+            game = ChessVar.from_fen(fen)
+            self.assertEqual(game.legal_moves(), [])
+            self.assertEqual(next(game.iter_legal_moves(), None), None)
+
+
+class TestTranspositionTable(unittest.TestCase):
+    """ Contains unit tests for TranspositionTable class. """
+    def test_1(self):
+        """ Tests storing and probing results. """
+        table = TranspositionTable(size=8)
+        self.assertEqual(table.probe(12345), None)
+        self.assertEqual(table.store(12345, 3, 10, 'LOWER', ("a2", "a3")), True)
+        self.assertEqual(table.probe(12345), (3, 10, 'LOWER', ("a2", "a3")))
+        self.assertEqual(table.probe(12345 + 8), None)                  # same slot, other position
+
+    def test_2(self):
+        """ Tests deeper results from the current search are kept. """
+        table = TranspositionTable(size=8)
+        table.store(1, 5, 100)
+        self.assertEqual(table.store(9, 2, 50), False)                  # shallower result for slot 1
+        self.assertEqual(table.probe(1), (5, 100, 'EXACT', None))
+        self.assertEqual(table.store(1, 1, 70), True)                   # same position always replaces
+        table.store(1, 5, 100)
+        table.new_search()
+        self.assertEqual(table.store(9, 2, 50), True)                   # old search's entry is replaced
+        self.assertEqual(table.probe(1), None)
+        self.assertEqual(table.probe(9), (2, 50, 'EXACT', None))
+        table.clear()
+        self.assertEqual(table.probe(9), None)
@@ -0,0 +1,350 @@
+import argparse
+import json
+import random
+import sys
+import time
+
+from ChessVar import ChessVar, MoveCache, SQUARES, SQUARE_INDEX, COLORS, PIECE_NAMES
+import ReferenceChessVar
+
+
+# the locations a move is sometimes tried with that are not on the board
+OFF_BOARD = ("a0", "i1", "h9", "")
+
+
+class ReferenceBackend:
+    """
+    A class that represents the reference rules: the ChessVar the project started out with, kept
+    unchanged in ReferenceChessVar. Every other backend has to give the same results.
+    """
+
+    name = "reference"
+
+    def new_game(self, pieces, turn):
+        """
+        Takes a dictionary of location to (color, name) for every piece and the color to move as parameters.
+        Returns a reference ChessVar object set up with that position.
+        """
+        game = ReferenceChessVar.ChessVar()
+        board = {location: game._blank_space for location in game._board}
+        for location, (color, name) in pieces.items():
+            board[location] = getattr(game, f"_{color}_{name}")
+        game._board = board
+        game._white_turn = turn == 'white'
+        return game
+
+    def make_move(self, game, current, next):
+        """
+        Takes a game made by new_game and a current and next location as parameters.
+        Returns whether the move was made. The reference raises KeyError for a location that is not on
+        the board and TypeError for a move landing on a king (find_king no longer finds it), which both
+        count as refusing the move.
+        """
+        try:
+            return game.make_move(current, next)
+        except (KeyError, TypeError):
+            return False
+
+    def position(self, game):
+        """
+        Takes a game made by new_game as a parameter.
+        Returns the (color, name) on every square from a1 to h8, the color to move and the game status.
+        """
+        board = game._board
+        squares = tuple((board[location].get_color(), board[location].get_name()) for location in SQUARES)
+        return squares, 'white' if game._white_turn is True else 'black', game.get_game_state()
+
+
+class ChessVarBackend:
+    """
+    A class that represents ChessVar as it is now, checking each move with make_move.
+    """
+
+    name = "chessvar"
+
+    def new_game(self, pieces, turn):
+        """
+        Takes a dictionary of location to (color, name) for every piece and the color to move as parameters.
+        Returns a ChessVar object set up with that position.
+        """
+        return ChessVar.from_pieces(pieces, turn)
+
+    def make_move(self, game, current, next):
+        """ Takes a game made by new_game and a current and next location. Returns whether the move was made. """
+        return game.make_move(current, next)
+
+    def position(self, game):
+        """
+        Takes a game made by new_game as a parameter.
+        Returns the (color, name) on every square from a1 to h8, the color to move and the game status.
+        """
+        squares = tuple((piece.get_color(), piece.get_name()) for piece in map(game.get_piece, SQUARES))
+        return squares, game.get_turn(), game.get_game_state()
+
+
+class CachedBackend(ChessVarBackend):
+    """
+    A class that represents ChessVar looking each position's legal moves up in a MoveCache the games share.
+    """
+
+    name = "cached"
+
+    def __init__(self, size=4096):
+        """ Creates CachedBackend object with a MoveCache of the size given. """
+        self._cache = MoveCache(size)
+
+    def new_game(self, pieces, turn):
+        """
+        Takes a dictionary of location to (color, name) for every piece and the color to move as parameters.
+        Returns a ChessVar object set up with that position, using the shared MoveCache.
+        """
+        game = ChessVar.from_pieces(pieces, turn)
+        game.set_move_cache(self._cache)
+        return game
+
+
+class LegalMovesBackend(ChessVarBackend):
+    """
+    A class that represents ChessVar judging a move legal if legal_moves lists it, then making it with apply_move.
+    """
+
+    name = "legal_moves"
+
+    def make_move(self, game, current, next):
+        """ Takes a game made by new_game and a current and next location. Returns whether the move was made. """
+        if (current, next) not in game.legal_moves():
+            return False
+        game.apply_move(current, next)
+        return True
+
+
+class BatchBackend(ChessVarBackend):
+    """
+    A class that represents the NumPy move generation of BatchAnalysis judging moves, one position at a time,
+    with ChessVar making them. Needs NumPy.
+    """
+
+    name = "batch"
+
+    def __init__(self):
+        """ Creates BatchBackend object. Raises ImportError if NumPy is not installed. """
+        import BatchAnalysis
+        self._analysis = BatchAnalysis
+
+    def make_move(self, game, current, next):
+        """ Takes a game made by new_game and a current and next location. Returns whether the move was made. """
+        if game.get_game_state() != 'UNFINISHED' or current not in SQUARE_INDEX or next not in SQUARE_INDEX:
+            return False
+        boards, turns, statuses = self._analysis.games_to_arrays([game])
+        legal = self._analysis.analyze_positions(boards, turns, statuses)["legal"][0]
+        if not int(legal[SQUARE_INDEX[current]]) >> SQUARE_INDEX[next] & 1:
+            return False
+        game.apply_move(current, next)
+        return True
+
+
+BACKENDS = {backend.name: backend for backend in (ChessVarBackend, CachedBackend, LegalMovesBackend, BatchBackend)}
+
+
+def default_backends():
+    """
+    Takes no parameters.
+    Returns a list of one object of every backend in BACKENDS, leaving out any whose dependencies are missing.
+    """
+    backends = []
+    for backend in BACKENDS.values():
+        try:
+            backends.append(backend())
+        except ImportError:
+            pass
+    return backends
+
+
+def random_position(rng, max_pieces=6):
+    """
+    Takes a random.Random object and the most pieces other than the kings as parameters.
+    Returns a (pieces, turn) position with the kings and up to that many other pieces on random squares,
+    no king attacked and the game still going. Half the time each king starts on the 7th or 8th row,
+    so the race is often decided within a few moves.
+    """
+    while True:
+        squares = rng.sample(SQUARES, 2 + rng.randint(0, max_pieces))
+        for side in (0, 1):
+            if rng.random() < 0.5:
+                squares[side] = rng.choice(SQUARES[48:])
+        if len(set(squares)) != len(squares):
+            continue
+        pieces = {squares[0]: ('white', 'king'), squares[1]: ('black', 'king')}
+        for location in squares[2:]:
+            pieces[location] = (rng.choice(COLORS), rng.choice(PIECE_NAMES[1:]))
+        turn = rng.choice(COLORS)
+        game = ChessVar.from_pieces(pieces, turn)
+        # neither king may be attacked, and a king on the 8th row must be white's with black to move
+        if game._king_attacked('white', 'black') or game._king_attacked('black', 'white'):
+            continue
+        white_home = game.get_king_location('white')[1] == "8"
+        black_home = game.get_king_location('black')[1] == "8"
+        if black_home or (white_home and turn == 'white'):
+            continue
+        return pieces, turn
+
+
+def random_attempt(game, rng):
+    """
+    Takes a ChessVar object and a random.Random object as parameters.
+    Returns a (current, next) move to try: a legal move half the time, otherwise one of the player's pieces
+    to any square, any two squares, or now and then a location that is not on the board.
+    """
+    roll = rng.random()
+    if roll < 0.5:
+        moves = game.legal_moves()
+        if moves:
+            return rng.choice(moves)
+    if roll < 0.85:
+        own = list(game.get_pieces(game.get_turn()))
+        return rng.choice(own), rng.choice(SQUARES)
+    if roll < 0.97:
+        return rng.choice(SQUARES), rng.choice(SQUARES)
+    return rng.choice(SQUARES), rng.choice(OFF_BOARD)
+
+
+def random_case(rng, plies=60, max_pieces=6):
+    """
+    Takes a random.Random object, the most moves to make and the most pieces other than the kings as parameters.
+    Returns a case as a dictionary of a "pieces" and "turn" position (the starting setup a third of the time)
+    and the "attempts" to make from it, legal or not, played out on a ChessVar object until it has made that
+    many moves or the game is over, with one more attempt after that.
+    """
+    if rng.random() < 1 / 3:
+        game = ChessVar()
+        pieces = {location: (color, name) for color in COLORS for location, name in game.get_pieces(color).items()}
+        turn = 'white'
+    else:
+        pieces, turn = random_position(rng, max_pieces)
+        game = ChessVar.from_pieces(pieces, turn)
+    attempts = []
+    made = 0
+    while made < plies and len(attempts) < 4 * plies:
+        move = random_attempt(game, rng)
+        attempts.append(move)
+        if game.get_game_state() != 'UNFINISHED':
+            break
+        try:
+            made += game.make_move(*move)
+        except KeyError:
+            pass
+    return {"pieces": pieces, "turn": turn, "attempts": attempts}
+
+
+def run_case(case, backends, timings=None):
+    """
+    Takes a case, a list of backends (the first being the one the others are compared with) and optionally
+    a dictionary to add the seconds each backend spends making moves to, by name, as parameters.
+    Makes the case's attempts on every backend side by side, comparing whether each move is made and the
+    position after it.
+    Returns None if every backend agrees, or a dictionary of the number of the first attempt they disagree
+    on and each backend's (made, position) result for it.
+    """
+    games = [backend.new_game(dict(case["pieces"]), case["turn"]) for backend in backends]
+    for number, (current, next) in enumerate(case["attempts"]):
+        results = []
+        for backend, game in zip(backends, games):
+            start = time.perf_counter()
+            made = backend.make_move(game, current, next)
+            if timings is not None:
+                timings[backend.name] = timings.get(backend.name, 0.0) + time.perf_counter() - start
+            results.append((made, backend.position(game)))
+        if any(result != results[0] for result in results[1:]):
+            return {"attempt": number, "results": {backend.name: result for backend, result in zip(backends, results)}}
+    return None
+
+
+def shrink_case(case, backends):
+    """
+    Takes a case the backends disagree on and the list of backends as parameters.
+    Returns the smallest case found that they still disagree on: the attempts after the first disagreement
+    are cut off, then each attempt and each piece other than the kings is left out in turn while the
+    backends still disagree, until nothing more can be left out.
+    """
+    divergence = run_case(case, backends)
+    case = dict(case, attempts=case["attempts"][:divergence["attempt"] + 1])
+    shrunk = True
+    while shrunk:
+        shrunk = False
+        for number in range(len(case["attempts"]) - 1, -1, -1):
+            smaller = dict(case, attempts=case["attempts"][:number] + case["attempts"][number + 1:])
+            divergence = run_case(smaller, backends)
+            if divergence is not None:
+                case = dict(smaller, attempts=smaller["attempts"][:divergence["attempt"] + 1])
+                shrunk = True
+                break
+        for location, piece in list(case["pieces"].items()):
+            if piece[1] == 'king':
+                continue
+            smaller = dict(case, pieces={square: other for square, other in case["pieces"].items() if square != location})
+            divergence = run_case(smaller, backends)
+            if divergence is not None:
+                case = dict(smaller, attempts=smaller["attempts"][:divergence["attempt"] + 1])
+                shrunk = True
+    return case
+
+
+def reproducer(case, backends):
+    """
+    Takes a case the backends disagree on and the list of backends as parameters.
+    Returns a dictionary of its starting position as FEN, its moves as "a2a4" strings and what each
+    backend made of the last move: whether it was made and the game status and turn after it.
+    """
+    divergence = run_case(case, backends)
+    fen = ChessVar.from_pieces(case["pieces"], case["turn"]).to_fen()
+    return {"fen": fen, "moves": [current + next for current, next in case["attempts"]],
+            "results": {name: {"made": made, "status": position[2], "turn": position[1]}
+                        for name, (made, position) in divergence["results"].items()}}
+
+
+def fuzz(backends=None, cases=100, seed=0, plies=60, max_pieces=6, max_divergences=5):
+    """
+    Takes a list of backends to compare with the reference (every one in BACKENDS by default), the number of
+    random cases to run, a random seed, the most moves made per case, the most pieces other than the kings
+    and the most divergences to shrink and report as parameters.
+    Runs every case on the reference and the backends side by side.
+    Returns a dictionary of the cases and attempts run, the shrunk reproducer of each divergence found, and for
+    each backend the seconds spent making moves and its speed relative to the reference (2.0 is twice as fast).
+    """
+    backends = [ReferenceBackend()] + (default_backends() if backends is None else list(backends))
+    rng = random.Random(seed)
+    timings = {backend.name: 0.0 for backend in backends}
+    report = {"cases": 0, "attempts": 0, "divergences": []}
+    for _ in range(cases):
+        case = random_case(rng, plies, max_pieces)
+        report["cases"] += 1
+        report["attempts"] += len(case["attempts"])
+        if run_case(case, backends, timings) is not None and len(report["divergences"]) < max_divergences:
+            report["divergences"].append(reproducer(shrink_case(case, backends), backends))
+    report["seconds"] = timings
+    report["relative_speed"] = {name: timings["reference"] / seconds if seconds else None
+                                for name, seconds in timings.items()}
+    return report
+
+
+def main(argv=None):
+    """
+    Takes a list of command line arguments (sys.argv by default) as a parameter.
+    Fuzzes the backends against the reference and prints the report as JSON.
+    Returns the exit status: 1 if any backend disagreed with the reference, 0 otherwise.
+    """
+    parser = argparse.ArgumentParser(description="Compare ChessVar backends against the reference rules.")
+    parser.add_argument("--backends", nargs="+", choices=sorted(BACKENDS), help="every available backend by default")
+    parser.add_argument("--cases", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--plies", type=int, default=60, help="the most moves made per case")
+    parser.add_argument("--max-pieces", type=int, default=6, help="the most pieces besides the kings in random positions")
+    args = parser.parse_args(argv)
+    backends = None if args.backends is None else [BACKENDS[name]() for name in args.backends]
+    report = fuzz(backends, args.cases, args.seed, args.plies, args.max_pieces)
+    print(json.dumps(report, indent=2))
+    return 1 if report["divergences"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
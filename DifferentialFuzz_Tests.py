@@ -0,0 +1,66 @@
+import unittest
+from ChessVar import ChessVar
+from DifferentialFuzz import (ReferenceBackend, ChessVarBackend, LegalMovesBackend, fuzz, run_case, shrink_case,
+                              reproducer)
+
+
+class GivesCheckBackend(ChessVarBackend):
+    """ A backend with a bug: it lets a piece move to hit the opponent's king. """
+
+    name = "gives_check"
+
+    def make_move(self, game, current, next):
+        """ Makes the move if make_move would or if its only fault is hitting the king. Returns whether it was made. """
+        if game.check_move(current, next) == 'gives_check' and game.get_piece(next).get_name() != 'king':
+            game.apply_move(current, next)
+            return True
+        return game.make_move(current, next)
+
+
+class TestDifferentialFuzz(unittest.TestCase):
+    """ Contains unit tests for the DifferentialFuzz module. """
+    def test_1(self):
+        """ Tests every backend agrees with the reference and its speed is reported. """
+        report = fuzz(cases=6, seed=1, plies=30)
+        self.assertEqual(report["cases"], 6)
+        self.assertEqual(report["divergences"], [])
+        self.assertEqual(report["relative_speed"]["reference"], 1.0)
+        self.assertGreater(report["relative_speed"]["chessvar"], 1.0)
+        self.assertIn("legal_moves", report["seconds"])
+
+    def test_2(self):
+        """ Tests the edge cases of the rules give the same results as the reference. """
+        backends = [ReferenceBackend(), ChessVarBackend(), LegalMovesBackend()]
+        # black's king reaching the 8th row right after white's ties the game, and not reaching it loses
+        for move, status in (("g7g8", 'TIE'), ("g7g6", 'WHITE_WON')):
+            case = {"pieces": {"a8": ('white', 'king'), "g7": ('black', 'king')}, "turn": 'black',
+                    "attempts": [(move[:2], move[2:])]}
+            self.assertEqual(run_case(case, backends), None)
+            game = ChessVar.from_pieces(case["pieces"], 'black')
+            game.make_move(move[:2], move[2:])
+            self.assertEqual(game.get_game_state(), status)
+        # landing on a king, hitting it and locations off the board are all refused
+        case = {"pieces": {"a1": ('white', 'king'), "h1": ('black', 'king'), "a2": ('white', 'rook')},
+                "turn": 'white', "attempts": [("a2", "h2"), ("a1", "a0"), ("a2", "a8"), ("a8", "h8")]}
+        self.assertEqual(run_case(case, backends), None)
+
+    def test_3(self):
+        """ Tests a backend that breaks a rule is caught and the case shrunk to a small reproducer. """
+        backends = [ReferenceBackend(), GivesCheckBackend()]
+        report = fuzz([GivesCheckBackend()], cases=10, seed=2, plies=30, max_divergences=1)
+        self.assertEqual(len(report["divergences"]), 1)
+        found = report["divergences"][0]
+        self.assertEqual(found["results"]["reference"]["made"], False)
+        self.assertEqual(found["results"]["gives_check"]["made"], True)
+
+        case = {"pieces": {"a1": ('white', 'king'), "h1": ('black', 'king'), "a2": ('white', 'rook'),
+                           "c1": ('white', 'knight'), "f1": ('black', 'knight')},
+                "turn": 'white', "attempts": [("c1", "d3"), ("f1", "e3"), ("a2", "h2"), ("d3", "e5")]}
+        smallest = shrink_case(case, backends)
+        self.assertEqual(smallest["attempts"], [("a2", "h2")])
+        self.assertEqual(set(smallest["pieces"]), {"a1", "h1", "a2"})
+        self.assertEqual(reproducer(smallest, backends)["moves"], ["a2h2"])
+
+
+if __name__ == '__main__':
+    unittest.main()
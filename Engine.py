@@ -0,0 +1,297 @@
+import time
+
+from ChessVar import TranspositionTable
+
+
+# score for a won game; wins found sooner score higher
+WIN_SCORE = 100000
+# scores at least this far from WIN_SCORE are forced wins or losses
+WIN_THRESHOLD = WIN_SCORE - 1000
+# score for each move a king is closer to the 8th row than the other king
+RANK_SCORE = 100
+# the moves added to the rows still to go of a king with no path to the 8th row through squares
+# the opponent does not hit, since the opponent has to be moved out of the way first
+BLOCKED_MOVES = 2
+# score for each piece still on the board
+PIECE_SCORES = {'king': 0, 'rook': 50, 'bishop': 30, 'knight': 30}
+# deepest iteration tried when no depth is given
+MAX_DEPTH = 64
+
+
+class SearchTimeout(Exception):
+    """
+    Raised inside the search when its time budget runs out.
+    """
+    pass
+
+
+def evaluate(game):
+    """
+    Takes a ChessVar object as a parameter.
+    Returns the score of the position for the player whose turn it is, rewarding king progress first
+    (the moves each king needs to reach the 8th row around the squares the opponent hits) and pieces
+    still on the board second.
+    """
+    status = game.get_game_state()
+    turn = game.get_turn()
+    if status == 'TIE':
+        return 0
+    if status != 'UNFINISHED':
+        return WIN_SCORE if status == turn.upper() + '_WON' else -WIN_SCORE
+
+    score = 0
+    for color, sign in (('white', 1), ('black', -1)):
+        distance = game.race_distance(color)
+        if distance is None:
+            distance = 8 - int(game.get_king_location(color)[1]) + BLOCKED_MOVES
+        score -= sign * RANK_SCORE * distance
+        for name in game.get_pieces(color).values():
+            score += sign * PIECE_SCORES[name]
+    return score if turn == 'white' else -score
+
+
+def order_moves(game, moves, first=None):
+    """
+    Takes a ChessVar object, a list of its legal moves and an optional move to try first as parameters.
+    Returns the moves sorted so the first move comes first, then captures (most valuable piece first),
+    then king moves up the board, then everything else.
+    """
+    turn = game.get_turn()
+
+    def priority(move):
+        current, next = move
+        if move == first:
+            return 0
+        captured = game.get_piece(next)
+        if captured.get_color() not in (turn, 'none'):
+            return 1000 - PIECE_SCORES[captured.get_name()]
+        if game.get_piece(current).get_name() == 'king' and next[1] > current[1]:
+            return 2000
+        return 3000
+
+    return sorted(moves, key=priority)
+
+
+def tablebase_score(entry, ply):
+    """
+    Takes a (result, plies) entry from Tablebase.probe and the ply the search is at as parameters.
+    Returns the entry as a search score for the player whose turn it is, on the same scale as finished games.
+    """
+    result, plies = entry
+    if result == 'WIN':
+        return WIN_SCORE - ply - plies
+    if result == 'LOSS':
+        return ply + plies - WIN_SCORE
+    return 0
+
+
+def table_score(score, ply):
+    """
+    Takes a search score and the ply it was found at as parameters.
+    Returns the score as kept in the transposition table, with a win or loss counted from the position
+    itself rather than from the root, so it holds wherever the position is reached again.
+    """
+    if score >= WIN_THRESHOLD:
+        return score + ply
+    if score <= -WIN_THRESHOLD:
+        return score - ply
+    return score
+
+
+def search_score(score, ply):
+    """
+    Takes a score kept in the transposition table and the ply the search is at as parameters.
+    Returns the score counted from the root again, undoing table_score.
+    """
+    if score >= WIN_THRESHOLD:
+        return score - ply
+    if score <= -WIN_THRESHOLD:
+        return score + ply
+    return score
+
+
+class Search:
+    """
+    A class that represents one alpha-beta search over a ChessVar game.
+    """
+
+    def __init__(self, game, deadline=None, table=None, tablebase=None):
+        """
+        Creates Search object for a game with an optional deadline (a time.perf_counter value),
+        transposition table and Tablebase to look endgame positions up in. Initializes the node count to 0.
+        """
+        self._game = game
+        self._deadline = deadline
+        self._table = table if table is not None else TranspositionTable()
+        self._tablebase = tablebase
+        self._nodes = 0
+
+    def get_nodes(self):
+        """ Returns the number of positions searched so far. """
+        return self._nodes
+
+    def _terminal_score(self, ply):
+        """
+        Takes the ply the search is at as a parameter.
+        Returns the score of a finished game for the player whose turn it is, preferring faster wins.
+        """
+        status = self._game.get_game_state()
+        if status == 'TIE':
+            return 0
+        if status == self._game.get_turn().upper() + '_WON':
+            return WIN_SCORE - ply
+        return ply - WIN_SCORE
+
+    def negamax(self, depth, alpha, beta, ply):
+        """
+        Takes the remaining depth, the alpha-beta window and the ply from the root as parameters.
+        Returns the score of the position for the player whose turn it is.
+        Raises SearchTimeout if the deadline passes.
+        """
+        game = self._game
+        self._nodes += 1
+        if self._deadline is not None and time.perf_counter() >= self._deadline:
+            raise SearchTimeout()
+
+        if game.get_game_state() != 'UNFINISHED':
+            return self._terminal_score(ply)
+        # an endgame in the tablebase has its exact score without searching it
+        if self._tablebase is not None:
+            entry = self._tablebase.probe(game)
+            if entry is not None:
+                return tablebase_score(entry, ply)
+        # stuck: scored as a draw
+        if next(game.iter_legal_moves(), None) is None:
+            return 0
+        # a race one king is sure to win needs no more searching
+        decided = game.race_decided()
+        if decided is not None:
+            winner, plies = decided
+            return WIN_SCORE - ply - plies if winner == game.get_turn() else ply + plies - WIN_SCORE
+        if depth == 0:
+            return evaluate(game)
+
+        # use a stored result for this position if it was searched deep enough
+        key = game.get_hash()
+        entry = self._table.probe(key)
+        first = None
+        if entry is not None:
+            entry_depth, value, bound, first = entry
+            value = search_score(value, ply)
+            if entry_depth >= depth:
+                if bound == 'EXACT':
+                    return value
+                if bound == 'LOWER' and value >= beta:
+                    return value
+                if bound == 'UPPER' and value <= alpha:
+                    return value
+
+        moves = game.legal_moves()
+        original_alpha = alpha
+        best_score = -WIN_SCORE - 1
+        best = None
+        for move in order_moves(game, moves, first):
+            game._try_move(*move)
+            try:
+                score = -self.negamax(depth - 1, -beta, -alpha, ply + 1)
+            finally:
+                game._take_back()
+            if score > best_score:
+                best_score, best = score, move
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                break
+
+        if best_score <= original_alpha:
+            bound = 'UPPER'
+        elif best_score >= beta:
+            bound = 'LOWER'
+        else:
+            bound = 'EXACT'
+        self._table.store(key, depth, table_score(best_score, ply), bound, best)
+        return best_score
+
+    def search_root(self, depth, moves, first=None):
+        """
+        Takes a depth, the legal moves to search and an optional move to try first as parameters.
+        Returns the best (move, score) found searching those moves to that depth,
+        or (None, 0) if there are no moves.
+        """
+        game = self._game
+        best, best_score = None, -WIN_SCORE - 1
+        alpha, beta = -WIN_SCORE - 1, WIN_SCORE + 1
+        for move in order_moves(game, moves, first):
+            game._try_move(*move)
+            try:
+                score = -self.negamax(depth - 1, -beta, -alpha, 1)
+            finally:
+                game._take_back()
+            if score > best_score:
+                best, best_score = move, score
+            if score > alpha:
+                alpha = score
+        if best is None:
+            return None, 0
+        # only a search of every move gives the position's true score
+        if len(moves) == len(game.legal_moves()):
+            self._table.store(game.get_hash(), depth, best_score, 'EXACT', best)
+        return best, best_score
+
+
+def search(game, time_limit=1.0, depth=None, table=None, moves=None, tablebase=None):
+    """
+    Takes a ChessVar object, a time limit in seconds (or None), a maximum depth (or None),
+    an optional transposition table, an optional list of the legal moves to choose from
+    (every legal move by default) and an optional Tablebase as parameters. At least one limit must be given.
+    If the position is in the tablebase, its best move is looked up instead of searched for.
+    Otherwise searches one ply deeper at a time until a limit is reached or the result is decided.
+    Returns a dictionary with the best move, its score, the depth completed, the nodes searched,
+    the (depth, move, score) result of every completed iteration and whether the tablebase gave the move.
+    The game is left as it was found.
+    """
+    if time_limit is None and depth is None:
+        raise ValueError("search needs a time_limit or a depth")
+    result = {"move": None, "score": 0, "depth": 0, "nodes": 0, "iterations": [], "tablebase": False}
+    if tablebase is not None and moves is None:
+        found = tablebase.best_move(game)
+        if found is not None:
+            move, *entry = found
+            result.update(move=move, score=tablebase_score(entry, 0), tablebase=True)
+            return result
+
+    deadline = None if time_limit is None else time.perf_counter() + time_limit
+    if table is None:
+        table = TranspositionTable()
+    table.new_search()
+    searcher = Search(game, deadline, table, tablebase)
+
+    if moves is None:
+        moves = game.legal_moves()
+    if moves:
+        # fall back to the best ordered move if not even one ply can be searched in time
+        result["move"] = order_moves(game, moves)[0]
+    max_depth = MAX_DEPTH if depth is None else depth
+    for current_depth in range(1, max_depth + 1):
+        if not moves:
+            break
+        try:
+            move, score = searcher.search_root(current_depth, moves, result["move"])
+        except SearchTimeout:
+            break
+        result.update(move=move, score=score, depth=current_depth)
+        result["iterations"].append((current_depth, move, score))
+        # stop once the race is decided either way
+        if abs(score) >= WIN_THRESHOLD:
+            break
+    result["nodes"] = searcher.get_nodes()
+    return result
+
+
+def best_move(game, time_limit=1.0, depth=None, table=None, tablebase=None):
+    """
+    Takes a ChessVar object, a time limit in seconds (or None), a maximum depth (or None),
+    an optional transposition table and an optional Tablebase as parameters.
+    Returns the best (current, next) move found, or None if the player has no legal moves.
+    """
+    return search(game, time_limit, depth, table, tablebase=tablebase)["move"]
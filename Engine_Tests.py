@@ -0,0 +1,107 @@
+import time
+import unittest
+from ChessVar import ChessVar, TranspositionTable
+from Perft import perft
+from Engine import WIN_SCORE, WIN_THRESHOLD, Search, evaluate, search, best_move, table_score, search_score
+
+
+# white's king reaches a7 while black's king is back on h6
+WHITE_TO_WIN = [("a2", "a8"), ("h2", "h8"), ("a1", "a2"), ("h1", "h2"), ("a2", "a3"), ("h2", "h3"),
+                ("a3", "a4"), ("h3", "h4"), ("a4", "a5"), ("h4", "h5"), ("a5", "a6"), ("h5", "h6"),
+                ("a6", "a7"), ("h8", "g8"), ("b2", "c3"), ("g8", "g4")]
+
+# white's king reaches a8 while black's king is on g7, with black to move
+BLACK_TO_TIE = [("a2", "a4"), ("g2", "a8"), ("a1", "a2"), ("h2", "h4"), ("a2", "a3"), ("a8", "b7"),
+                ("a4", "b4"), ("h1", "h2"), ("a3", "a4"), ("b7", "c8"), ("a4", "a5"), ("h2", "g3"),
+                ("b4", "b5"), ("g3", "g4"), ("b5", "b3"), ("g4", "g5"), ("b2", "a1"), ("c8", "h3"),
+                ("a5", "a6"), ("g5", "g6"), ("b3", "b2"), ("g1", "h2"), ("a6", "a7"), ("g6", "g7"),
+                ("a7", "a8")]
+
+
+def play(moves):
+    """ Takes a list of moves. Returns a ChessVar object with the moves played. """
+    game = ChessVar()
+    for current, next in moves:
+        assert game.make_move(current, next), (current, next)
+    return game
+
+
+class TestEngine(unittest.TestCase):
+    """ Contains unit tests for the Engine module. """
+    def test_1(self):
+        """ Tests the evaluation rewards king rank progress. """
+        game = ChessVar()
+        self.assertEqual(evaluate(game), 0)                                 # even starting setup
+        game = play([("a2", "a3"), ("h2", "h3"), ("a1", "a2")])
+        self.assertLess(evaluate(game), 0)                                  # black to move, behind a rank
+        game.make_move("h3", "h4")
+        self.assertGreater(evaluate(game), 0)                               # white to move, ahead a rank
+
+    def test_2(self):
+        """ Tests white finds the winning king move. """
+        game = play(WHITE_TO_WIN)
+        result = search(game, time_limit=None, depth=2)
+        self.assertEqual(result["move"], ("a7", "b8"))
+        self.assertGreaterEqual(result["score"], WIN_THRESHOLD)
+
+    def test_3(self):
+        """ Tests black takes the tie when white has reached the 8th row. """
+        game = play(BLACK_TO_TIE)
+        move = best_move(game, time_limit=None, depth=2)
+        self.assertEqual(move[0], "g7")
+        self.assertEqual(move[1][1], "8")
+        self.assertEqual(game.make_move(*move), True)
+        self.assertEqual(game.get_game_state(), 'TIE')
+
+    def test_4(self):
+        """ Tests the search keeps to its time limit and leaves the game as it was. """
+        game = ChessVar()
+        start_hash = game.get_hash()
+        start = time.perf_counter()
+        result = search(game, time_limit=0.2)
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertIn(result["move"], game.legal_moves())
+        self.assertGreaterEqual(result["depth"], 1)
+        self.assertEqual(game.get_hash(), start_hash)
+        self.assertEqual(game.undo_move(), False)                           # no moves left behind
+
+    def test_5(self):
+        """ Tests there is no move once the game is over. """
+        game = play(WHITE_TO_WIN + [("a7", "b8"), ("h6", "h7")])
+        self.assertEqual(game.get_game_state(), 'WHITE_WON')
+        self.assertEqual(best_move(game, time_limit=0.1), None)
+        self.assertRaises(ValueError, search, game, None, None)
+
+    def test_6(self):
+        """ Tests a race that is already decided is scored without searching it. """
+        game = ChessVar.from_fen("8/8/8/8/1K6/2R5/6k1/7N w UNFINISHED")
+        result = search(game, time_limit=None, depth=6)
+        self.assertEqual(result["score"], WIN_SCORE - 8)                    # home in 4 moves, before black
+        self.assertLess(result["nodes"], 100)
+        # white's king has no moves, so black's faster king can never win the game
+        result = search(ChessVar.from_fen("8/8/8/1r6/8/k7/8/K7 w"), time_limit=None, depth=4)
+        self.assertEqual(result["move"], None)
+        self.assertEqual(result["score"], 0)
+
+    def test_7(self):
+        """ Tests searching a game between an undo and a redo leaves the move to redo alone. """
+        game = play([("a2", "a3"), ("h2", "h3")])
+        game.undo_move()
+        best_move(game, time_limit=None, depth=2)
+        self.assertEqual(perft(game, 2), perft(play([("a2", "a3")]), 2))
+        self.assertEqual(game.get_redo_moves(), [("h2", "h3")])
+        self.assertEqual(game.redo_move(), True)
+        self.assertEqual(game.get_moves(), [("a2", "a3"), ("h2", "h3")])
+
+    def test_8(self):
+        """ Tests a win kept in the transposition table is scored by how far it is from where it is reached. """
+        self.assertEqual(table_score(WIN_SCORE - 7, 3), WIN_SCORE - 4)
+        self.assertEqual(search_score(table_score(7 - WIN_SCORE, 3), 5), 9 - WIN_SCORE)
+        self.assertEqual(table_score(250, 3), 250)
+        game = ChessVar.from_fen("8/8/7K/6n1/8/8/5b2/6k1 w UNFINISHED")
+        window = (-WIN_SCORE - 1, WIN_SCORE + 1)
+        searcher = Search(game, table=TranspositionTable())
+        self.assertEqual(searcher.negamax(3, *window, 0), WIN_SCORE - 4)
+        # the same position reached 3 plies from the root is 3 plies further from the win
+        self.assertEqual(searcher.negamax(3, *window, 3), WIN_SCORE - 7)
+        self.assertEqual(Search(game).negamax(3, *window, 3), WIN_SCORE - 7)
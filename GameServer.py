@@ -0,0 +1,357 @@
+import argparse
+import asyncio
+import collections
+import concurrent.futures
+import itertools
+import json
+import sys
+
+from ChessVar import ChessVar, MoveCache
+from ReplayValidator import parse_move
+import Engine
+
+
+# the most requests for one game handled before letting other games run
+MAX_BATCH = 64
+
+
+def engine_move(record, time_limit, depth):
+    """
+    Takes a ChessVar record, a time limit in seconds (or None) and a maximum depth (or None) as parameters.
+    Runs in an executor, so only the position is passed in rather than the game.
+    Returns the engine's best move for the position as a "a2a4" string, or None if there are no legal moves.
+    """
+    move = Engine.best_move(ChessVar.from_record(record), time_limit, depth)
+    return None if move is None else move[0] + move[1]
+
+
+class HostedGame:
+    """
+    A class that represents one game held by a GameServer, with the requests for it waiting to be handled.
+    """
+
+    __slots__ = ('_game_id', '_game', '_pending', '_draining')
+
+    def __init__(self, game_id, game):
+        """
+        Creates HostedGame object for a game id and ChessVar object with no requests waiting.
+        """
+        self._game_id = game_id
+        self._game = game
+        self._pending = collections.deque()  # (request, future) pairs in the order they arrived
+        self._draining = False  # whether a task is handling this game's requests
+
+    def get_game_id(self):
+        """ Returns the game id. """
+        return self._game_id
+
+    def get_game(self):
+        """ Returns the ChessVar object. """
+        return self._game
+
+    def push(self, request, future):
+        """
+        Takes a request and the future to answer it through as parameters.
+        Adds the request to the end of the waiting requests.
+        Returns True if no task is handling the game's requests, in which case the caller must start one.
+        """
+        self._pending.append((request, future))
+        if self._draining:
+            return False
+        self._draining = True
+        return True
+
+    def take_batch(self, size):
+        """
+        Takes the most requests to take as a parameter.
+        Returns a list of up to that many of the oldest waiting (request, future) pairs, removing them.
+        Once none are waiting, returns an empty list and marks the game as not being handled.
+        """
+        batch = [self._pending.popleft() for _ in range(min(size, len(self._pending)))]
+        if not batch:
+            self._draining = False
+        return batch
+
+
+class GameServer:
+    """
+    A class that represents a host for many ChessVar games, each known by a game id, taking requests
+    as JSON objects (one per line over a socket). Each game's requests are handled in the order they
+    arrive by one task at a time, so games need no locks and never wait on each other, and requests
+    that pile up for a game are handled together. Engine moves run in an executor.
+    """
+
+    def __init__(self, executor=None, cache_size=4096, search_time=0.5, search_depth=None, repetition_limit=3):
+        """
+        Creates GameServer object with no games. Takes the executor to run engine moves in (a process pool
+        made on first use by default), the number of positions in the MoveCache the games share, the
+        engine's time limit in seconds and depth (either may be None, but not both) and the number of
+        times a position may be reached before a game ends in a TIE (None for no limit).
+        """
+        self._games = {}
+        self._ids = itertools.count(1)
+        self._executor = executor
+        self._own_executor = executor is None
+        self._cache = MoveCache(cache_size)
+        self._search_time = search_time
+        self._search_depth = search_depth
+        self._repetition_limit = repetition_limit
+        self._tasks = set()  # running tasks, kept so they are not garbage collected
+        self._stats = collections.Counter()
+
+    def get_game(self, game_id):
+        """ Takes a game id. Returns its ChessVar object, or None if there is no such game. """
+        hosted = self._games.get(game_id)
+        return None if hosted is None else hosted.get_game()
+
+    def get_stats(self):
+        """
+        Takes no parameters.
+        Returns a dictionary of the games held, the requests handled, the batches they were handled in,
+        the engine moves made and the MoveCache statistics.
+        """
+        return {"games": len(self._games), "requests": self._stats["requests"], "batches": self._stats["batches"],
+                "engine_moves": self._stats["engine_moves"], "cache": self._cache.get_stats()}
+
+    async def submit(self, request):
+        """
+        Takes a request dictionary with an "op" and its arguments as a parameter.
+        Returns the response dictionary, with the request's "id" if it had one.
+        Requests for a game are answered in the order they were submitted.
+        """
+        op = request.get("op") if isinstance(request, dict) else None
+        if op == "new":
+            response = self._new_game(request)
+        elif op == "stats":
+            response = {"ok": True, "stats": self.get_stats()}
+        elif op in ("move", "engine", "state", "legal", "undo", "redo", "history", "close"):
+            # a game id from JSON may be a list or object, which can't be looked up
+            hosted = self._games.get(request.get("game")) if isinstance(request.get("game"), str) else None
+            if hosted is None:
+                response = {"ok": False, "error": f"unknown game {request.get('game')!r}"}
+            else:
+                future = asyncio.get_running_loop().create_future()
+                if hosted.push(request, future):
+                    self._start(self._drain(hosted))
+                response = await future
+        else:
+            response = {"ok": False, "error": f"unknown op {op!r}"}
+        if isinstance(request, dict) and "id" in request:
+            response["id"] = request["id"]
+        return response
+
+    def _start(self, coroutine):
+        """ Takes a coroutine. Runs it as a task, keeping hold of the task until it finishes. """
+        task = asyncio.get_running_loop().create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _new_game(self, request):
+        """
+        Takes a "new" request, which may name the game and give a "fen" position to start from.
+        Returns the response with the game id.
+        """
+        game_id = request.get("game")
+        if game_id is None:
+            game_id = str(next(self._ids))
+            while game_id in self._games:
+                game_id = str(next(self._ids))
+        elif not isinstance(game_id, str) or game_id in self._games:
+            return {"ok": False, "error": f"game id {game_id!r} is taken or not a string"}
+        fen = request.get("fen")
+        if "fen" in request and not isinstance(fen, str):
+            return {"ok": False, "error": f"fen {fen!r} is not a string"}
+        try:
+            game = ChessVar.from_fen(fen) if "fen" in request else ChessVar()
+        except (ValueError, TypeError) as error:
+            return {"ok": False, "error": str(error)}
+        game.set_move_cache(self._cache)
+        game.set_repetition_limit(self._repetition_limit)
+        self._games[game_id] = HostedGame(game_id, game)
+        return dict(self._describe(game), ok=True, game=game_id)
+
+    def _describe(self, game):
+        """ Takes a ChessVar object. Returns a dictionary of its game state, turn and position. """
+        return {"state": game.get_game_state(), "turn": game.get_turn(), "fen": game.to_fen()}
+
+    async def _drain(self, hosted):
+        """
+        Takes a HostedGame and returns nothing.
+        Handles the game's waiting requests in order, a batch at a time, until none are left.
+        """
+        batch = hosted.take_batch(MAX_BATCH)
+        while batch:
+            self._stats["batches"] += 1
+            for request, future in batch:
+                self._stats["requests"] += 1
+                try:
+                    response = self._handle(hosted, request)
+                    if response.pop("engine", False):
+                        response = await self._engine_reply(hosted, response)
+                except Exception as error:  # an answer goes back whatever went wrong
+                    response = {"ok": False, "error": f"{type(error).__name__}: {error}"}
+                if not future.done():
+                    future.set_result(response)
+            # let other games run between batches
+            await asyncio.sleep(0)
+            batch = hosted.take_batch(MAX_BATCH)
+
+    def _handle(self, hosted, request):
+        """
+        Takes a HostedGame and a request for it as parameters.
+        Carries out the request on the game. Returns the response, marked with "engine" if the
+        engine should move next.
+        """
+        game = hosted.get_game()
+        op = request["op"]
+        # requests that were waiting when the game was closed
+        if self._games.get(hosted.get_game_id()) is not hosted:
+            return {"ok": False, "error": f"unknown game {hosted.get_game_id()!r}"}
+        if op == "move":
+            try:
+                current, next = parse_move(request.get("move"))
+            except ValueError as error:
+                return {"ok": False, "error": str(error)}
+            # make_move looks the move up in the shared MoveCache, so only a refused move is checked again
+            legal = game.make_move(current, next)
+            response = dict(self._describe(game), ok=True, legal=legal)
+            if not legal:
+                response["reason"] = game.check_move(current, next)
+            response["engine"] = legal and bool(request.get("reply")) and game.get_game_state() == 'UNFINISHED'
+            return response
+        if op == "engine":
+            return dict(self._describe(game), ok=True, engine=game.get_game_state() == 'UNFINISHED')
+        if op == "legal":
+            return {"ok": True, "moves": [current + next for current, next in game.legal_moves()]}
+        if op == "undo":
+            undone = game.undo_move()
+            return dict(self._describe(game), ok=undone)
+        if op == "redo":
+            redone = game.redo_move()
+            return dict(self._describe(game), ok=redone)
+        if op == "history":
+            return {"ok": True, "moves": [current + next for current, next in game.get_moves()],
+                    "redo": [current + next for current, next in game.get_redo_moves()]}
+        if op == "close":
+            self._games.pop(hosted.get_game_id(), None)
+            return {"ok": True}
+        return dict(self._describe(game), ok=True)
+
+    async def _engine_reply(self, hosted, response):
+        """
+        Takes a HostedGame and the response so far as parameters.
+        Works out the engine's move in the executor and makes it. Returns the response with the move.
+        The game's later requests wait until this one is done.
+        """
+        if self._executor is None:
+            self._executor = concurrent.futures.ProcessPoolExecutor()
+        game = hosted.get_game()
+        loop = asyncio.get_running_loop()
+        move = await loop.run_in_executor(self._executor, engine_move, game.to_record(),
+                                          self._search_time, self._search_depth)
+        self._stats["engine_moves"] += 1
+        if move is not None:
+            game.make_move(move[:2], move[2:])
+        return dict(response, **self._describe(game), reply=move)
+
+    async def handle_connection(self, reader, writer):
+        """
+        Takes the StreamReader and StreamWriter of a client connection as parameters and returns nothing.
+        Reads one JSON request per line and writes one JSON response per line as each is answered,
+        so responses for different games may come back in a different order than their requests.
+        """
+        pending = set()
+
+        async def answer(request):
+            # a reply goes back whatever went wrong, so the client is never left waiting
+            try:
+                response = await self.submit(request)
+            except Exception as error:
+                response = {"ok": False, "error": f"{type(error).__name__}: {error}"}
+                if isinstance(request, dict) and "id" in request:
+                    response["id"] = request["id"]
+            writer.write(json.dumps(response).encode() + b"\n")
+            await writer.drain()
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                try:
+                    request = json.loads(line)
+                except ValueError as error:
+                    writer.write(json.dumps({"ok": False, "error": str(error)}).encode() + b"\n")
+                    continue
+                task = asyncio.get_running_loop().create_task(answer(request))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            if pending:
+                await asyncio.wait(pending)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host="127.0.0.1", port=0, path=None):
+        """
+        Takes a host and port to listen on, or the path of a Unix socket, as parameters.
+        Starts listening. Returns the asyncio Server object.
+        """
+        if path is not None:
+            return await asyncio.start_unix_server(self.handle_connection, path=path)
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+    def close(self):
+        """
+        Takes no parameters and returns nothing.
+        Shuts down the executor if the server made it.
+        """
+        if self._own_executor and self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+
+async def serve(args):
+    """
+    Takes the parsed command line arguments as a parameter and returns nothing.
+    Runs a GameServer until it is interrupted.
+    """
+    game_server = GameServer(concurrent.futures.ProcessPoolExecutor(args.workers) if args.workers else None,
+                             args.cache_size, args.search_time, args.search_depth, args.repetition_limit or None)
+    server = await game_server.start(args.host, args.port, args.unix)
+    addresses = ", ".join(str(sock.getsockname()) for sock in server.sockets)
+    print(f"serving on {addresses}", file=sys.stderr)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        game_server.close()
+
+
+def main(argv=None):
+    """
+    Takes a list of command line arguments (sys.argv by default) as a parameter.
+    Serves games until interrupted. Returns the exit status.
+    """
+    parser = argparse.ArgumentParser(description="Host ChessVar games over line-delimited JSON.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="listen on this Unix socket path instead of a port")
+    parser.add_argument("--workers", type=int, default=None, help="engine worker processes")
+    parser.add_argument("--cache-size", type=int, default=4096, help="positions kept in the move cache")
+    parser.add_argument("--search-time", type=float, default=0.5)
+    parser.add_argument("--search-depth", type=int, default=None)
+    parser.add_argument("--repetition-limit", type=int, default=3, help="0 never ends a game by repetition")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+import asyncio
+import concurrent.futures
+import json
+import unittest
+from GameServer import GameServer
+from Engine_Tests import WHITE_TO_WIN
+
+
+class TestGameServer(unittest.IsolatedAsyncioTestCase):
+    """ Contains unit tests for GameServer class. """
+    async def asyncSetUp(self):
+        """ Makes a server whose engine moves run in a thread and search one ply. """
+        self._executor = concurrent.futures.ThreadPoolExecutor(1)
+        self._server = GameServer(self._executor, search_time=None, search_depth=1)
+
+    async def asyncTearDown(self):
+        """ Shuts down the engine thread. """
+        self._server.close()
+        self._executor.shutdown()
+
+    async def test_1(self):
+        """ Tests moves sent together for one game are made in order, in batches. """
+        server = self._server
+        response = await server.submit({"op": "new", "game": "race", "id": 7})
+        self.assertEqual((response["ok"], response["game"], response["id"]), (True, "race", 7))
+        moves = [{"op": "move", "game": "race", "move": current + next} for current, next in WHITE_TO_WIN]
+        responses = await asyncio.gather(*(server.submit(request) for request in moves))
+        self.assertEqual([response["legal"] for response in responses], [True] * len(WHITE_TO_WIN))
+        self.assertEqual(responses[-1]["turn"], 'white')
+        self.assertEqual(server.get_stats()["batches"], 1)
+        self.assertEqual((await server.submit({"op": "move", "game": "race", "move": "a7a8"}))["legal"], False)
+        response = await server.submit({"op": "move", "game": "race", "move": "a7z9"})
+        self.assertEqual((response["legal"], response["reason"]), (False, 'bad_location'))
+        self.assertEqual((await server.submit({"op": "move", "game": "race", "move": 5}))["ok"], False)
+        self.assertEqual((await server.submit({"op": "move", "game": "other", "move": "a2a3"}))["ok"], False)
+        self.assertEqual((await server.submit({"op": "new", "fen": 5}))["ok"], False)
+        self.assertEqual((await server.submit({"op": "move", "game": [1], "move": "a2a3"}))["ok"], False)
+
+    async def test_2(self):
+        """ Tests the engine replies to a move and games do not share positions. """
+        server = self._server
+        first = (await server.submit({"op": "new"}))["game"]
+        second = (await server.submit({"op": "new"}))["game"]
+        self.assertNotEqual(first, second)
+        response = await server.submit({"op": "move", "game": first, "move": ["a2", "a3"], "reply": True})
+        self.assertEqual(response["turn"], 'white')
+        self.assertEqual(len(response["reply"]), 4)
+        self.assertEqual(server.get_game(second).get_turn(), 'white')
+        self.assertEqual((await server.submit({"op": "undo", "game": first}))["turn"], 'black')
+        self.assertEqual((await server.submit({"op": "history", "game": first}))["moves"], ["a2a3"])
+        self.assertEqual((await server.submit({"op": "redo", "game": first}))["turn"], 'white')
+        self.assertEqual((await server.submit({"op": "close", "game": first}))["ok"], True)
+        self.assertEqual(server.get_stats()["games"], 1)
+
+    async def test_3(self):
+        """ Tests requests and responses over a socket, one JSON object per line. """
+        listener = await self._server.start(port=0)
+        host, port = listener.sockets[0].getsockname()[:2]
+        reader, writer = await asyncio.open_connection(host, port)
+        for request in ({"op": "new", "game": "g", "id": 1}, {"op": "legal", "game": "g", "id": 2}, "not json"):
+            writer.write((json.dumps(request) if isinstance(request, dict) else request).encode() + b"\n")
+        responses = [json.loads(await reader.readline()) for _ in range(3)]
+        writer.close()
+        await writer.wait_closed()
+        listener.close()
+        await listener.wait_closed()
+        by_id = {response.get("id"): response for response in responses}
+        self.assertEqual(by_id[1]["fen"], "8/8/8/8/8/8/RBN2nbr/KBN2nbk w UNFINISHED")
+        self.assertEqual(len(by_id[2]["moves"]), 21)
+        self.assertEqual(by_id[None]["ok"], False)
+
+    async def test_4(self):
+        """ Tests a game ends in a TIE once a position is reached a third time. """
+        server = self._server
+        await server.submit({"op": "new", "game": "loop"})
+        for move in ["c2e3", "f2g4", "e3c2", "g4f2"] * 2:
+            response = await server.submit({"op": "move", "game": "loop", "move": move})
+        self.assertEqual(response["state"], 'TIE')
+
+    async def test_5(self):
+        """ Tests games playing the same moves look them up in the shared move cache. """
+        server = self._server
+        for game in ("one", "two", "three"):
+            await server.submit({"op": "new", "game": game})
+            for move in ("a2a3", "h2h3", "a1a2"):
+                self.assertEqual((await server.submit({"op": "move", "game": game, "move": move}))["legal"], True)
+        cache = server.get_stats()["cache"]
+        self.assertEqual((cache["hits"], cache["misses"]), (6, 3))
+
+    async def test_6(self):
+        """ Tests every request sent over a socket is answered, even one the server fails on. """
+        listener = await self._server.start(port=0)
+        host, port = listener.sockets[0].getsockname()[:2]
+        reader, writer = await asyncio.open_connection(host, port)
+        for request in ({"op": "new", "fen": 5, "id": 1}, {"op": "move", "game": [1], "move": "a2a3", "id": 2}):
+            writer.write(json.dumps(request).encode() + b"\n")
+        responses = [json.loads(await reader.readline()) for _ in range(2)]
+
+        async def fail(request):
+            raise RuntimeError("broken")
+        self._server.submit = fail
+        writer.write(json.dumps({"op": "stats", "id": 3}).encode() + b"\n")
+        responses.append(json.loads(await reader.readline()))
+        writer.close()
+        await writer.wait_closed()
+        listener.close()
+        await listener.wait_closed()
+        self.assertEqual(sorted(response["id"] for response in responses), [1, 2, 3])
+        self.assertEqual([response["ok"] for response in responses], [False] * 3)
+        self.assertEqual(responses[2]["error"], "RuntimeError: broken")
+
+
+if __name__ == '__main__':
+    unittest.main()
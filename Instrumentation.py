@@ -0,0 +1,217 @@
+import collections
+import functools
+import json
+import logging
+import threading
+import time
+
+from ChessVar import ChessVar, REJECTION_REASONS  # the reasons are kept importable from here too
+
+
+# the ChessVar methods counted and timed by default: making and checking moves, and the steps of
+# check_move's last stage, the checks on both kings, which is where its time goes
+METHODS = ('make_move', 'check_move', 'apply_move', '_gives_check', '_build_attack_maps', '_checkers', '_pins',
+           '_exposes_king')
+# the stages of check_move, cheapest first, with the reasons each one refuses moves for
+CHECK_STAGES = (('locations', ('game_over', 'bad_location')), ('pieces', ('no_piece', 'wrong_color', 'own_piece')),
+                ('path', ('bad_path', 'blocked_path')), ('kings', ('gives_check', 'self_check')))
+# the number of stages a check_move result shows were gone through, by reason (None for a legal move)
+STAGES_REACHED = {reason: number for number, (_, reasons) in enumerate(CHECK_STAGES, start=1) for reason in reasons}
+STAGES_REACHED[None] = len(CHECK_STAGES)
+
+logger = logging.getLogger("ChessVar.instrumentation")
+
+
+def rejection_reason(game, current, next, methods=None):
+    """
+    Takes a ChessVar object, a current and next location make_move refused, and optionally a dictionary
+    of the ChessVar methods to call (so instrumented ones can be bypassed) as parameters.
+    Returns the one of REJECTION_REASONS check_move gives for the move, or None if the move is legal.
+    """
+    methods = methods or vars(ChessVar)
+    return methods['check_move'](game, current, next)
+
+
+class Instrumentation:
+    """
+    A class that represents counts and timings of ChessVar method calls, how far check_move got through
+    its stages and the reasons make_move refused moves. The methods are only wrapped while it is enabled,
+    so ChessVar runs at full speed otherwise. Only one Instrumentation object can be enabled at a time,
+    and it counts calls from every game and thread.
+    """
+
+    _enabled = None  # the Instrumentation object whose wrappers are in place, if any
+
+    def __init__(self, methods=METHODS, clock=time.perf_counter):
+        """
+        Creates Instrumentation object for the names of the ChessVar methods to count and time,
+        using the clock given, with every count at 0. It starts disabled.
+        """
+        self._methods = tuple(methods)
+        self._clock = clock
+        self._originals = {}
+        self._calls = collections.Counter()
+        self._seconds = collections.Counter()
+        self._rejections = collections.Counter()
+        self._stages = collections.Counter()  # (stage name, "reached" or "refused") pairs
+        self._last = threading.local()  # the reason of the last check_move call in each thread
+        self._log_stop = None
+
+    def is_enabled(self):
+        """ Returns True if the ChessVar methods are being counted and timed. """
+        return Instrumentation._enabled is self
+
+    def enable(self):
+        """
+        Takes no parameters and returns nothing.
+        Puts counting and timing wrappers around the ChessVar methods.
+        Raises RuntimeError if another Instrumentation object is enabled.
+        """
+        if Instrumentation._enabled is self:
+            return
+        if Instrumentation._enabled is not None:
+            raise RuntimeError("another Instrumentation object is already enabled")
+        self._originals = {name: vars(ChessVar)[name] for name in self._methods}
+        for name, method in self._originals.items():
+            setattr(ChessVar, name, self._wrap(name, method))
+        Instrumentation._enabled = self
+
+    def disable(self):
+        """
+        Takes no parameters and returns nothing.
+        Puts the ChessVar methods back as they were. The counts are kept.
+        """
+        if Instrumentation._enabled is not self:
+            return
+        for name, method in self._originals.items():
+            setattr(ChessVar, name, method)
+        Instrumentation._enabled = None
+
+    def _wrap(self, name, method):
+        """
+        Takes a method name and the method as parameters.
+        Returns a function that calls the method, counting and timing the call. For check_move it also
+        counts the stages the move went through, and for make_move it records why a move was refused.
+        """
+        calls, seconds, clock = self._calls, self._seconds, self._clock
+
+        if name == 'check_move':
+            stages, last = self._stages, self._last
+
+            @functools.wraps(method)
+            def check_move(game, current, next):
+                start = clock()
+                try:
+                    reason = method(game, current, next)
+                finally:
+                    calls[name] += 1
+                    seconds[name] += clock() - start
+                reached = STAGES_REACHED[reason]
+                for stage, _ in CHECK_STAGES[:reached]:
+                    stages[stage, "reached"] += 1
+                if reason is not None:
+                    stages[CHECK_STAGES[reached - 1][0], "refused"] += 1
+                last.reason = reason
+                return reason
+            return check_move
+
+        if name != 'make_move':
+            @functools.wraps(method)
+            def timed(*args, **kwargs):
+                start = clock()
+                try:
+                    return method(*args, **kwargs)
+                finally:
+                    calls[name] += 1
+                    seconds[name] += clock() - start
+            return timed
+
+        rejections, last = self._rejections, self._last
+        # a reason make_move did not get from check_move (a game over, or a move not in the move cache)
+        # is looked for with the methods as they were, so the looking is not counted
+        originals = dict(vars(ChessVar), **self._originals)
+        unchecked = object()
+
+        @functools.wraps(method)
+        def make_move(game, current, next):
+            last.reason = unchecked
+            start = clock()
+            try:
+                legal = method(game, current, next)
+            finally:
+                calls[name] += 1
+                seconds[name] += clock() - start
+            if not legal:
+                reason = last.reason
+                if reason is unchecked:
+                    reason = rejection_reason(game, current, next, originals)
+                rejections[reason or 'unknown'] += 1
+            return legal
+        return make_move
+
+    def reset(self):
+        """
+        Takes no parameters and returns nothing.
+        Sets every count and timing back to 0.
+        """
+        self._calls.clear()
+        self._seconds.clear()
+        self._rejections.clear()
+        self._stages.clear()
+
+    def snapshot(self):
+        """
+        Takes no parameters.
+        Returns a dictionary of whether it is enabled, then for each method called its number of calls,
+        total seconds and mean microseconds per call, for each check_move stage reached the number of moves
+        that reached it and that it refused, and the number of refused moves for each reason.
+        """
+        methods = {}
+        for name in self._methods:
+            calls = self._calls[name]
+            if calls:
+                methods[name] = {"calls": calls, "seconds": self._seconds[name],
+                                 "mean_us": self._seconds[name] / calls * 1e6}
+        stages = {stage: {"reached": self._stages[stage, "reached"], "refused": self._stages[stage, "refused"]}
+                  for stage, _ in CHECK_STAGES if self._stages[stage, "reached"]}
+        return {"enabled": self.is_enabled(), "methods": methods, "stages": stages,
+                "rejections": dict(self._rejections)}
+
+    def log_line(self):
+        """ Takes no parameters. Returns the snapshot as one line of JSON. """
+        return json.dumps(self.snapshot(), sort_keys=True)
+
+    def start_logging(self, interval=60.0, write=None):
+        """
+        Takes the seconds between log lines and a function to call with each line (logging at INFO level
+        to the "ChessVar.instrumentation" logger by default) as parameters and returns nothing.
+        Writes a log line every interval from a background thread until stop_logging is called.
+        """
+        self.stop_logging()
+        write = write or logger.info
+        stop = threading.Event()
+
+        def run():
+            while not stop.wait(interval):
+                write(self.log_line())
+
+        threading.Thread(target=run, name="instrumentation-log", daemon=True).start()
+        self._log_stop = stop
+
+    def stop_logging(self):
+        """
+        Takes no parameters and returns nothing.
+        Stops the log lines started by start_logging.
+        """
+        if self._log_stop is not None:
+            self._log_stop.set()
+            self._log_stop = None
+
+    def __enter__(self):
+        """ Enables the instrumentation for a with statement. Returns the Instrumentation object. """
+        self.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        """ Disables the instrumentation at the end of a with statement. """
+        self.disable()
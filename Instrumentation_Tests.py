@@ -0,0 +1,75 @@
+import json
+import unittest
+from ChessVar import ChessVar, MoveCache, REJECTION_REASONS
+from Instrumentation import Instrumentation, CHECK_STAGES, rejection_reason
+
+
+class TestInstrumentation(unittest.TestCase):
+    """ Contains unit tests for the Instrumentation module. """
+    def test_1(self):
+        """ Tests calls are counted only while enabled and the methods are put back afterwards. """
+        make_move = ChessVar.make_move
+        instrumentation = Instrumentation()
+        game = ChessVar()
+        with instrumentation:
+            self.assertEqual(instrumentation.is_enabled(), True)
+            self.assertRaises(RuntimeError, Instrumentation().enable)
+            self.assertEqual(game.make_move("a2", "a3"), True)
+        self.assertIs(ChessVar.make_move, make_move)
+        game.make_move("h2", "h3")                                          # not counted
+        snapshot = instrumentation.snapshot()
+        self.assertEqual(snapshot["enabled"], False)
+        self.assertEqual(snapshot["methods"]["make_move"]["calls"], 1)
+        self.assertEqual(snapshot["methods"]["check_move"]["calls"], 1)
+        self.assertEqual(snapshot["methods"]["_gives_check"]["calls"], 1)    # the checks on the kings are timed
+        self.assertEqual(snapshot["methods"]["_exposes_king"]["calls"], 1)
+        self.assertEqual(snapshot["stages"], {stage: {"reached": 1, "refused": 0} for stage, _ in CHECK_STAGES})
+        self.assertEqual(json.loads(instrumentation.log_line()), json.loads(json.dumps(snapshot)))
+        instrumentation.reset()
+        self.assertEqual(instrumentation.snapshot()["methods"], {})
+
+    def test_2(self):
+        """ Tests the reasons refused moves are recorded. """
+        game = ChessVar.from_fen("8/7k/7b/8/8/8/R7/KB5R b")
+        with Instrumentation() as instrumentation:
+            self.assertEqual(game.make_move("a2", "a3"), False)               # white's rook
+            self.assertEqual(game.make_move("h6", "g5"), False)               # the bishop is pinned
+            self.assertEqual(game.make_move("h6", "h5"), False)               # bishops move diagonally
+            self.assertEqual(game.make_move("h7", "h6"), False)               # own bishop
+            self.assertEqual(game.make_move("h7", "h9"), False)
+            self.assertEqual(game.make_move("h7", "g7"), True)
+            self.assertEqual(game.make_move("a2", "a7"), False)               # would hit the black king
+            self.assertEqual(game.make_move("h1", "h7"), False)               # the bishop is in the way
+        self.assertEqual(instrumentation.snapshot()["rejections"],
+                         {"wrong_color": 1, "self_check": 1, "bad_path": 1, "own_piece": 1, "bad_location": 1,
+                          "gives_check": 1, "blocked_path": 1})
+        self.assertEqual(instrumentation.snapshot()["stages"],
+                         {"locations": {"reached": 8, "refused": 1}, "pieces": {"reached": 7, "refused": 2},
+                          "path": {"reached": 5, "refused": 2}, "kings": {"reached": 3, "refused": 2}})
+        self.assertEqual(rejection_reason(game, "a2", "a3"), None)
+        self.assertEqual(sorted(reason for _, reasons in CHECK_STAGES for reason in reasons), sorted(REJECTION_REASONS))
+
+    def test_3(self):
+        """ Tests a refused move is checked once, and one refused by the move cache still gets its reason. """
+        check_move = ChessVar.check_move
+        checked = []
+
+        def counted(game, current, next):
+            checked.append((current, next))
+            return check_move(game, current, next)
+        ChessVar.check_move = counted
+        try:
+            game = ChessVar()
+            with Instrumentation() as instrumentation:
+                self.assertEqual(game.make_move("a1", "a3"), False)
+                self.assertEqual(checked, [("a1", "a3")])
+                game.set_move_cache(MoveCache(4))
+                self.assertEqual(game.make_move("a2", "a2"), False)
+        finally:
+            ChessVar.check_move = check_move
+        self.assertEqual(instrumentation.snapshot()["rejections"], {"bad_path": 1, "own_piece": 1})
+        self.assertEqual(instrumentation.snapshot()["methods"]["check_move"]["calls"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
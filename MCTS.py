@@ -0,0 +1,213 @@
+import math
+import random
+import time
+
+from ChessVar import ChessVar
+
+
+# scores of finished games for white, the result every playout is averaged in
+RESULTS = {'WHITE_WON': 1.0, 'BLACK_WON': 0.0, 'TIE': 0.5}
+
+
+class Node:
+    """
+    A class that represents a position in the search tree, reached by a move from its parent, with the
+    number of playouts through it and their total score for the player who made the move.
+    """
+
+    __slots__ = ('_move', '_parent', '_hash', '_white_moved', '_children', '_untried', '_visits', '_score')
+
+    def __init__(self, move, parent, position_hash, white_moved):
+        """
+        Creates Node object for the move (None at the root) leading from the parent node (None at the root)
+        to the position with the hash given, and whether white made the move. It has no children yet.
+        """
+        self._move = move
+        self._parent = parent
+        self._hash = position_hash
+        self._white_moved = white_moved
+        self._children = []
+        self._untried = None  # the legal moves without a child yet, worked out on the first visit
+        self._visits = 0
+        self._score = 0.0
+
+    def get_move(self):
+        """ Returns the (current, next) move leading to the node, or None at the root. """
+        return self._move
+
+    def get_hash(self):
+        """ Returns the hash of the node's position. """
+        return self._hash
+
+    def get_children(self):
+        """ Returns the list of the node's children. """
+        return self._children
+
+    def get_visits(self):
+        """ Returns the number of playouts through the node. """
+        return self._visits
+
+    def get_value(self):
+        """ Returns the mean playout score for the player who made the node's move (0 to 1), or 0.5 if unvisited. """
+        return self._score / self._visits if self._visits else 0.5
+
+    def _select_child(self, exploration):
+        """
+        Takes the exploration constant as a parameter.
+        Returns the child with the highest upper confidence bound (UCT).
+        """
+        log_visits = math.log(self._visits)
+        return max(self._children, key=lambda child: child._score / child._visits
+                   + exploration * math.sqrt(log_visits / child._visits))
+
+
+class MCTSPlayer:
+    """
+    A class that represents a Monte Carlo tree search (UCT) player. Its playouts pick random moves with
+    ChessVar.random_move, which only checks the moves it picks, and the tree is kept between moves so
+    the part of it below the position reached is reused.
+    """
+
+    def __init__(self, iterations=None, time_limit=1.0, exploration=1.4, playouts=1, max_playout_plies=80,
+                 king_forward=0.5, seed=None):
+        """
+        Creates MCTSPlayer object with its budget per move (a number of iterations and a time limit in
+        seconds, either of which may be None but not both), the UCT exploration constant, the playouts run
+        from each new node (as a batch that shares one descent of the tree), the plies a playout may last
+        before the king ranks decide it, the chance each playout ply tries a king move up the board first
+        and a random seed.
+        """
+        if iterations is None and time_limit is None:
+            raise ValueError("MCTSPlayer needs iterations or a time_limit")
+        self._iterations = iterations
+        self._time_limit = time_limit
+        self._exploration = exploration
+        self._playouts = playouts
+        self._max_playout_plies = max_playout_plies
+        self._king_forward = king_forward
+        self._rng = random.Random(seed)
+        self._root = None
+
+    def get_root(self):
+        """ Returns the root Node of the tree from the last search, or None before the first. """
+        return self._root
+
+    def _find_root(self, game):
+        """
+        Takes a ChessVar object as a parameter.
+        Returns the node for its position from the last search's tree (the root, one of its children or
+        one of their children), cut loose from its parent, or a new node if it is not in the tree.
+        """
+        position_hash = game.get_hash()
+        if self._root is not None:
+            candidates = [self._root] + self._root._children
+            candidates += [grandchild for child in self._root._children for grandchild in child._children]
+            for node in candidates:
+                if node._hash == position_hash:
+                    node._parent = None
+                    return node
+        return Node(None, None, position_hash, game.get_turn() == 'black')
+
+    def _playout(self, game):
+        """
+        Takes a ChessVar object as a parameter.
+        Plays random moves until the game is decided, a player has no moves or max_playout_plies is reached,
+        then takes them back. Returns the result for white, judging an unfinished game by the kings' rows.
+        """
+        rng = self._rng
+        plies = 0
+        while game.get_game_state() == 'UNFINISHED' and plies < self._max_playout_plies:
+            move = game.random_move(rng, rng.random() < self._king_forward)
+            if move is None:
+                break
+            game._try_move(*move)
+            plies += 1
+        status = game.get_game_state()
+        if status in RESULTS:
+            result = RESULTS[status]
+        elif plies < self._max_playout_plies:
+            result = 0.5  # stuck: scored as a draw
+        else:
+            ahead = int(game.get_king_location('white')[1]) - int(game.get_king_location('black')[1])
+            result = min(1.0, max(0.0, 0.5 + ahead / 16))
+        for _ in range(plies):
+            game._take_back()
+        return result
+
+    def _iterate(self, root, record):
+        """
+        Takes the root Node and the record of its position as parameters and returns nothing.
+        Descends the tree by UCT to a node with untried moves, adds a child for one of them,
+        runs a batch of playouts from it and adds their mean result to every node on the way.
+        """
+        game = ChessVar.from_record(record)
+        node = root
+        while node._untried is not None and not node._untried and node._children:
+            node = node._select_child(self._exploration)
+            game.apply_move(*node._move)
+
+        status = game.get_game_state()
+        stuck = False
+        if status == 'UNFINISHED':
+            if node._untried is None:
+                node._untried = game.legal_moves()
+                self._rng.shuffle(node._untried)
+            if node._untried:
+                move = node._untried.pop()
+                game.apply_move(*move)
+                child = Node(move, node, game.get_hash(), game.get_turn() == 'black')
+                node._children.append(child)
+                node = child
+                status = game.get_game_state()
+            elif not node._children:
+                stuck = True  # stuck: scored as a draw
+
+        if status in RESULTS:
+            result = RESULTS[status]
+        elif stuck:
+            result = 0.5
+        else:
+            result = sum(self._playout(game) for _ in range(self._playouts)) / self._playouts
+        while node is not None:
+            node._visits += 1
+            node._score += result if node._white_moved else 1 - result
+            node = node._parent
+
+    def search(self, game, iterations=None, time_limit=None):
+        """
+        Takes a ChessVar object and optionally an iteration count and time limit in seconds to use instead
+        of the player's budget as parameters.
+        Grows the tree from the game's position until the budget runs out.
+        Returns a dictionary with the most visited move (None if there are no legal moves), its visits and
+        mean score, the iterations run, the visits reused from the last search and the seconds taken.
+        The game is left as it was found.
+        """
+        if iterations is None and time_limit is None:
+            iterations, time_limit = self._iterations, self._time_limit
+        start = time.perf_counter()
+        deadline = None if time_limit is None else start + time_limit
+        root = self._find_root(game)
+        self._root = root
+        reused = root._visits
+        record = game.to_record()
+
+        count = 0
+        while iterations is None or count < iterations:
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            self._iterate(root, record)
+            count += 1
+
+        result = {"move": None, "visits": 0, "value": 0.5, "iterations": count, "reused": reused,
+                  "seconds": time.perf_counter() - start}
+        if root._children:
+            best = max(root._children, key=lambda child: child._visits)
+            result.update(move=best._move, visits=best._visits, value=best.get_value())
+        return result
+
+    def choose_move(self, game):
+        """
+        Takes a ChessVar object as a parameter.
+        Returns the (current, next) move the search likes best, or None if there are no legal moves.
+        """
+        return self.search(game)["move"]
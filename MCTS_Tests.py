@@ -0,0 +1,49 @@
+import time
+import unittest
+from ChessVar import ChessVar
+from Engine_Tests import WHITE_TO_WIN, BLACK_TO_TIE, play
+from MCTS import MCTSPlayer
+
+
+class TestMCTSPlayer(unittest.TestCase):
+    """ Contains unit tests for MCTSPlayer class. """
+    def test_1(self):
+        """ Tests the player finds the winning and tying moves at the end of a race. """
+        game = play(WHITE_TO_WIN)
+        result = MCTSPlayer(iterations=300, time_limit=None, seed=1).search(game)
+        self.assertGreater(result["value"], 0.9)
+        self.assertIn(result["move"], game.legal_moves())
+
+        game = play(BLACK_TO_TIE)
+        move = MCTSPlayer(iterations=300, time_limit=None, seed=1).choose_move(game)
+        self.assertEqual(game.make_move(*move), True)
+        self.assertEqual(game.get_game_state(), 'TIE')
+
+    def test_2(self):
+        """ Tests the tree below the position reached is reused and the game is left as it was. """
+        player = MCTSPlayer(iterations=400, time_limit=None, seed=2)
+        game = ChessVar()
+        start_hash = game.get_hash()
+        result = player.search(game)
+        self.assertEqual((result["iterations"], result["reused"]), (400, 0))
+        self.assertEqual(game.get_hash(), start_hash)
+        child = max(player.get_root().get_children(), key=lambda node: node.get_visits())
+        reply = max(child.get_children(), key=lambda node: node.get_visits())
+        game.make_move(*child.get_move())
+        game.make_move(*reply.get_move())
+        visits = reply.get_visits()
+        result = player.search(game, iterations=10)
+        self.assertEqual(result["reused"], visits)
+        self.assertIs(player.get_root(), reply)
+
+    def test_3(self):
+        """ Tests the search keeps to its time limit. """
+        start = time.perf_counter()
+        result = MCTSPlayer(time_limit=0.2, seed=3).search(ChessVar())
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertGreater(result["iterations"], 0)
+        self.assertRaises(ValueError, MCTSPlayer, iterations=None, time_limit=None)
+
+
+if __name__ == '__main__':
+    unittest.main()
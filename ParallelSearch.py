@@ -0,0 +1,132 @@
+import concurrent.futures
+import os
+import time
+
+from ChessVar import ChessVar
+import Engine
+
+
+def _search_moves(record, moves, deadline, depth):
+    """
+    Takes a position record made by ChessVar.to_record, the root moves to search, a deadline
+    (a time.time value, or None) and a maximum depth (or None) as parameters. Runs in a worker process.
+    Returns the list of completed (depth, move, score) iterations and the nodes searched.
+    """
+    game = ChessVar.from_record(record)
+    time_limit = None if deadline is None else max(deadline - time.time(), 0)
+    result = Engine.search(game, time_limit, depth, moves=[tuple(move) for move in moves])
+    return result["iterations"], result["nodes"]
+
+
+def split_moves(moves, parts):
+    """
+    Takes a list of moves (best first) and a number of parts as parameters.
+    Returns the moves dealt out in turn into at most that many non-empty lists, so every
+    list gets some of the most promising moves.
+    """
+    groups = [moves[start::parts] for start in range(parts)]
+    return [group for group in groups if group]
+
+
+def merge_iterations(worker_iterations):
+    """
+    Takes each worker's list of completed (depth, move, score) iterations as a parameter.
+    Compares every worker's result at the deepest depth they all reached. A worker that stopped on
+    a decided score keeps that score whatever depth it was found at, since searching deeper cannot change it.
+    Returns the best (depth, move, score), or None if no worker completed an iteration.
+    """
+    finished = [iterations for iterations in worker_iterations if iterations]
+    if not finished:
+        return None
+    depths = [iterations[-1][0] for iterations in finished if abs(iterations[-1][2]) < Engine.WIN_THRESHOLD]
+    common_depth = min(depths) if depths else None
+
+    best = None
+    for iterations in finished:
+        if abs(iterations[-1][2]) >= Engine.WIN_THRESHOLD:
+            # a decided score is exact, however deep the other workers got
+            candidate = iterations[-1]
+        else:
+            # the worker's deepest result no deeper than the common depth
+            candidate = [iteration for iteration in iterations if iteration[0] <= common_depth][-1]
+        if best is None or candidate[2] > best[2]:
+            best = candidate
+    return best
+
+
+class ParallelSearch:
+    """
+    A class that represents a pool of worker processes searching a ChessVar position together
+    by splitting its root moves between them.
+    """
+
+    def __init__(self, workers=None):
+        """
+        Creates ParallelSearch object with a pool of worker processes, one per CPU by default.
+        """
+        self._workers = workers or os.cpu_count() or 1
+        self._executor = concurrent.futures.ProcessPoolExecutor(max_workers=self._workers)
+
+    def get_workers(self):
+        """ Returns the number of worker processes. """
+        return self._workers
+
+    def search(self, game, time_limit=1.0, depth=None):
+        """
+        Takes a ChessVar object, a time limit in seconds (or None) and a maximum depth (or None) as parameters.
+        Searches the position's root moves in parallel, each worker deepening its own share of them.
+        Returns a dictionary with the best move, its score, the depth completed and the nodes searched.
+        """
+        if time_limit is None and depth is None:
+            raise ValueError("search needs a time_limit or a depth")
+        deadline = None if time_limit is None else time.time() + time_limit
+        moves = Engine.order_moves(game, game.legal_moves())
+        result = {"move": moves[0] if moves else None, "score": 0, "depth": 0, "nodes": 0}
+        if not moves:
+            return result
+
+        record = game.to_record()
+        futures = [self._executor.submit(_search_moves, record, group, deadline, depth)
+                   for group in split_moves(moves, self._workers)]
+        worker_iterations = []
+        for future in futures:
+            iterations, nodes = future.result()
+            worker_iterations.append(iterations)
+            result["nodes"] += nodes
+
+        best = merge_iterations(worker_iterations)
+        if best is not None:
+            result["depth"], result["move"], result["score"] = best
+        return result
+
+    def best_move(self, game, time_limit=1.0, depth=None):
+        """
+        Takes a ChessVar object, a time limit in seconds (or None) and a maximum depth (or None) as parameters.
+        Returns the best (current, next) move found, or None if the player has no legal moves.
+        """
+        return self.search(game, time_limit, depth)["move"]
+
+    def close(self):
+        """
+        Takes no parameters and returns nothing.
+        Shuts down the worker processes.
+        """
+        self._executor.shutdown()
+
+    def __enter__(self):
+        """ Returns the ParallelSearch object for use in a with statement. """
+        return self
+
+    def __exit__(self, *exc_info):
+        """ Shuts down the worker processes at the end of a with statement. """
+        self.close()
+
+
+def parallel_best_move(game, time_limit=1.0, depth=None, workers=None):
+    """
+    Takes a ChessVar object, a time limit in seconds (or None), a maximum depth (or None)
+    and a number of worker processes as parameters.
+    Starts a pool of workers for one search and returns the best (current, next) move found.
+    """
+    with ParallelSearch(workers) as searcher:
+        return searcher.best_move(game, time_limit, depth)
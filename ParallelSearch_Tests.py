@@ -0,0 +1,51 @@
+import unittest
+from ChessVar import ChessVar
+from Engine import WIN_SCORE, WIN_THRESHOLD, search
+from Engine_Tests import WHITE_TO_WIN, play
+from ParallelSearch import _search_moves, split_moves, merge_iterations, ParallelSearch
+
+
+class TestParallelSearch(unittest.TestCase):
+    """ Contains unit tests for the ParallelSearch module. """
+    def test_1(self):
+        """ Tests a worker searches the position it is sent as a record. """
+        game = play([("a2", "a5"), ("g2", "c6"), ("a1", "a2")])
+        moves = game.legal_moves()[:4]
+        iterations, nodes = _search_moves(game.to_record(), moves, None, 2)
+        expected = search(game, time_limit=None, depth=2, moves=moves)
+        self.assertEqual(iterations, expected["iterations"])
+        self.assertEqual(nodes, expected["nodes"])
+        self.assertEqual(iterations[-1][0], 2)
+
+    def test_2(self):
+        """ Tests root moves are dealt out and worker results merged. """
+        self.assertEqual(split_moves([1, 2, 3, 4, 5], 2), [[1, 3, 5], [2, 4]])
+        self.assertEqual(split_moves([1], 3), [[1]])
+        self.assertEqual(merge_iterations([[], []]), None)
+        # the second worker only reached depth 1, so both are compared at depth 1
+        merged = merge_iterations([[(1, "a", 10), (2, "a", 5)], [(1, "b", 20)]])
+        self.assertEqual(merged, (1, "b", 20))
+        # a worker that found a forced win stops early but still wins the comparison
+        merged = merge_iterations([[(1, "a", 10), (2, "a", 5), (3, "a", 7)], [(1, "b", WIN_THRESHOLD + 5)]])
+        self.assertEqual(merged, (1, "b", WIN_THRESHOLD + 5))
+        # a win found deeper than another worker reached is not cut back to the common depth
+        merged = merge_iterations([[(1, "a", 10), (2, "a", 5), (3, "a", WIN_SCORE - 3)], [(1, "b", 20), (2, "b", 30)]])
+        self.assertEqual(merged, (3, "a", WIN_SCORE - 3))
+        # a move proven to lose doesn't hold the others back to its depth, and loses to them
+        merged = merge_iterations([[(1, "a", 10), (2, "a", 5), (3, "a", 8)], [(1, "b", -WIN_SCORE + 2)]])
+        self.assertEqual(merged, (3, "a", 8))
+
+    def test_3(self):
+        """ Tests the parallel search agrees with the single process search. """
+        with ParallelSearch(workers=2) as searcher:
+            self.assertEqual(searcher.get_workers(), 2)
+            game = ChessVar()
+            result = searcher.search(game, time_limit=None, depth=2)
+            self.assertEqual(result["score"], search(game, time_limit=None, depth=2)["score"])
+            self.assertIn(result["move"], game.legal_moves())
+
+            game = play(WHITE_TO_WIN)
+            self.assertEqual(searcher.best_move(game, time_limit=5.0, depth=2), ("a7", "b8"))
+            game.make_move("a7", "b8")
+            game.make_move("h6", "h7")
+            self.assertEqual(searcher.best_move(game, time_limit=0.1), None)    # game over
@@ -0,0 +1,200 @@
+import argparse
+import json
+import platform
+import sys
+import time
+
+from ChessVar import ChessVar, SQUARES
+
+
+# positions to count from, each reached by playing its moves from the starting setup
+REFERENCE_POSITIONS = {
+    "start": [],
+    "opening": [("a2", "a3"), ("g2", "h3"), ("c2", "b4"), ("h3", "g4"), ("a1", "a2"), ("g4", "f3")],
+    "middlegame": [("a2", "a8"), ("g2", "b7"), ("a1", "a2"), ("f2", "d1"), ("a2", "a3"), ("h1", "g2"),
+                   ("b2", "d4"), ("g2", "g3"), ("a8", "a7"), ("g3", "f3"), ("a3", "b4"), ("f3", "g2")],
+    "race": [("a2", "a8"), ("h2", "h8"), ("a1", "a2"), ("h1", "h2"), ("a2", "a3"), ("h2", "h3"),
+             ("a3", "a4"), ("h3", "h4"), ("a4", "a5"), ("h4", "h5")],
+}
+
+
+def load_position(name):
+    """
+    Takes the name of a reference position as a parameter.
+    Returns a ChessVar object with that position's moves played.
+    """
+    game = ChessVar()
+    for current, next in REFERENCE_POSITIONS[name]:
+        if not game.make_move(current, next):
+            raise ValueError(f"reference position {name} has an illegal move {current}{next}")
+    return game
+
+
+def perft(game, depth):
+    """
+    Takes a ChessVar object and a depth as parameters.
+    Returns the number of move sequences of that length from the game's position.
+    The game is left as it was found.
+    """
+    if depth == 0:
+        return 1
+    moves = game.legal_moves()
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for current, next in moves:
+        game._try_move(current, next)
+        nodes += perft(game, depth - 1)
+        game._take_back()
+    return nodes
+
+
+def divide(game, depth):
+    """
+    Takes a ChessVar object and a depth of at least 1 as parameters.
+    Returns a dictionary of each legal move to the perft count below it.
+    """
+    results = {}
+    for current, next in game.legal_moves():
+        game._try_move(current, next)
+        results[current + next] = perft(game, depth - 1)
+        game._take_back()
+    return results
+
+
+def _sample_calls(positions):
+    """
+    Takes a list of ChessVar objects as a parameter.
+    Returns a dictionary of piece name to (game, current, next) calls covering every
+    move, legal or not, of that player's pieces of that type.
+    """
+    calls = {"king": [], "rook": [], "bishop": [], "knight": []}
+    for game in positions:
+        color = game.get_turn()
+        for current in SQUARES:
+            piece = game.get_piece(current)
+            if piece.get_color() == color:
+                for next in SQUARES:
+                    if next != current:
+                        calls[piece.get_name()].append((game, current, next))
+    return calls
+
+
+def _time_calls(function, calls, repeat):
+    """
+    Takes a function, a list of argument tuples and a repeat count as parameters.
+    Returns the calls made and seconds taken calling the function with every argument tuple repeat times.
+    """
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for args in calls:
+            function(*args)
+    return len(calls) * repeat, time.perf_counter() - start
+
+
+def _time_make_move(calls, repeat):
+    """
+    Takes a list of (game, current, next) calls and a repeat count as parameters.
+    Returns the calls made and seconds taken. Every move that is made is taken back
+    with _take_back inside the timing so each call sees the same position.
+    """
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for game, current, next in calls:
+            if game.make_move(current, next):
+                game._take_back()
+    return len(calls) * repeat, time.perf_counter() - start
+
+
+def _result(calls, seconds):
+    """ Takes a call count and seconds taken. Returns the benchmark result dictionary. """
+    return {
+        "calls": calls,
+        "seconds": seconds,
+        "calls_per_second": calls / seconds if seconds else None,
+        "ns_per_call": seconds * 1e9 / calls if calls else None,
+    }
+
+
+def benchmark(repeat=5, depth=3):
+    """
+    Takes a repeat count and perft depth as parameters.
+    Times make_move, move_check and each piece mover separately over every move of the
+    player's pieces in the reference positions, and perft from the starting setup.
+    Returns the results as a dictionary.
+    """
+    positions = [load_position(name) for name in REFERENCE_POSITIONS]
+    calls = _sample_calls(positions)
+    every_call = calls["king"] + calls["rook"] + calls["bishop"] + calls["knight"]
+
+    results = {}
+    results["make_move"] = _result(*_time_make_move(every_call, repeat))
+    results["move_check"] = _result(*_time_calls(
+        lambda game, current, next: game.move_check(game.get_board(), current, next), every_call, repeat))
+    results["move_rook"] = _result(*_time_calls(
+        lambda game, current, next: game.move_rook(game.get_board(), current, next), calls["rook"], repeat))
+    results["move_bishop"] = _result(*_time_calls(
+        lambda game, current, next: game.move_bishop(game.get_board(), current, next), calls["bishop"], repeat))
+    results["move_knight"] = _result(*_time_calls(
+        lambda game, current, next: game.move_knight(current, next), calls["knight"], repeat))
+    results["move_king"] = _result(*_time_calls(
+        lambda game, current, next: game.move_king(current, next), calls["king"], repeat))
+
+    start = time.perf_counter()
+    nodes = perft(ChessVar(), depth)
+    seconds = time.perf_counter() - start
+    results["perft"] = {"depth": depth, "nodes": nodes, "seconds": seconds,
+                        "nodes_per_second": nodes / seconds if seconds else None}
+
+    return {"python": platform.python_version(), "repeat": repeat, "results": results}
+
+
+def main(argv=None):
+    """
+    Takes a list of command line arguments (sys.argv by default) as a parameter.
+    Runs the perft or bench command and returns the exit status.
+    """
+    parser = argparse.ArgumentParser(description="Move generation counts and timings for ChessVar.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    perft_parser = commands.add_parser("perft", help="count move sequences to a given depth")
+    perft_parser.add_argument("depth", type=int)
+    perft_parser.add_argument("--position", choices=sorted(REFERENCE_POSITIONS), default="start")
+    perft_parser.add_argument("--divide", action="store_true", help="print the count below each move")
+
+    bench_parser = commands.add_parser("bench", help="time make_move, move_check and the piece movers")
+    bench_parser.add_argument("--repeat", type=int, default=5)
+    bench_parser.add_argument("--depth", type=int, default=3, help="perft depth to time")
+    bench_parser.add_argument("--output", help="write the JSON results to this file instead of stdout")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "perft":
+        game = load_position(args.position)
+        start = time.perf_counter()
+        if args.divide and args.depth > 0:
+            counts = divide(game, args.depth)
+            for move in sorted(counts):
+                print(f"{move}: {counts[move]}")
+            nodes = sum(counts.values())
+        else:
+            nodes = perft(game, args.depth)
+        seconds = time.perf_counter() - start
+        print(f"nodes: {nodes}")
+        print(f"time: {seconds:.3f}s")
+        if seconds:
+            print(f"nodes/sec: {nodes / seconds:.0f}")
+        return 0
+
+    results = benchmark(args.repeat, args.depth)
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
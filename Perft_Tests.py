@@ -0,0 +1,49 @@
+import json
+import os
+import tempfile
+import unittest
+from ChessVar import ChessVar
+from Perft import REFERENCE_POSITIONS, load_position, perft, divide, benchmark, main
+
+
+class TestPerft(unittest.TestCase):
+    """ Contains unit tests for the Perft module. """
+    def test_1(self):
+        """ Tests move counts from the starting setup. """
+        game = ChessVar()
+        self.assertEqual(perft(game, 0), 1)
+        self.assertEqual(perft(game, 1), 21)
+        self.assertEqual(perft(game, 2), 441)
+        self.assertEqual(perft(game, 3), 11366)
+        self.assertEqual(game.legal_moves(), ChessVar().legal_moves())     # game left as it was found
+
+    def test_2(self):
+        """ Tests divide adds up to perft for every reference position. """
+        for name in REFERENCE_POSITIONS:
+            game = load_position(name)
+            counts = divide(game, 2)
+            self.assertEqual(len(counts), perft(game, 1))
+            self.assertEqual(sum(counts.values()), perft(game, 2))
+
+    def test_3(self):
+        """ Tests a finished game has no moves to count. """
+        game = load_position("race")
+        for current, next in [("a5", "a6"), ("h5", "h6"), ("a6", "a7"), ("h8", "g8"), ("b2", "c3"), ("g8", "g4"),
+                              ("a7", "b8"), ("h6", "h7")]:
+            self.assertEqual(game.make_move(current, next), True)
+        self.assertEqual(game.get_game_state(), 'WHITE_WON')
+        self.assertEqual(perft(game, 1), 0)
+        self.assertEqual(perft(game, 3), 0)
+
+    def test_4(self):
+        """ Tests the benchmark results and the bench command's JSON output. """
+        results = benchmark(repeat=1, depth=1)["results"]
+        for name in ["make_move", "move_check", "move_rook", "move_bishop", "move_knight", "move_king"]:
+            self.assertGreater(results[name]["calls"], 0)
+        self.assertEqual(results["perft"]["nodes"], 21)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "bench.json")
+            self.assertEqual(main(["bench", "--repeat", "1", "--depth", "1", "--output", path]), 0)
+            with open(path) as output:
+                self.assertEqual(json.load(output)["results"]["perft"]["nodes"], 21)
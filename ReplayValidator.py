@@ -0,0 +1,143 @@
+import argparse
+import collections
+import concurrent.futures
+import itertools
+import json
+import os
+import sys
+
+from ChessVar import ChessVar
+
+
+def parse_move(move):
+    """
+    Takes a move as a [current, next] pair or a string such as "a2a4" as a parameter.
+    Returns the (current, next) move. Raises ValueError if the move cannot be read.
+    """
+    if isinstance(move, str) and len(move) == 4:
+        return move[:2], move[2:]
+    if isinstance(move, (list, tuple)) and len(move) == 2 and all(isinstance(part, str) for part in move):
+        return move[0], move[1]
+    raise ValueError(f"cannot read move {move!r}")
+
+
+def parse_moves(line):
+    """
+    Takes one line of a game log as a parameter. The line holds a JSON list of moves, or an object
+    with a "moves" list, where each move is a [current, next] pair or a string such as "a2a4".
+    Returns the list of (current, next) moves. Raises ValueError if the line cannot be read.
+    """
+    record = json.loads(line)
+    if isinstance(record, dict):
+        record = record.get("moves")
+    if not isinstance(record, list):
+        raise ValueError("expected a list of moves")
+    return [parse_move(move) for move in record]
+
+
+def validate_game(moves):
+    """
+    Takes a list of (current, next) moves as a parameter.
+    Plays them from the starting setup, checking each with check_move and stopping at the first one it refuses.
+    Returns a dictionary with whether every move was legal, the plies played, the first illegal ply
+    (counting from 1), its move and the reason check_move gives for refusing it if there was one,
+    and the final game state.
+    """
+    game = ChessVar()
+    for ply, (current, next) in enumerate(moves, start=1):
+        reason = game.check_move(current, next)
+        if reason is not None:
+            return {"valid": False, "plies": ply - 1, "illegal_ply": ply, "illegal_move": [current, next],
+                    "reason": reason, "result": game.get_game_state()}
+        game.apply_move(current, next)
+    return {"valid": True, "plies": len(moves), "illegal_ply": None, "illegal_move": None, "reason": None,
+            "result": game.get_game_state()}
+
+
+def validate_line(line_number, line):
+    """
+    Takes a line number and the line of the game log as parameters.
+    Returns the validate_game report for the line, with its line number and any error reading it.
+    """
+    try:
+        moves = parse_moves(line)
+    except ValueError as error:  # json.JSONDecodeError is a ValueError too
+        return {"line": line_number, "valid": False, "error": str(error)}
+    report = validate_game(moves)
+    report["line"] = line_number
+    return report
+
+
+def _validate_chunk(chunk):
+    """
+    Takes a list of (line number, line) pairs as a parameter. Runs in a worker process.
+    Returns the list of their reports.
+    """
+    return [validate_line(line_number, line) for line_number, line in chunk]
+
+
+def _numbered_lines(lines):
+    """ Takes an iterable of lines. Yields (line number, line) for every line that is not blank. """
+    for line_number, line in enumerate(lines, start=1):
+        if line.strip():
+            yield line_number, line
+
+
+def validate_stream(lines, workers=0, chunk_size=200):
+    """
+    Takes an iterable of game log lines (such as an open file), the number of worker processes
+    (0 validates in this process) and the lines sent to a worker at a time as parameters.
+    Yields each game's report in the order of the input, reading only as far ahead as the
+    workers need, so memory stays flat however long the input is.
+    """
+    numbered = _numbered_lines(lines)
+    if workers == 0:
+        for line_number, line in numbered:
+            yield validate_line(line_number, line)
+        return
+
+    workers = workers or os.cpu_count() or 1
+    chunks = iter(lambda: list(itertools.islice(numbered, chunk_size)), [])
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        # keep two chunks per worker in flight and hand reports back in input order
+        pending = collections.deque()
+        for chunk in chunks:
+            pending.append(executor.submit(_validate_chunk, chunk))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def main(argv=None):
+    """
+    Takes a list of command line arguments (sys.argv by default) as a parameter.
+    Validates every game in the log, writes one JSON report line per game and prints a summary.
+    Returns 0 if every game was valid and 1 otherwise.
+    """
+    parser = argparse.ArgumentParser(description="Check game logs against the ChessVar rules.")
+    parser.add_argument("log", help="game log with one JSON list of moves per line ('-' reads stdin)")
+    parser.add_argument("--workers", type=int, default=0, help="worker processes (0 validates in this process)")
+    parser.add_argument("--chunk-size", type=int, default=200)
+    parser.add_argument("--output", help="write the reports to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    log = sys.stdin if args.log == "-" else open(args.log)
+    output = open(args.output, "w") if args.output else sys.stdout
+    totals = collections.Counter()
+    try:
+        for report in validate_stream(log, args.workers, args.chunk_size):
+            totals["games"] += 1
+            totals["valid" if report["valid"] else "invalid"] += 1
+            output.write(json.dumps(report) + "\n")
+    finally:
+        if log is not sys.stdin:
+            log.close()
+        if output is not sys.stdout:
+            output.close()
+    print(json.dumps(dict(totals)), file=sys.stderr)
+    return 0 if totals["invalid"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
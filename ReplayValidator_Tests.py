@@ -0,0 +1,48 @@
+import io
+import json
+import unittest
+from ReplayValidator import parse_moves, validate_game, validate_stream
+
+
+GOOD_GAME = json.dumps([["a2", "a8"], ["h2", "h8"], ["a1", "a2"], ["h1", "h2"]])
+BAD_GAME = json.dumps(["a2a3", "g2h3", "c1c3"])                    # knight moves straight up
+OFF_BOARD = json.dumps({"moves": [["a2", "a3"], ["h2", "h9"]]})
+
+
+class TestReplayValidator(unittest.TestCase):
+    """ Contains unit tests for the ReplayValidator module. """
+    def test_1(self):
+        """ Tests the move formats that can be read. """
+        self.assertEqual(parse_moves(GOOD_GAME)[:2], [("a2", "a8"), ("h2", "h8")])
+        self.assertEqual(parse_moves(BAD_GAME)[0], ("a2", "a3"))
+        self.assertEqual(parse_moves(OFF_BOARD)[1], ("h2", "h9"))
+        self.assertRaises(ValueError, parse_moves, "[1, 2]")
+        self.assertRaises(ValueError, parse_moves, '"a2a3"')
+
+    def test_2(self):
+        """ Tests the first illegal ply and final game state are reported. """
+        report = validate_game(parse_moves(GOOD_GAME))
+        self.assertEqual(report["valid"], True)
+        self.assertEqual(report["plies"], 4)
+        self.assertEqual(report["result"], 'UNFINISHED')
+
+        report = validate_game(parse_moves(BAD_GAME))
+        self.assertEqual(report["valid"], False)
+        self.assertEqual(report["illegal_ply"], 3)
+        self.assertEqual(report["illegal_move"], ["c1", "c3"])
+        self.assertEqual(report["plies"], 2)
+
+        report = validate_game(parse_moves(OFF_BOARD))
+        self.assertEqual(report["illegal_ply"], 2)
+        self.assertEqual(report["reason"], 'bad_location')
+
+    def test_3(self):
+        """ Tests a stream is reported in order, the same with and without worker processes. """
+        log = "\n".join([GOOD_GAME, BAD_GAME, "", "not json", OFF_BOARD] * 5) + "\n"
+        local = list(validate_stream(io.StringIO(log), workers=0))
+        pooled = list(validate_stream(io.StringIO(log), workers=2, chunk_size=3))
+        self.assertEqual(local, pooled)
+        self.assertEqual(len(local), 20)                                # blank lines are skipped
+        self.assertEqual([report["line"] for report in local[:4]], [1, 2, 4, 5])
+        self.assertEqual([report["valid"] for report in local[:4]], [True, False, False, False])
+        self.assertIn("error", local[2])
@@ -0,0 +1,166 @@
+import argparse
+import collections
+import concurrent.futures
+import json
+import os
+import random
+import sys
+import time
+
+from ChessVar import ChessVar
+import Engine
+
+
+POLICIES = ("random", "greedy", "search")
+
+
+def random_policy(game, rng, options):
+    """
+    Takes a ChessVar object, a random.Random object and the policy options as parameters.
+    Returns a random legal move, or None if there are none.
+    """
+    moves = game.legal_moves()
+    return rng.choice(moves) if moves else None
+
+
+def greedy_policy(game, rng, options):
+    """
+    Takes a ChessVar object, a random.Random object and the policy options as parameters.
+    Returns the legal move that takes the king furthest up the board, then the one capturing
+    the most valuable piece, breaking ties at random. Returns None if there are no legal moves.
+    """
+    turn = game.get_turn()
+    best_moves, best_score = [], None
+    for current, next in game.legal_moves():
+        score = 0
+        if game.get_piece(current).get_name() == 'king':
+            score += 1000 * (int(next[1]) - int(current[1]))
+        captured = game.get_piece(next)
+        if captured.get_color() not in (turn, 'none'):
+            score += Engine.PIECE_SCORES[captured.get_name()]
+        if best_score is None or score > best_score:
+            best_moves, best_score = [(current, next)], score
+        elif score == best_score:
+            best_moves.append((current, next))
+    return rng.choice(best_moves) if best_moves else None
+
+
+def search_policy(game, rng, options):
+    """
+    Takes a ChessVar object, a random.Random object and the policy options (search_depth and
+    search_time) as parameters. Returns the engine's best move, or None if there are no legal moves.
+    """
+    return Engine.best_move(game, time_limit=options.get("search_time"), depth=options.get("search_depth", 2))
+
+
+POLICY_FUNCTIONS = {"random": random_policy, "greedy": greedy_policy, "search": search_policy}
+
+
+def play_game(index, white, black, seed=0, max_plies=200, options=None):
+    """
+    Takes a game number, the white and black policy names, a base random seed, a ply limit and
+    policy options as parameters. Plays one game until it finishes, a player has no moves or the ply limit.
+    Returns a dictionary with the game number, moves played, final game state, ply count and seconds taken.
+    """
+    options = options or {}
+    rng = random.Random(seed * 1000003 + index)
+    policies = {"white": POLICY_FUNCTIONS[white], "black": POLICY_FUNCTIONS[black]}
+    game = ChessVar()
+    moves = []
+    start = time.perf_counter()
+    while game.get_game_state() == 'UNFINISHED' and len(moves) < max_plies:
+        move = policies[game.get_turn()](game, rng, options)
+        if move is None:
+            break
+        game.apply_move(*move)
+        moves.append(move[0] + move[1])
+    return {
+        "game": index,
+        "moves": moves,
+        "result": game.get_game_state(),
+        "plies": len(moves),
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def _play_batch(indexes, white, black, seed, max_plies, options):
+    """
+    Takes a list of game numbers and the play_game settings as parameters. Runs in a worker process.
+    Returns the list of results of playing those games.
+    """
+    return [play_game(index, white, black, seed, max_plies, options) for index in indexes]
+
+
+def run_games(games, white="random", black="random", workers=None, seed=0, max_plies=200,
+              options=None, batch_size=50):
+    """
+    Takes the number of games, the white and black policy names, the number of worker processes
+    (0 plays in this process), a base random seed, a ply limit, policy options and the games per batch
+    as parameters. Yields each game's result as soon as its batch finishes, keeping at most two batches
+    per worker queued so memory stays flat however many games are played.
+    """
+    for name in (white, black):
+        if name not in POLICY_FUNCTIONS:
+            raise ValueError(f"unknown policy {name}, expected one of {', '.join(POLICIES)}")
+    batches = (range(start, min(start + batch_size, games)) for start in range(0, games, batch_size))
+
+    if workers == 0:
+        for indexes in batches:
+            yield from _play_batch(indexes, white, black, seed, max_plies, options)
+        return
+
+    workers = workers or os.cpu_count() or 1
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        for indexes in batches:
+            pending.add(executor.submit(_play_batch, list(indexes), white, black, seed, max_plies, options))
+            if len(pending) >= 2 * workers:
+                done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+        for future in concurrent.futures.as_completed(pending):
+            yield from future.result()
+
+
+def main(argv=None):
+    """
+    Takes a list of command line arguments (sys.argv by default) as a parameter.
+    Plays the games, writes one JSON line per game and prints a summary of the results.
+    Returns the exit status.
+    """
+    parser = argparse.ArgumentParser(description="Play ChessVar games between computer policies.")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--white", choices=POLICIES, default="random")
+    parser.add_argument("--black", choices=POLICIES, default="random")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (0 plays in this process)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-plies", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--search-depth", type=int, default=2)
+    parser.add_argument("--search-time", type=float, default=None)
+    parser.add_argument("--output", help="write one JSON line per game to this file")
+    args = parser.parse_args(argv)
+
+    options = {"search_depth": args.search_depth, "search_time": args.search_time}
+    output = open(args.output, "w") if args.output else None
+    totals = collections.Counter()
+    start = time.perf_counter()
+    try:
+        for result in run_games(args.games, args.white, args.black, args.workers, args.seed,
+                                args.max_plies, options, args.batch_size):
+            totals[result["result"]] += 1
+            if output is not None:
+                output.write(json.dumps(result) + "\n")
+    finally:
+        if output is not None:
+            output.close()
+    seconds = time.perf_counter() - start
+
+    summary = {"games": sum(totals.values()), "results": dict(totals), "seconds": seconds,
+               "games_per_second": sum(totals.values()) / seconds if seconds else None}
+    print(json.dumps(summary))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,52 @@
+import json
+import os
+import tempfile
+import unittest
+from ChessVar import ChessVar
+from SelfPlay import play_game, run_games, main
+
+
+def replay(result):
+    """ Takes a game result. Returns a ChessVar object with its moves played through make_move. """
+    game = ChessVar()
+    for move in result["moves"]:
+        assert game.make_move(move[:2], move[2:]), move
+    return game
+
+
+class TestSelfPlay(unittest.TestCase):
+    """ Contains unit tests for the SelfPlay module. """
+    def test_1(self):
+        """ Tests a game's moves are legal and its result is reported. """
+        for white, black in [("random", "random"), ("greedy", "random"), ("search", "greedy")]:
+            result = play_game(3, white, black, seed=1, max_plies=60, options={"search_depth": 1})
+            self.assertEqual(result["game"], 3)
+            self.assertEqual(result["plies"], len(result["moves"]))
+            self.assertEqual(replay(result).get_game_state(), result["result"])
+
+    def test_2(self):
+        """ Tests games are repeatable from their seed and the ply limit is kept. """
+        first = play_game(7, "random", "random", seed=2, max_plies=30)
+        second = play_game(7, "random", "random", seed=2, max_plies=30)
+        self.assertEqual(first["moves"], second["moves"])
+        self.assertLessEqual(first["plies"], 30)
+        self.assertNotEqual(first["moves"], play_game(8, "random", "random", seed=2, max_plies=30)["moves"])
+
+    def test_3(self):
+        """ Tests worker processes play the same games as a single process. """
+        local = {result["game"]: result["moves"] for result in run_games(12, "greedy", "random", workers=0,
+                                                                          batch_size=5)}
+        pooled = {result["game"]: result["moves"] for result in run_games(12, "greedy", "random", workers=2,
+                                                                           batch_size=5)}
+        self.assertEqual(sorted(local), list(range(12)))
+        self.assertEqual(local, pooled)
+        self.assertRaises(ValueError, list, run_games(1, "fastest"))
+
+    def test_4(self):
+        """ Tests the command line writes one JSON line per game. """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "games.jsonl")
+            self.assertEqual(main(["--games", "3", "--white", "greedy", "--workers", "0", "--output", path]), 0)
+            with open(path) as output:
+                results = [json.loads(line) for line in output]
+        self.assertEqual(sorted(result["game"] for result in results), [0, 1, 2])
@@ -0,0 +1,149 @@
+import mmap
+import os
+
+from ChessVar import ChessVar, RECORD_SIZE
+
+
+# every store file starts with this header, followed by one RECORD_SIZE record per snapshot
+MAGIC = b"RCSNAP01"
+HEADER_SIZE = len(MAGIC)
+
+
+class SnapshotStore:
+    """
+    A class that represents a file of ChessVar position records, appended to at the end
+    and read back by snapshot number through a memory map.
+    """
+
+    def __init__(self, path):
+        """
+        Creates SnapshotStore object over the file at path, creating the file if it does not exist.
+        A record left half written at the end of the file (such as by a crash) is dropped.
+        Raises ValueError if the file is not a snapshot store.
+        """
+        self._path = path
+        if os.path.exists(path):
+            self._file = open(path, "r+b")
+            if self._file.read(HEADER_SIZE) != MAGIC:
+                self._file.close()
+                raise ValueError(f"{path} is not a snapshot store")
+        else:
+            self._file = open(path, "w+b")
+            self._file.write(MAGIC)
+            self._file.flush()
+        size = os.fstat(self._file.fileno()).st_size
+        self._count = (size - HEADER_SIZE) // RECORD_SIZE
+        if HEADER_SIZE + self._count * RECORD_SIZE != size:
+            self._file.truncate(HEADER_SIZE + self._count * RECORD_SIZE)
+        self._map = None
+        self._mapped = 0  # the number of records the memory map covers
+        self._remap()
+
+    def _remap(self):
+        """
+        Takes no parameters and returns nothing.
+        Writes out any appended records and maps the whole file again so they can be read.
+        """
+        self._file.flush()
+        if self._map is not None:
+            self._map.close()
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._mapped = self._count
+
+    def get_path(self):
+        """ Returns the path of the store file. """
+        return self._path
+
+    def __len__(self):
+        """ Returns the number of snapshots in the store. """
+        return self._count
+
+    def append(self, game):
+        """
+        Takes a ChessVar object as a parameter.
+        Adds a snapshot of its position at the end of the store. Returns the snapshot's number.
+        """
+        self._file.seek(0, os.SEEK_END)
+        self._file.write(game.to_record())
+        self._count += 1
+        return self._count - 1
+
+    def extend(self, games):
+        """
+        Takes an iterable of ChessVar objects as a parameter.
+        Adds a snapshot of each position at the end of the store in one write.
+        Returns the range of the new snapshots' numbers.
+        """
+        records = b"".join(game.to_record() for game in games)
+        start = self._count
+        self._file.seek(0, os.SEEK_END)
+        self._file.write(records)
+        self._count += len(records) // RECORD_SIZE
+        return range(start, self._count)
+
+    def _offset(self, index):
+        """
+        Takes a snapshot number as a parameter.
+        Returns where its record starts in the file. Raises IndexError if there is no such snapshot.
+        """
+        if not 0 <= index < self._count:
+            raise IndexError(f"snapshot {index} is not in a store of {self._count}")
+        if index >= self._mapped:
+            self._remap()
+        return HEADER_SIZE + index * RECORD_SIZE
+
+    def get_record(self, index):
+        """
+        Takes a snapshot number as a parameter. Returns a copy of its RECORD_SIZE byte record.
+        """
+        start = self._offset(index)
+        return self._map[start:start + RECORD_SIZE]
+
+    def load(self, index):
+        """
+        Takes a snapshot number as a parameter.
+        Returns a ChessVar object set up with that snapshot's position, read straight from the memory map.
+        """
+        start = self._offset(index)
+        with memoryview(self._map) as whole, whole[start:start + RECORD_SIZE] as record:
+            return ChessVar.from_record(record)
+
+    def load_all(self, start=0, stop=None):
+        """
+        Takes the first snapshot number and the one to stop before (the end of the store by default) as parameters.
+        Yields a ChessVar object for each snapshot in that range, in order.
+        """
+        stop = self._count if stop is None else min(stop, self._count)
+        if start < stop:
+            self._offset(stop - 1)  # map every record up to stop
+        for index in range(start, stop):
+            offset = HEADER_SIZE + index * RECORD_SIZE
+            with memoryview(self._map) as whole, whole[offset:offset + RECORD_SIZE] as record:
+                game = ChessVar.from_record(record)
+            yield game
+
+    def flush(self):
+        """
+        Takes no parameters and returns nothing.
+        Writes appended snapshots through to the disk.
+        """
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        """
+        Takes no parameters and returns nothing.
+        Writes out appended snapshots and closes the store file.
+        """
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __enter__(self):
+        """ Returns the SnapshotStore object for use in a with statement. """
+        return self
+
+    def __exit__(self, *exc_info):
+        """ Closes the store at the end of a with statement. """
+        self.close()
@@ -0,0 +1,55 @@
+import os
+import tempfile
+import unittest
+from ChessVar import ChessVar, RECORD_SIZE
+from Engine_Tests import WHITE_TO_WIN, play
+from SnapshotStore import SnapshotStore, HEADER_SIZE
+
+
+class TestSnapshotStore(unittest.TestCase):
+    """ Contains unit tests for SnapshotStore class. """
+    def setUp(self):
+        """ Makes a temporary directory for the store files. """
+        self._directory = tempfile.TemporaryDirectory()
+        self._path = os.path.join(self._directory.name, "games.snap")
+
+    def tearDown(self):
+        """ Removes the temporary directory. """
+        self._directory.cleanup()
+
+    def test_1(self):
+        """ Tests snapshots are read back by number, including ones appended after opening. """
+        games = [play(WHITE_TO_WIN[:plies]) for plies in range(6)]
+        with SnapshotStore(self._path) as store:
+            self.assertEqual(len(store), 0)
+            self.assertEqual(store.append(games[0]), 0)
+            self.assertEqual(store.extend(games[1:4]), range(1, 4))
+            self.assertEqual(store.load(2).get_hash(), games[2].get_hash())
+            self.assertEqual(store.append(games[4]), 4)                  # appended after the last read
+            self.assertEqual(store.load(4).get_hash(), games[4].get_hash())
+            self.assertEqual(store.get_record(1), games[1].to_record())
+            self.assertRaises(IndexError, store.load, 5)
+
+        with SnapshotStore(self._path) as store:                         # reopened from disk
+            self.assertEqual(len(store), 5)
+            self.assertEqual([game.get_hash() for game in store.load_all()],
+                             [game.get_hash() for game in games[:5]])
+            self.assertEqual(len(list(store.load_all(3))), 2)
+            self.assertEqual(store.load(3).legal_moves(), games[3].legal_moves())
+
+    def test_2(self):
+        """ Tests a half written record is dropped and other files are refused. """
+        with SnapshotStore(self._path) as store:
+            store.extend([ChessVar(), ChessVar()])
+        with open(self._path, "ab") as file:
+            file.write(b"\x01\x02\x03")                                   # a crash part way through a record
+        with SnapshotStore(self._path) as store:
+            self.assertEqual(len(store), 2)
+            self.assertEqual(store.append(play(WHITE_TO_WIN[:1])), 2)
+            self.assertEqual(store.load(2).get_turn(), 'black')
+        self.assertEqual(os.path.getsize(self._path), HEADER_SIZE + 3 * RECORD_SIZE)
+
+        other = os.path.join(self._directory.name, "other.txt")
+        with open(other, "w") as file:
+            file.write("not a store")
+        self.assertRaises(ValueError, SnapshotStore, other)
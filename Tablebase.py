@@ -0,0 +1,375 @@
+import argparse
+import array
+import itertools
+import mmap
+import os
+import struct
+import sys
+import time
+
+from ChessVar import ChessVar, SQUARES, SQUARE_INDEX, COLORS, PIECE_CODES, PIECE_LETTERS, KING_CODES
+
+
+# a tablebase file starts with MAGIC and the number of tables, then an INDEX_ENTRY for each table
+# (its material, where its values start and how many there are), then one byte per position of each table
+MAGIC = b"RCTBASE1"
+HEADER = struct.Struct("<8sI")
+INDEX_ENTRY = struct.Struct("<16sQQ")
+
+# each position's value byte: 0 for no position (two pieces on one square), DRAW for a drawn position,
+# and 2 + 2 * plies for a win or 3 + 2 * plies for a loss of the player whose turn it is
+NO_POSITION = 0
+DRAW = 1
+UNKNOWN = 255  # not worked out yet, only used while generating
+# the longest win or loss a value byte can hold
+MAX_PLIES = 125
+
+KINGS = (KING_CODES['white'], KING_CODES['black'])
+# the (color, name) of each piece code, as from_pieces takes them
+CODE_PIECES = {code: piece for piece, code in PIECE_CODES.items()}
+
+
+def parse_material(name):
+    """
+    Takes a material name such as "KRvK" or "KvKN" (white's pieces, then black's, kings first) as a parameter.
+    Returns the sorted tuple of piece codes other than the kings.
+    Raises ValueError if the name cannot be read.
+    """
+    sides = name.upper().split("V")
+    if len(sides) != 2 or not all(side.startswith("K") for side in sides):
+        raise ValueError(f"cannot read material {name!r}, expected a name such as 'KRvK'")
+    codes = []
+    for side, letters in zip(("white", "black"), sides):
+        for letter in letters[1:]:
+            if letter not in "RBN":
+                raise ValueError(f"unknown piece letter {letter!r} in material {name!r}")
+            codes.append(KING_CODES[side] + "KRBN".index(letter))
+    return tuple(sorted(codes))
+
+
+def material_name(codes):
+    """ Takes a sorted tuple of piece codes other than the kings. Returns its name, such as "KRvK". """
+    white = "".join(PIECE_LETTERS[code] for code in codes if code < KING_CODES['black'])
+    black = "".join(PIECE_LETTERS[code].upper() for code in codes if code > KING_CODES['black'])
+    return f"K{white}vK{black}"
+
+
+def _sub_materials(codes):
+    """
+    Takes a sorted tuple of piece codes other than the kings.
+    Returns the set of it and every material a capture can lead to from it.
+    """
+    materials = {codes}
+    for slot in range(len(codes)):
+        materials |= _sub_materials(codes[:slot] + codes[slot + 1:])
+    return materials
+
+
+def decode_value(value):
+    """
+    Takes a value byte as a parameter.
+    Returns ('WIN', plies), ('LOSS', plies) or ('DRAW', None) for the player whose turn it is,
+    or None if the byte does not stand for a position.
+    """
+    if value == NO_POSITION or value == UNKNOWN:
+        return None
+    if value == DRAW:
+        return 'DRAW', None
+    return ('WIN' if value % 2 == 0 else 'LOSS'), (value - 2) // 2
+
+
+def _status_value(status, turn):
+    """
+    Takes a finished game status and the color whose turn it is as parameters.
+    Returns the value byte of that result for the player whose turn it is.
+    """
+    if status == 'TIE':
+        return DRAW
+    return 2 if status == turn.upper() + '_WON' else 3
+
+
+def generate_table(codes, tables):
+    """
+    Takes a sorted tuple of piece codes other than the kings and a dictionary of the value bytearrays
+    of every material a capture can lead to as parameters.
+    Returns the bytearray of values of every position with those pieces, by retrograde analysis:
+    finished games are scored first, then each position whose value is decided by the positions
+    one ply later is scored in order of distance, and whatever is left is a draw.
+    Positions are numbered by turn (0 for white), then the white king's, black king's and each other
+    piece's square index, in that order, as digits of a number in base 64.
+    Raises ValueError if a win or loss is longer than MAX_PLIES.
+    """
+    pieces = KINGS + codes
+    size = 2 * 64 ** len(pieces)
+    values = bytearray([UNKNOWN]) * size
+    # the moves out of each position, how many are not yet known to lose, and the positions
+    # with the same material each one leads to (captures lead to an earlier table instead)
+    remaining = array.array('i', bytes(4 * size))
+    child_starts = array.array('i', [0])
+    children = array.array('i')
+    # the positions resolved at each distance, and the (parent, value) of captures leading to a
+    # resolved position at each distance
+    resolved = {0: []}
+    captures = {}
+
+    for index, (turn, *squares) in enumerate(itertools.product(range(2), *[range(64)] * len(pieces))):
+        if len(set(squares)) != len(squares):
+            values[index] = NO_POSITION
+            child_starts.append(len(children))
+            continue
+        white_king, black_king = squares[0], squares[1]
+        if turn == 0 and (white_king >= 56 or black_king >= 56):
+            # the race is decided once black has moved, as in update_game_state
+            if white_king >= 56 and black_king >= 56:
+                values[index] = DRAW
+            else:
+                values[index] = 2 if white_king >= 56 else 3
+                resolved[0].append(index)
+            child_starts.append(len(children))
+            continue
+
+        board = bytearray(64)
+        for code, square in zip(pieces, squares):
+            board[square] = code
+        game = ChessVar.from_pieces({SQUARES[square]: CODE_PIECES[code] for code, square in zip(pieces, squares)},
+                                    COLORS[turn])
+        moves = 0
+        for current, next in game.iter_legal_moves():
+            moves += 1
+            current_index, next_index = SQUARE_INDEX[current], SQUARE_INDEX[next]
+            child = [next_index if square == current_index else square for square in squares]
+            child_codes = pieces
+            if board[next_index]:
+                # the captured piece is never a king, as moves may not hit the opponent's king
+                slot = squares.index(next_index)
+                child = child[:slot] + child[slot + 1:]
+                child_codes = pieces[:slot] + pieces[slot + 1:]
+            child_index = 1 - turn
+            for square in child:
+                child_index = child_index * 64 + square
+            if child_codes is pieces:
+                children.append(child_index)
+                continue
+            value = tables[child_codes[2:]][child_index]
+            if value != DRAW:
+                captures.setdefault((value - 2) // 2, []).append((index, value))
+        remaining[index] = moves
+        child_starts.append(len(children))
+
+    # turn each position's list of children into each position's list of parents
+    parent_starts = array.array('i', bytes(4 * (size + 1)))
+    for child in children:
+        parent_starts[child + 1] += 1
+    for index in range(size):
+        parent_starts[index + 1] += parent_starts[index]
+    parents = array.array('i', bytes(4 * len(children)))
+    filled = array.array('i', parent_starts[:-1])
+    for index in range(size):
+        for child in children[child_starts[index]:child_starts[index + 1]]:
+            parents[filled[child]] = index
+            filled[child] += 1
+    del children, child_starts, filled
+
+    distance = 0
+    while resolved or captures:
+        later = resolved.setdefault(distance + 1, [])
+        events = captures.pop(distance, [])
+        for child in resolved.pop(distance, []):
+            events.extend((parent, values[child]) for parent in parents[parent_starts[child]:parent_starts[child + 1]])
+        for parent, value in events:
+            if values[parent] != UNKNOWN:
+                continue
+            if value % 2:
+                # a move to a position the opponent loses wins, and the first one found is the quickest
+                values[parent] = 2 + 2 * (distance + 1)
+                later.append(parent)
+            else:
+                # a position loses once every move from it is known to lead to a win for the opponent
+                remaining[parent] -= 1
+                if remaining[parent] == 0:
+                    values[parent] = 3 + 2 * (distance + 1)
+                    later.append(parent)
+        if not later:
+            del resolved[distance + 1]
+        elif distance + 1 > MAX_PLIES:
+            raise ValueError(f"{material_name(codes)} has results longer than {MAX_PLIES} plies")
+        distance += 1
+
+    # neither player can force a result from the rest, or the player to move has no moves at all
+    return values.replace(bytes([UNKNOWN]), bytes([DRAW]))
+
+
+def generate(materials, path, report=None):
+    """
+    Takes a list of material names, the path of the file to write and an optional function called
+    with each material name and the seconds taken to generate it as parameters.
+    Generates the tables for those materials and every material a capture can lead to from them,
+    smallest first, and writes them to one tablebase file.
+    Returns the list of material names written.
+    """
+    needed = set()
+    for name in materials:
+        needed |= _sub_materials(parse_material(name))
+    tables = {}
+    for codes in sorted(needed, key=lambda codes: (len(codes), codes)):
+        start = time.perf_counter()
+        tables[codes] = generate_table(codes, tables)
+        if report is not None:
+            report(material_name(codes), time.perf_counter() - start)
+
+    with open(path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, len(tables)))
+        offset = HEADER.size + INDEX_ENTRY.size * len(tables)
+        for codes, values in tables.items():
+            file.write(INDEX_ENTRY.pack(material_name(codes).encode(), offset, len(values)))
+            offset += len(values)
+        for values in tables.values():
+            file.write(values)
+    return [material_name(codes) for codes in tables]
+
+
+class Tablebase:
+    """
+    A class that represents a tablebase file made by generate, read through a memory map.
+    """
+
+    def __init__(self, path):
+        """
+        Creates Tablebase object over the file at path.
+        Raises ValueError if the file is not a tablebase.
+        """
+        self._path = path
+        with open(path, "rb") as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) < HEADER.size or self._map[:len(MAGIC)] != MAGIC:
+            self._map.close()
+            raise ValueError(f"{path} is not a tablebase")
+        count = HEADER.unpack_from(self._map)[1]
+        # the sorted piece codes of every table, kings included, to where its values start
+        self._tables = {}
+        for entry in range(count):
+            name, offset, size = INDEX_ENTRY.unpack_from(self._map, HEADER.size + entry * INDEX_ENTRY.size)
+            codes = parse_material(name.rstrip(b"\0").decode())
+            if offset + size > len(self._map) or size != 2 * 64 ** (len(codes) + 2):
+                self._map.close()
+                raise ValueError(f"{path} is cut short or damaged")
+            self._tables[bytes(sorted(KINGS + codes))] = (offset, KINGS + codes)
+        self._max_pieces = max((len(key) for key in self._tables), default=0)
+
+    def get_path(self):
+        """ Returns the path of the tablebase file. """
+        return self._path
+
+    def get_materials(self):
+        """ Returns the list of material names the tablebase has tables for. """
+        return [material_name(pieces[2:]) for offset, pieces in self._tables.values()]
+
+    def _value(self, game):
+        """
+        Takes a ChessVar object as a parameter.
+        Returns the value byte of its position, or None if the tablebase has no table for its pieces.
+        """
+        bitboards = game.get_bitboards()
+        if sum(map(int.bit_count, bitboards)) > self._max_pieces:
+            return None
+        # the material is the code of every piece on the board, smallest first
+        material = bytes([code for code, bitboard in enumerate(bitboards) if bitboard
+                          for _ in range(bitboard.bit_count())])
+        table = self._tables.get(material)
+        if table is None:
+            return None
+        offset, pieces = table
+        index = 0 if game.get_turn() == 'white' else 1
+        taken = 0  # pieces already counted, so a second piece of the same kind gets the next square
+        for code in pieces:
+            bitboard = bitboards[code] & ~taken
+            lowest = bitboard & -bitboard
+            taken |= lowest
+            index = index * 64 + lowest.bit_length() - 1
+        return self._map[offset + index]
+
+    def probe(self, game):
+        """
+        Takes a ChessVar object as a parameter.
+        Returns ('WIN', plies), ('LOSS', plies) or ('DRAW', None) for the player whose turn it is
+        with perfect play, where plies counts the moves until the game is decided.
+        Returns None if the game is over or the tablebase has no table for its pieces.
+        """
+        if game.get_game_state() != 'UNFINISHED':
+            return None
+        value = self._value(game)
+        return None if value is None else decode_value(value)
+
+    def best_move(self, game):
+        """
+        Takes a ChessVar object as a parameter.
+        Returns (move, result, plies) for the move that wins soonest, failing that draws, failing that
+        loses latest, where result and plies are as probe gives them for the player whose turn it is.
+        Returns None if the game is over, the player has no legal moves or a position is not in the tablebase.
+        The game is left as it was found.
+        """
+        if self.probe(game) is None:
+            return None
+        best, best_rank = None, None
+        for move in game.legal_moves():
+            game._try_move(*move)
+            try:
+                status = game.get_game_state()
+                if status != 'UNFINISHED':
+                    value = _status_value(status, game.get_turn())
+                else:
+                    value = self._value(game)
+            finally:
+                game._take_back()
+            if value is None:
+                return None
+            result, plies = decode_value(value)
+            # the opponent's loss is this player's win, one ply later
+            if result == 'LOSS':
+                rank, found = (0, plies), ('WIN', plies + 1)
+            elif result == 'DRAW':
+                rank, found = (1, 0), ('DRAW', None)
+            else:
+                rank, found = (2, -plies), ('LOSS', plies + 1)
+            if best_rank is None or rank < best_rank:
+                best, best_rank = (move,) + found, rank
+        return best
+
+    def close(self):
+        """
+        Takes no parameters and returns nothing.
+        Closes the memory map.
+        """
+        self._map.close()
+
+    def __enter__(self):
+        """ Returns the Tablebase object for use in a with statement. """
+        return self
+
+    def __exit__(self, *exc_info):
+        """ Closes the tablebase at the end of a with statement. """
+        self.close()
+
+
+def main(argv=None):
+    """
+    Takes a list of command line arguments (sys.argv by default) as a parameter.
+    Generates a tablebase file for the materials given and prints the time each table took.
+    Returns the exit status.
+    """
+    parser = argparse.ArgumentParser(description="Generate ChessVar endgame tablebases.")
+    parser.add_argument("materials", nargs="+", help="material names such as KvK, KRvK or KvKN")
+    parser.add_argument("--output", default="racing.rctb", help="tablebase file to write")
+    args = parser.parse_args(argv)
+    try:
+        generate(args.materials, args.output,
+                 lambda name, seconds: print(f"{name}: {seconds:.1f}s", file=sys.stderr))
+    except ValueError as error:
+        print(error, file=sys.stderr)
+        return 2
+    print(f"wrote {args.output} ({os.path.getsize(args.output)} bytes)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+import os
+import tempfile
+import unittest
+from ChessVar import ChessVar
+from Engine import WIN_SCORE, search
+from Tablebase import Tablebase, generate, parse_material, material_name
+
+
+class TestTablebase(unittest.TestCase):
+    """ Contains unit tests for the Tablebase module. """
+    @classmethod
+    def setUpClass(cls):
+        """ Generates a kings only tablebase in a temporary directory. """
+        cls._directory = tempfile.TemporaryDirectory()
+        cls._path = os.path.join(cls._directory.name, "kings.rctb")
+        generate(["KvK"], cls._path)
+
+    @classmethod
+    def tearDownClass(cls):
+        """ Removes the temporary directory. """
+        cls._directory.cleanup()
+
+    def test_1(self):
+        """ Tests material names are read and written. """
+        self.assertEqual(parse_material("KRvKBN"), (2, 7, 8))
+        self.assertEqual(material_name((2, 7, 8)), "KRvKBN")
+        self.assertEqual(material_name(()), "KvK")
+        self.assertRaises(ValueError, parse_material, "KQvK")
+        self.assertRaises(ValueError, parse_material, "RvK")
+
+    def test_2(self):
+        """ Tests probing follows the race, including black's extra move to tie. """
+        with Tablebase(self._path) as tablebase:
+            self.assertEqual(tablebase.get_materials(), ["KvK"])
+            game = ChessVar.from_fen("8/6K1/8/8/8/8/1k6/8 w")
+            self.assertEqual(tablebase.probe(game), ('WIN', 2))
+            self.assertEqual(tablebase.best_move(game)[1:], ('WIN', 2))
+            game.apply_move(*tablebase.best_move(game)[0])
+            self.assertEqual(tablebase.probe(game), ('LOSS', 1))
+            game = ChessVar.from_fen("8/K5k1/8/8/8/8/8/8 w")            # black ties by reaching row 8 next
+            self.assertEqual(tablebase.probe(game), ('DRAW', None))
+            self.assertEqual(tablebase.probe(ChessVar()), None)          # no table for the starting setup
+
+    def test_3(self):
+        """ Tests the engine takes its move from the tablebase. """
+        game = ChessVar.from_fen("8/6K1/8/8/8/8/1k6/8 w")
+        with Tablebase(self._path) as tablebase:
+            result = search(game, time_limit=None, depth=1, tablebase=tablebase)
+        self.assertEqual(result["tablebase"], True)
+        self.assertEqual(result["score"], WIN_SCORE - 2)
+        self.assertEqual(game.make_move(*result["move"]), True)
+
+    def test_4(self):
+        """ Tests a file that is not a tablebase is refused. """
+        path = os.path.join(self._directory.name, "other.rctb")
+        with open(path, "wb") as file:
+            file.write(b"not a tablebase")
+        self.assertRaises(ValueError, Tablebase, path)
+
+
+if __name__ == '__main__':
+    unittest.main()